@@ -0,0 +1,181 @@
+"""Admission control in front of the API: rate limits and load shedding.
+
+Every request is matched against an ordered list of rules (first match wins).
+A rule gives each client its own token bucket, keyed by address. A request
+whose bearer token passes signature verification is keyed by the token's
+subject at that address instead. An unverified token is ignored, since keying
+on it would let a client mint a fresh bucket with every request. A request that finds the bucket
+empty is refused at once with 429 and a Retry-After saying when a token will
+be available. Rules for expensive routes also cap how many requests run at a
+time across all clients. Requests over the cap wait in a short queue, and are
+refused with 429 when the queue is full or the wait runs out. That keeps one
+busy client (or a burst of PDF builds) from tying up the single SQLite writer
+and the worker threads that staff need during a sale.
+
+The middleware runs on the event loop, so its state needs no locking.
+"""
+import asyncio
+import math
+import re
+import time
+from collections import OrderedDict, deque
+
+from starlette.responses import JSONResponse
+
+MAX_BUCKETS = 50_000
+
+
+class Rule:
+    def __init__(self, name, methods, path, rate, burst, concurrency=None, max_queue=0, queue_timeout_s=2.0):
+        self.name = name
+        self.methods = frozenset(methods)
+        self.path = re.compile(path)
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.queue_timeout_s = queue_timeout_s
+        self.in_flight = 0
+        self.waiters = deque()
+        self.counts = {"admitted": 0, "rate_limited": 0, "overloaded": 0, "queued": 0, "queue_timeouts": 0}
+        self.max_wait_ms = 0.0
+
+    def matches(self, method, path):
+        return method in self.methods and self.path.match(path) is not None
+
+    async def acquire(self):
+        """Take a concurrency slot, waiting in the queue if needed. Returns False if shed."""
+        if self.concurrency is None:
+            return True
+        if self.in_flight < self.concurrency and not self.waiters:
+            self.in_flight += 1
+            return True
+        if len(self.waiters) >= self.max_queue:
+            self.counts["overloaded"] += 1
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        self.counts["queued"] += 1
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout_s)
+        except asyncio.TimeoutError:
+            if waiter.done():  # the slot was handed over just as the wait ran out
+                return True
+            self.waiters.remove(waiter)
+            waiter.cancel()
+            self.counts["queue_timeouts"] += 1
+            return False
+        except asyncio.CancelledError:  # client went away while queued
+            if waiter.done():
+                self.release()
+            else:
+                self.waiters.remove(waiter)
+                waiter.cancel()
+            raise
+        finally:
+            self.max_wait_ms = max(self.max_wait_ms, (time.monotonic() - start) * 1000)
+        return True
+
+    def release(self):
+        """Hand the slot straight to the next waiter, if any."""
+        if self.concurrency is None:
+            return
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def stats(self):
+        return {
+            "rate_per_s": self.rate,
+            "burst": self.burst,
+            "concurrency": self.concurrency,
+            "in_flight": self.in_flight,
+            "queued_now": len(self.waiters),
+            "max_wait_ms": round(self.max_wait_ms, 1),
+            **self.counts,
+        }
+
+
+class AdmissionControl:
+    def __init__(self, rules, enabled=True, identify=None):
+        self.rules = rules
+        self.enabled = enabled
+        self.identify = identify  # bearer token -> verified subject, or None
+        self._buckets = OrderedDict()  # (rule, client) -> [tokens, updated], least recently used first
+
+    def rule_for(self, method, path):
+        return next((rule for rule in self.rules if rule.matches(method, path)), None)
+
+    def take_token(self, rule, client, now=None):
+        """0 if a token was taken, otherwise seconds until one is available."""
+        now = time.monotonic() if now is None else now
+        key = (rule.name, client)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [rule.burst, now]
+            if len(self._buckets) > MAX_BUCKETS:
+                # Forgetting an idle client only hands it a full bucket early.
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(rule.burst, bucket[0] + (now - bucket[1]) * rule.rate)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / rule.rate
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "clients_tracked": len(self._buckets),
+            "rules": {rule.name: rule.stats() for rule in self.rules},
+        }
+
+
+def client_key(scope, identify=None):
+    client = scope.get("client")
+    address = client[0] if client else "unknown"
+    if identify is not None:
+        for name, value in scope.get("headers", ()):
+            if name == b"authorization" and value[:7].lower() == b"bearer ":
+                subject = identify(value[7:].decode("latin-1"))
+                if subject:
+                    return f"user:{subject}@{address}"
+                break
+    return f"addr:{address}"
+
+
+def too_many_requests(retry_after_s, detail):
+    return JSONResponse({"detail": detail}, status_code=429,
+                        headers={"Retry-After": str(max(1, math.ceil(retry_after_s)))})
+
+
+class AdmissionMiddleware:
+    def __init__(self, app, control):
+        self.app = app
+        self.control = control
+
+    async def __call__(self, scope, receive, send):
+        control = self.control
+        if scope["type"] != "http" or not control.enabled:
+            return await self.app(scope, receive, send)
+        rule = control.rule_for(scope["method"], scope["path"])
+        if rule is None:
+            return await self.app(scope, receive, send)
+
+        wait = control.take_token(rule, client_key(scope, control.identify))
+        if wait:
+            rule.counts["rate_limited"] += 1
+            return await too_many_requests(wait, "Too many requests, slow down")(scope, receive, send)
+        if not await rule.acquire():
+            return await too_many_requests(1, "Server busy, try again shortly")(scope, receive, send)
+        rule.counts["admitted"] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            rule.release()
@@ -0,0 +1,89 @@
+"""Cold storage for archived auctions and lots.
+
+Archived rows live in a separate database ATTACHed as `archive`, so the hot
+tables hold only live data and need no is_archived filter. The archive tables
+copy the hot tables' columns (not their UNIQUE/CHECK/FOREIGN KEY constraints)
+and gain any column added to the hot table later.
+
+With the main database in WAL mode a transaction spanning both files is
+atomic per file only, so moves happen in two committed steps. Archiving first
+flags the hot row and copies it across, then deletes the flagged hot row.
+Restoring first copies the row back, then deletes the archive copy. If the
+process dies between the two steps, reconcile() at startup finishes the move.
+The same pass moves rows archived before this module existed.
+"""
+SCHEMA = "archive"
+TABLES = ("auctions", "lots")
+
+
+def columns(conn, schema, table):
+    return [row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table})").fetchall()]
+
+
+def ensure_schema(conn):
+    for table in TABLES:
+        hot = conn.execute(f"PRAGMA main.table_info({table})").fetchall()
+        existing = set(columns(conn, SCHEMA, table))
+        if not existing:
+            definitions = ", ".join(
+                "id INTEGER PRIMARY KEY" if name == "id" else
+                f"{name} {col_type}" + (f" DEFAULT {default}" if default is not None else "")
+                for _, name, col_type, _, default, _ in hot
+            )
+            conn.execute(f"CREATE TABLE {SCHEMA}.{table} ({definitions})")
+            continue
+        for _, name, col_type, _, default, _ in hot:
+            if name not in existing:
+                conn.execute(f"ALTER TABLE {SCHEMA}.{table} ADD COLUMN {name} {col_type}"
+                             + (f" DEFAULT {default}" if default is not None else ""))
+
+
+def copy_rows(conn, source, target, table, where, params=(), replace=False):
+    shared = set(columns(conn, target, table))
+    cols = ", ".join(c for c in columns(conn, source, table) if c in shared)
+    verb = "INSERT OR REPLACE" if replace else "INSERT"
+    return conn.execute(f"{verb} INTO {target}.{table} ({cols}) SELECT {cols} FROM {source}.{table} WHERE {where}",
+                        params).rowcount
+
+
+def reconcile(conn):
+    """Finish interrupted moves and move any hot rows still flagged as archived."""
+    moved = {}
+    for table in TABLES:
+        moved[table] = copy_rows(conn, "main", SCHEMA, table, "is_archived = 1", replace=True)
+        conn.execute(f"DELETE FROM main.{table} WHERE is_archived = 1")
+        conn.execute(f"DELETE FROM {SCHEMA}.{table} AS a WHERE EXISTS (SELECT 1 FROM main.{table} h WHERE h.id = a.id)")
+    return moved
+
+
+def archive_row(writer, table, row_id):
+    """Move a hot row into the archive. Returns False if there was no such row."""
+    def flag_and_copy(conn):
+        if not conn.execute(f"UPDATE main.{table} SET is_archived = 1 WHERE id = ?", (row_id,)).rowcount:
+            return False
+        copy_rows(conn, "main", SCHEMA, table, "id = ?", (row_id,), replace=True)
+        return True
+
+    if not writer.run(flag_and_copy):
+        return False
+    writer.run(lambda conn: conn.execute(f"DELETE FROM main.{table} WHERE id = ? AND is_archived = 1", (row_id,)))
+    return True
+
+
+def restore_row(writer, table, row_id):
+    """Move an archived row back to the hot table. Returns False if it is not archived.
+
+    Raises sqlite3.IntegrityError if a hot row has since taken one of its unique values."""
+    def copy_back(conn):
+        if not copy_rows(conn, SCHEMA, "main", table, "id = ?", (row_id,)):
+            return False
+        conn.execute(f"UPDATE main.{table} SET is_archived = 0 WHERE id = ?", (row_id,))
+        return True
+
+    if not writer.run(copy_back):
+        return False
+    writer.run(lambda conn: conn.execute(
+        f"DELETE FROM {SCHEMA}.{table} WHERE id = ? AND id IN (SELECT id FROM main.{table})", (row_id,)
+    ))
+    return True
+
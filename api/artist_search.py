@@ -0,0 +1,155 @@
+"""Typo-tolerant artist lookup.
+
+Distinct artist names are kept in artist_names with their word trigrams in
+artist_trigrams. A lookup collects the names sharing the most trigrams with
+the query, then ranks them by a bounded Damerau-Levenshtein distance against
+the whole name, each run of words and each word prefix, so "Hokney",
+"Basquait" and "Gerhard Richtr" still find their artists.
+
+Names stay in the index after their last lot is deleted; a lookup drops
+names with no lot (through idx_lots_artist) before taking its candidates,
+so stale names never crowd out live ones. Bulk loaders that write lots
+directly (scripts/create_mock_data.py, scripts/generate_load_data.py against
+a database the API has already migrated) bypass index_artist(); run
+rebuild() after them.
+"""
+import re
+import unicodedata
+
+CANDIDATES = 64
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS artist_names (
+        id INTEGER PRIMARY KEY,
+        name TEXT UNIQUE NOT NULL,
+        normalized TEXT NOT NULL,
+        trigram_count INTEGER NOT NULL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS artist_trigrams (
+        trigram TEXT NOT NULL,
+        artist_id INTEGER NOT NULL,
+        PRIMARY KEY (trigram, artist_id)
+    ) WITHOUT ROWID
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_lots_artist ON lots(artist)",
+]
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return " ".join(re.findall(r"[a-z0-9]+", text))
+
+
+def trigrams(normalized):
+    grams = set()
+    for word in normalized.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def max_distance_for(query):
+    length = len(query.replace(" ", ""))
+    if length <= 4:
+        return 0
+    if length <= 8:
+        return 1
+    return 2
+
+
+def bounded_distance(a, b, limit):
+    """Optimal string alignment distance, or limit + 1 once it is certain to exceed limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def name_distance(query, normalized, limit):
+    """Best distance of the query to the full name, any run of as many words, or their prefixes."""
+    best = bounded_distance(query, normalized, limit)
+    words = normalized.split()
+    span = len(query.split())
+    for start in range(len(words) - span + 1):
+        window = " ".join(words[start:start + span])
+        best = min(best, bounded_distance(query, window, limit),
+                   bounded_distance(query, window[:len(query)], limit))
+        if best == 0:
+            break
+    return best
+
+
+def ensure_schema(conn):
+    for statement in SCHEMA:
+        conn.execute(statement)
+
+
+def index_artist(conn, name):
+    """Add a name to the index if it is new. Call inside the write transaction that stores the lot."""
+    if not name:
+        return
+    normalized = normalize(name)
+    grams = trigrams(normalized)
+    cursor = conn.execute(
+        "INSERT OR IGNORE INTO artist_names (name, normalized, trigram_count) VALUES (?, ?, ?)",
+        (name, normalized, len(grams))
+    )
+    if cursor.rowcount:
+        conn.executemany("INSERT OR IGNORE INTO artist_trigrams (trigram, artist_id) VALUES (?, ?)",
+                         [(gram, cursor.lastrowid) for gram in grams])
+
+
+def rebuild(conn):
+    """Re-index every distinct artist in lots."""
+    conn.execute("DELETE FROM artist_trigrams")
+    conn.execute("DELETE FROM artist_names")
+    for (name,) in conn.execute("SELECT DISTINCT artist FROM lots WHERE artist IS NOT NULL").fetchall():
+        index_artist(conn, name)
+
+
+def suggest(conn, query, limit=10, max_distance=None):
+    """Ranked [{"artist", "distance"}] for names within max_distance edits of the query."""
+    normalized = normalize(query)
+    grams = trigrams(normalized)
+    if not grams:
+        return []
+    if max_distance is None:
+        max_distance = max_distance_for(normalized)
+
+    rows = conn.execute(f'''
+        SELECT n.id, n.name, n.normalized, n.trigram_count, c.shared
+        FROM (
+            SELECT t.artist_id, COUNT(*) AS shared FROM artist_trigrams t
+            WHERE t.trigram IN ({",".join("?" * len(grams))})
+            GROUP BY t.artist_id
+            HAVING EXISTS (SELECT 1 FROM artist_names live JOIN lots ON lots.artist = live.name
+                           WHERE live.id = t.artist_id)
+            ORDER BY shared DESC LIMIT {CANDIDATES}
+        ) c
+        JOIN artist_names n ON n.id = c.artist_id
+    ''', list(grams)).fetchall()
+
+    ranked = []
+    for artist_id, name, candidate, trigram_count, shared in rows:
+        distance = name_distance(normalized, candidate, max_distance)
+        if distance <= max_distance:
+            similarity = shared / (len(grams) + trigram_count - shared)
+            ranked.append((distance, -similarity, name))
+    ranked.sort()
+
+    return [{"artist": name, "distance": distance} for distance, _, name in ranked[:limit]]
@@ -0,0 +1,125 @@
+"""Keeps auctions.status in step with the clock.
+
+An auction is Upcoming until its start time in the saleroom's timezone, Live
+for the rest of that day, then Completed. Cancelled auctions are left alone.
+Status is stored (and indexed) rather than derived per row at query time; the
+scheduler thread applies each transition when it falls due and runs a
+catch-up pass when it starts, so a restart after downtime converges at once.
+"""
+import logging
+import threading
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+log = logging.getLogger(__name__)
+
+LOCATION_TIMEZONES = {
+    "London": ZoneInfo("Europe/London"),
+    "Paris": ZoneInfo("Europe/Paris"),
+    "New York": ZoneInfo("America/New_York"),
+}
+OPEN_STATUSES = ("Upcoming", "Live")
+MAX_SLEEP_S = 300
+
+
+def parse_start_time(value):
+    """'9:30am' / '2:00pm' -> time."""
+    return datetime.strptime(value.strip().lower(), "%I:%M%p").time()
+
+
+def auction_window(auction_date, start_time, location):
+    """(starts, ends) as aware UTC datetimes; the auction ends at the saleroom's midnight."""
+    tz = LOCATION_TIMEZONES.get(location, timezone.utc)
+    day = date.fromisoformat(str(auction_date)[:10])
+    try:
+        starts_local = datetime.combine(day, parse_start_time(start_time), tz)
+    except (AttributeError, ValueError):
+        starts_local = datetime.combine(day, time.min, tz)
+    ends_local = datetime.combine(day + timedelta(days=1), time.min, tz)
+    return starts_local.astimezone(timezone.utc), ends_local.astimezone(timezone.utc)
+
+
+def status_at(auction_date, start_time, location, now=None):
+    now = now or datetime.now(timezone.utc)
+    starts, ends = auction_window(auction_date, start_time, location)
+    if now < starts:
+        return "Upcoming"
+    if now < ends:
+        return "Live"
+    return "Completed"
+
+
+def refresh(conn, now=None):
+    """Apply due transitions to open auctions. Returns (changed, next transition time or None)."""
+    now = now or datetime.now(timezone.utc)
+    rows = conn.execute(f'''
+        SELECT id, auction_date, start_time, location, status FROM auctions
+        WHERE status IN ({",".join("?" * len(OPEN_STATUSES))})
+    ''', OPEN_STATUSES).fetchall()
+
+    updates, next_due = [], None
+    for auction_id, auction_date, start_time, location, current in rows:
+        starts, ends = auction_window(auction_date, start_time, location)
+        new = "Upcoming" if now < starts else "Live" if now < ends else "Completed"
+        if new != current:
+            updates.append((new, auction_id))
+        due = starts if new == "Upcoming" else ends if new == "Live" else None
+        if due and (next_due is None or due < next_due):
+            next_due = due
+
+    conn.executemany("UPDATE auctions SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?", updates)
+    return len(updates), next_due
+
+
+class AuctionStatusScheduler:
+    """Background thread that runs refresh() through the database writer.
+
+    It sleeps until the next transition is due (capped at MAX_SLEEP_S so clock
+    changes and missed pokes still converge). Call poke() after creating an
+    auction or moving its date so the next wake-up is recomputed.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self.transitions = 0
+        self.next_due = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping = False
+        self.run_once()
+        self._thread = threading.Thread(target=self._loop, name="auction-status", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping = True
+        self._wake.set()
+        if self._thread:
+            self._thread.join()
+        self._thread = None
+
+    def poke(self):
+        self._wake.set()
+
+    def run_once(self):
+        changed, self.next_due = self.writer.run(refresh)
+        self.transitions += changed
+        return changed
+
+    def _loop(self):
+        while not self._stopping:
+            timeout = MAX_SLEEP_S
+            if self.next_due is not None:
+                timeout = min(MAX_SLEEP_S, max(0.0, (self.next_due - datetime.now(timezone.utc)).total_seconds()))
+            self._wake.wait(timeout)
+            self._wake.clear()
+            if self._stopping:
+                break
+            try:
+                self.run_once()
+            except Exception:
+                log.exception("Auction status refresh failed")
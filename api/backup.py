@@ -0,0 +1,210 @@
+"""Online backups of the live and archive databases.
+
+A snapshot is taken with SQLite's backup API, copying pages_per_step pages
+at a time and pausing between steps, so live traffic keeps the disk. The
+source connection holds one read transaction across both databases for the
+whole copy. In WAL mode that never blocks writers, and it means commits
+made meanwhile neither restart the copy nor make the two files disagree.
+Inside the API the read transaction is opened from a writer job, so no
+commit can land between pinning the two files. (Archiving and restoring
+move rows between them in two commits.)
+
+Each snapshot is written to a temporary directory, switched to rollback
+journaling so it is a single self-contained file, checked with PRAGMA
+integrity_check, and only then renamed into place. The newest keep
+snapshots are retained. A lock file stops two workers, or a worker and the
+CLI, from backing up at once.
+"""
+import fcntl
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from api.database import connect_readonly
+
+log = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = "%Y%m%dT%H%M%SZ"
+
+
+class BackupError(Exception):
+    pass
+
+
+class BackupInProgress(BackupError):
+    pass
+
+
+def copy_schema(source, schema, target_path, pages_per_step, pause_s):
+    target = sqlite3.connect(str(target_path))
+    steps = 0
+
+    def progress(status, remaining, total):
+        nonlocal steps
+        steps += 1
+        if remaining and pause_s:
+            time.sleep(pause_s)  # Connection.backup only sleeps on SQLITE_BUSY
+
+    try:
+        source.backup(target, pages=pages_per_step, progress=progress, name=schema)
+        target.execute("PRAGMA journal_mode = DELETE")
+        result = target.execute("PRAGMA integrity_check").fetchone()[0]
+        pages = target.execute("PRAGMA page_count").fetchone()[0]
+    finally:
+        target.close()
+    if result != "ok":
+        raise BackupError(f"integrity_check failed for {schema}: {result}")
+    return {"pages": pages, "steps": steps, "bytes": target_path.stat().st_size}
+
+
+def snapshots(directory):
+    """Completed snapshot directories, newest first."""
+    directory = Path(directory)
+    if not directory.is_dir():
+        return []
+    return sorted((p for p in directory.iterdir() if p.is_dir() and (p / "manifest.json").exists()), reverse=True)
+
+
+class BackupManager:
+    def __init__(self, db_path, attach, directory, keep=7, pages_per_step=256, pause_s=0.01, writer=None):
+        self.databases = {"main": Path(db_path), **{schema: Path(path) for schema, path in attach.items()}}
+        self.directory = Path(directory)
+        self.keep = keep
+        self.pages_per_step = pages_per_step
+        self.pause_s = pause_s
+        self.writer = writer
+        self.last = None
+        self.last_error = None
+        self.runs = self.failures = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _pin(self, source):
+        """Open the read transaction on every database. Done from a writer job when there
+        is one, so no commit can land between them."""
+        def pin(_conn=None):
+            source.execute("BEGIN")
+            for schema in self.databases:
+                source.execute(f"SELECT COUNT(*) FROM {schema}.sqlite_master").fetchone()
+
+        if self.writer is not None:
+            self.writer.run(pin)
+        else:
+            pin()
+
+    def run(self):
+        """Take, verify and rotate one snapshot. Returns its manifest."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / ".lock", "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise BackupInProgress("Another backup is already running")
+            try:
+                manifest = self._snapshot()
+            except Exception as e:
+                self.failures += 1
+                self.last_error = {"at": datetime.now(timezone.utc).isoformat(), "error": str(e)}
+                raise
+            finally:
+                self.runs += 1
+            self.last = manifest
+            self.rotate()
+            return manifest
+
+    def _snapshot(self):
+        started = datetime.now(timezone.utc)
+        name = started.strftime(SNAPSHOT_FORMAT)
+        tmp = self.directory / f".{name}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir()
+        start = time.perf_counter()
+        attach = {schema: path for schema, path in self.databases.items() if schema != "main"}
+        source = connect_readonly(self.databases["main"], attach=attach)
+        source.isolation_level = None  # the read transaction is managed by hand
+        try:
+            self._pin(source)
+            files = {}
+            for schema, path in self.databases.items():
+                files[schema] = {"file": path.name, **copy_schema(
+                    source, schema, tmp / path.name, self.pages_per_step, self.pause_s
+                )}
+            source.execute("COMMIT")
+        except Exception:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        finally:
+            source.close()
+
+        manifest = {
+            "name": name,
+            "started_at": started.isoformat(),
+            "duration_s": round(time.perf_counter() - start, 3),
+            "bytes": sum(f["bytes"] for f in files.values()),
+            "integrity_check": "ok",
+            "files": files,
+        }
+        (tmp / "manifest.json").write_text(json.dumps(manifest, indent=2))
+        target = self.directory / name
+        if target.exists():  # two runs within the same second
+            shutil.rmtree(target)
+        os.replace(tmp, target)
+        return manifest
+
+    def rotate(self):
+        for old in snapshots(self.directory)[self.keep:]:
+            shutil.rmtree(old, ignore_errors=True)
+
+    def list(self):
+        return [json.loads((path / "manifest.json").read_text()) for path in snapshots(self.directory)]
+
+    def due(self, interval_s):
+        newest = snapshots(self.directory)[:1]
+        if not newest:
+            return True
+        taken = datetime.strptime(newest[0].name, SNAPSHOT_FORMAT).replace(tzinfo=timezone.utc)
+        return (datetime.now(timezone.utc) - taken).total_seconds() >= interval_s
+
+    def stats(self):
+        return {
+            "directory": str(self.directory),
+            "keep": self.keep,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last": self.last,
+            "last_error": self.last_error,
+            "snapshots": len(snapshots(self.directory)),
+        }
+
+    def start(self, interval_s):
+        if interval_s <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, args=(interval_s,), name="backup", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self._thread = None
+
+    def _loop(self, interval_s):
+        # Several workers may run this loop; the newest snapshot's age (and the
+        # lock file) keep them from backing up more often than interval_s.
+        check_s = min(interval_s, 300)
+        while not self._stop.wait(check_s):
+            if not self.due(interval_s):
+                continue
+            try:
+                self.run()
+            except BackupInProgress:
+                pass
+            except Exception:
+                log.exception("Backup failed")
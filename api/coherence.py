@@ -0,0 +1,137 @@
+"""Keeps in-process caches correct when several workers share the database.
+
+Triggers bump a per-region sequence number in change_log inside every
+transaction that touches the region, whichever process or script wrote it.
+Each worker holds one read-only connection and, before serving a request,
+asks it for PRAGMA data_version. That value only changes after another
+connection has committed, so the usual cost is one pragma. When it does
+change, the worker reads change_log and runs the invalidation callbacks of
+the regions whose sequence moved.
+
+A worker that updates its own caches as part of a write (rather than
+dropping them) calls acknowledge() with the sequence values read before and
+after its write in the same transaction. This stops the next check from
+throwing away what it just updated. If another worker wrote in between, the
+sequence will not line up and the region is invalidated as usual.
+"""
+import threading
+
+from api.database import connect_readonly
+
+REGIONS = ("auctions", "lots", "sold_lots", "lot_images")
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS change_log (
+        region TEXT PRIMARY KEY,
+        seq INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID
+    ''',
+    *(f"INSERT OR IGNORE INTO change_log (region, seq) VALUES ('{region}', 0)" for region in REGIONS),
+]
+
+
+def bump(region):
+    return f"UPDATE change_log SET seq = seq + 1 WHERE region = '{region}';"
+
+
+# (trigger name, event, table, WHEN condition or None, regions)
+TRIGGERS = [
+    ("trg_auctions_insert", "INSERT", "auctions", None, ["auctions"]),
+    ("trg_auctions_update", "UPDATE", "auctions", None, ["auctions"]),
+    ("trg_auctions_delete", "DELETE", "auctions", None, ["auctions"]),
+    ("trg_lots_insert", "INSERT", "lots", None, ["lots"]),
+    ("trg_lots_update", "UPDATE", "lots", None, ["lots"]),
+    ("trg_lots_delete", "DELETE", "lots", None, ["lots"]),
+    ("trg_sold_lots_insert", "INSERT", "lots", "NEW.status = 'Sold'", ["sold_lots"]),
+    ("trg_sold_lots_update", "UPDATE", "lots", "OLD.status = 'Sold' OR NEW.status = 'Sold'", ["sold_lots"]),
+    ("trg_sold_lots_delete", "DELETE", "lots", "OLD.status = 'Sold'", ["sold_lots"]),
+    ("trg_lot_images_insert", "INSERT", "lot_images", None, ["lot_images"]),
+    ("trg_lot_images_update", "UPDATE", "lot_images", None, ["lot_images"]),
+    ("trg_lot_images_delete", "DELETE", "lot_images", None, ["lot_images"]),
+]
+
+
+def ensure_schema(conn):
+    for statement in SCHEMA:
+        conn.execute(statement)
+    for name, event, table, when, regions in TRIGGERS:
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table}
+            {f"WHEN {when}" if when else ""}
+            BEGIN {" ".join(bump(region) for region in regions)} END
+        ''')
+
+
+def seq(conn, region):
+    return conn.execute("SELECT seq FROM change_log WHERE region = ?", (region,)).fetchone()[0]
+
+
+class CoherenceMonitor:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._data_version = None
+        self._seen = {}
+        self._callbacks = {}
+        self.checks = 0
+        self.commits_seen = 0
+        self.invalidations = {}
+
+    def register(self, region, callback):
+        """Call callback() whenever another connection changes region."""
+        if region not in REGIONS:
+            raise ValueError(f"Unknown cache region: {region}")
+        self._callbacks.setdefault(region, []).append(callback)
+
+    def start(self):
+        with self._lock:
+            if self._conn is None:
+                self._conn = connect_readonly(self.db_path)
+                self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+                self._seen = dict(self._conn.execute("SELECT region, seq FROM change_log").fetchall())
+
+    def stop(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def check(self):
+        """Invalidate the regions changed by other connections since the last check. Returns their names."""
+        with self._lock:
+            if self._conn is None:
+                return []
+            self.checks += 1
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version == self._data_version:
+                return []
+            self._data_version = data_version
+            self.commits_seen += 1
+            current = dict(self._conn.execute("SELECT region, seq FROM change_log").fetchall())
+            changed = [region for region, value in current.items() if self._seen.get(region) != value]
+            self._seen = current
+            for region in changed:
+                self.invalidations[region] = self.invalidations.get(region, 0) + 1
+
+        for region in changed:
+            for callback in self._callbacks.get(region, []):
+                callback()
+        return changed
+
+    def acknowledge(self, region, before, after):
+        """Mark a write made by this process as already reflected in its caches."""
+        with self._lock:
+            if self._seen.get(region) == before:
+                self._seen[region] = after
+
+    def stats(self):
+        with self._lock:
+            return {
+                "checks": self.checks,
+                "commits_seen": self.commits_seen,
+                "invalidations": dict(self.invalidations),
+                "seen": dict(self._seen),
+                "regions": {region: len(self._callbacks.get(region, [])) for region in REGIONS},
+            }
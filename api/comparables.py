@@ -0,0 +1,192 @@
+"""Comparable-sales lookup for valuing consignments.
+
+Every Sold lot (hot and archived) is held in memory as a row of NumPy arrays:
+integer codes for artist, category and medium, and log-scaled height, width
+and depth. A query scores all rows in one vectorised pass, keeps the top k
+with argpartition, and derives a suggested estimate from the weighted
+quartiles of their hammer prices. Only comparables by the same artist or in
+the same category count towards the estimate; when none of the top k do,
+suggested_estimate is None rather than a price read off unrelated sales.
+complete_sale() adds rows as prices are
+recorded, so the index never needs a full rebuild while the process runs.
+NumPy is imported when the index is first filled, not at API startup.
+"""
+import math
+import threading
+
+from api.artist_search import normalize
+
+SOLD_LOTS_SQL = '''
+    SELECT id, artist, title, category, medium, height, width, depth, sold_price FROM {table}
+    WHERE status = 'Sold' AND sold_price IS NOT NULL
+'''
+
+ARTIST_WEIGHT = 3.0
+CATEGORY_WEIGHT = 1.5
+MEDIUM_WEIGHT = 1.0
+SIZE_WEIGHT = 2.0
+MISSING_SIZE_PENALTY = 1.0
+UNKNOWN = -1
+
+
+def log_dimensions(height, width, depth):
+    return [math.log1p(v) if v else math.nan for v in (height, width, depth)]
+
+
+def round_estimate(value):
+    """Round to two significant figures, as printed estimates are."""
+    if value <= 0:
+        return 0
+    return round(value, 1 - int(math.floor(math.log10(value))))
+
+
+def weighted_quantile(values, weights, q):
+    import numpy as np
+    order = np.argsort(values)
+    values, weights = values[order], weights[order]
+    cumulative = np.cumsum(weights) - 0.5 * weights
+    return float(np.interp(q * weights.sum(), cumulative, values))
+
+
+class ComparablesIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._loaded = False
+        self._vocab = {"artist": {}, "category": {}, "medium": {}}
+        self._positions = {}
+        self._lots = []
+        self._n = 0
+        self._artist = self._category = self._medium = self._dims = self._price = None
+
+    def _allocate(self, capacity):
+        import numpy as np
+
+        def grow(old, shape, dtype, fill):
+            new = np.full(shape, fill, dtype=dtype)
+            if old is not None:
+                new[:len(old)] = old
+            return new
+
+        self._artist = grow(self._artist, capacity, np.int32, UNKNOWN)
+        self._category = grow(self._category, capacity, np.int32, UNKNOWN)
+        self._medium = grow(self._medium, capacity, np.int32, UNKNOWN)
+        self._dims = grow(self._dims, (capacity, 3), np.float32, np.nan)
+        self._price = grow(self._price, capacity, np.float64, 0.0)
+
+    def _code(self, field, value, create=False):
+        key = normalize(value) if value else ""
+        if not key:
+            return UNKNOWN
+        vocab = self._vocab[field]
+        if key not in vocab and create:
+            vocab[key] = len(vocab)
+        return vocab.get(key, UNKNOWN)
+
+    def _put(self, row):
+        row = dict(row)
+        position = self._positions.get(row["id"])
+        if position is None:
+            if self._price is None:
+                self._allocate(1024)
+            elif self._n == len(self._price):
+                self._allocate(2 * len(self._price))
+            position = self._n
+            self._lots.append(None)
+            self._positions[row["id"]] = position
+        self._artist[position] = self._code("artist", row["artist"], create=True)
+        self._category[position] = self._code("category", row["category"], create=True)
+        self._medium[position] = self._code("medium", row["medium"], create=True)
+        self._dims[position] = log_dimensions(row["height"], row["width"], row["depth"])
+        self._price[position] = row["sold_price"]
+        self._lots[position] = {key: row[key] for key in
+                                ("id", "artist", "title", "category", "medium", "height", "width", "depth", "sold_price")}
+        if position == self._n:
+            self._n += 1
+
+    def ensure_loaded(self, conn):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            rows = conn.execute(SOLD_LOTS_SQL.format(table="lots") + " UNION ALL "
+                                + SOLD_LOTS_SQL.format(table="archive.lots")).fetchall()
+            for row in rows:
+                self._put(row)
+            self._loaded = True
+
+    def add(self, row):
+        """Record a sale (or a corrected price). Ignored until the index is first loaded,
+        since the initial load reads every sale anyway."""
+        with self._lock:
+            if self._loaded:
+                self._put(row)
+
+    def invalidate(self):
+        """Drop everything; the next query reloads from the database."""
+        with self._lock:
+            self._reset()
+
+    def __len__(self):
+        return self._n
+
+    def query(self, artist=None, category=None, medium=None, height=None, width=None, depth=None,
+              k=10, exclude_id=None):
+        import numpy as np
+
+        with self._lock:
+            n = self._n
+            if n == 0:
+                return {"comparables": [], "suggested_estimate": None, "based_on": 0}
+            artist_codes, category_codes, medium_codes = self._artist[:n], self._category[:n], self._medium[:n]
+            dims, prices, lots = self._dims[:n], self._price[:n], self._lots
+            q_artist = self._code("artist", artist)
+            q_category = self._code("category", category)
+            q_medium = self._code("medium", medium)
+            exclude = self._positions.get(exclude_id)
+        score = np.zeros(n, dtype=np.float32)
+        relevant = np.zeros(n, dtype=bool)
+        if q_artist != UNKNOWN:
+            relevant |= artist_codes == q_artist
+            score += ARTIST_WEIGHT * (artist_codes == q_artist)
+        if q_category != UNKNOWN:
+            relevant |= category_codes == q_category
+            score += CATEGORY_WEIGHT * (category_codes == q_category)
+        if q_medium != UNKNOWN:
+            score += MEDIUM_WEIGHT * (medium_codes == q_medium)
+
+        q_dims = np.array(log_dimensions(height, width, depth), dtype=np.float32)
+        given = ~np.isnan(q_dims)
+        if given.any():
+            diff = np.abs(dims[:, given] - q_dims[given])
+            diff = np.where(np.isnan(diff), MISSING_SIZE_PENALTY, diff)
+            score -= SIZE_WEIGHT * diff.mean(axis=1)
+        available = n
+        if exclude is not None and exclude < n:
+            score[exclude] = -np.inf
+            available -= 1
+        if available == 0:
+            return {"comparables": [], "suggested_estimate": None, "based_on": 0}
+
+        k = max(1, min(k, available))
+        top = np.argpartition(-score, k - 1)[:k]
+        top = top[np.argsort(-score[top], kind="stable")]
+
+        comparables = [dict(lots[i], score=round(float(score[i]), 3)) for i in top]
+        basis = top[relevant[top]]
+        if len(basis) == 0:
+            return {"comparables": comparables, "suggested_estimate": None, "based_on": 0}
+        weights = np.exp(score[basis] - score[basis].max())
+        basis_prices = prices[basis]
+        return {
+            "comparables": comparables,
+            "suggested_estimate": {
+                "low": round_estimate(weighted_quantile(basis_prices, weights, 0.25)),
+                "high": round_estimate(weighted_quantile(basis_prices, weights, 0.75)),
+                "median": round_estimate(weighted_quantile(basis_prices, weights, 0.5)),
+            },
+            "based_on": len(basis),
+        }
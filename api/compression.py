@@ -0,0 +1,283 @@
+"""Response compression: gzip, or brotli when the brotli module is installed.
+
+Responses are compressed when the client accepts it, the status is 200, the
+content type is in CONTENT_TYPES and the body is at least minimum_size
+bytes. Streamed bodies (files, CSV exports) are compressed chunk by chunk.
+Bodies larger than OFFLOAD_BYTES are compressed on a worker thread, since
+zlib and brotli release the GIL and a few MB of JSON would otherwise stall
+the event loop. Bodies over LARGE_BYTES, and streams of unknown length, use
+the fastest level: on the 34 MB unfiltered catalogue, gzip -1 takes a
+third of the time of -6 for a 10% rather than 8% ratio.
+
+A response with an ETag is the same bytes every time, so its compressed body
+is kept in an LRU cache keyed by URL, ETag and encoding, and repeat hits
+send it without compressing again. The compressed representation gets its
+own strong ETag (the original with -gz or -br appended inside the quotes).
+The suffix is stripped from If-None-Match before the request reaches the
+app, so the app's own 304 checks keep working.
+"""
+import re
+import time
+import zlib
+from collections import OrderedDict
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CONTENT_TYPES = frozenset({
+    "application/json", "application/pdf", "application/javascript", "image/svg+xml",
+    "text/csv", "text/html", "text/plain", "text/css",
+})
+SUFFIXES = {"br": "br", "gzip": "gz"}
+OFFLOAD_BYTES = 32 * 1024
+LARGE_BYTES = 1024 * 1024
+GZIP_LEVELS = (6, 1)  # normal, large
+BROTLI_QUALITIES = (5, 1)  # 11 is far too slow for dynamic responses
+ETAG_SUFFIX = re.compile(r'-(?:gz|br)"')
+
+
+class Compressor:
+    def __init__(self, encoding, large=False):
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=BROTLI_QUALITIES[large])
+            self.compress, self.flush = self._br.process, self._br.finish
+        else:
+            self._zlib = zlib.compressobj(GZIP_LEVELS[large], zlib.DEFLATED, 31)  # wbits 31: gzip container
+            self.compress, self.flush = self._zlib.compress, self._zlib.flush
+
+
+def negotiate(accept_encoding, available):
+    """The acceptable encoding with the highest q-value (ties go to the earlier of available)."""
+    weights, wildcard = {}, None
+    for part in accept_encoding.lower().split(","):
+        name, *params = (p.strip() for p in part.split(";"))
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name == "*":
+            wildcard = q
+        elif name in available:
+            weights[name] = q
+    if wildcard is not None:
+        for encoding in available:
+            weights.setdefault(encoding, wildcard)
+    best = max(available, key=lambda e: weights.get(e, 0.0))
+    return best if weights.get(best, 0.0) > 0 else None
+
+
+def tag_etag(etag, encoding):
+    return f'{etag[:-1]}-{SUFFIXES[encoding]}"' if etag.endswith('"') else etag
+
+
+class CompressionControl:
+    def __init__(self, minimum_size=1024, cache_bytes=64 * 1024 * 1024, enabled=True):
+        self.minimum_size = minimum_size
+        self.cache_bytes = cache_bytes
+        self.enabled = enabled
+        self.encodings = ("br", "gzip") if brotli else ("gzip",)
+        self._cache = OrderedDict()  # (url, etag, encoding) -> (compressed, original size), least recent first
+        self._cached_bytes = 0
+        self.counts = {"compressed": 0, "streamed": 0, "cache_hits": 0, "too_small": 0, "not_accepted": 0}
+        self.bytes_in = self.bytes_out = 0
+        self.cpu_s = 0.0
+        self.by_encoding = {encoding: 0 for encoding in self.encodings}
+
+    def _timed(self, function, data):
+        start = time.thread_time()
+        try:
+            return function(data)
+        finally:
+            self.cpu_s += time.thread_time() - start
+
+    async def run(self, function, data):
+        """function(data), timed, off the event loop when data is large."""
+        if len(data) > OFFLOAD_BYTES:
+            return await run_in_threadpool(self._timed, function, data)
+        return self._timed(function, data)
+
+    async def compress(self, body, encoding):
+        compressor = Compressor(encoding, large=len(body) > LARGE_BYTES)
+        return await self.run(lambda data: compressor.compress(data) + compressor.flush(), body)
+
+    def cached(self, key):
+        entry = self._cache.get(key)
+        if entry is not None:
+            self._cache.move_to_end(key)
+        return entry
+
+    def store(self, key, compressed, original_size):
+        if key in self._cache or len(compressed) > self.cache_bytes // 8:
+            return
+        self._cache[key] = (compressed, original_size)
+        self._cached_bytes += len(compressed)
+        while self._cached_bytes > self.cache_bytes:
+            _, (evicted, _) = self._cache.popitem(last=False)
+            self._cached_bytes -= len(evicted)
+
+    def record(self, encoding, original_size, compressed_size):
+        self.bytes_in += original_size
+        self.bytes_out += compressed_size
+        self.by_encoding[encoding] += 1
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "encodings": list(self.encodings),
+            "minimum_size": self.minimum_size,
+            **self.counts,
+            "by_encoding": dict(self.by_encoding),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "bytes_saved": self.bytes_in - self.bytes_out,
+            "ratio": round(self.bytes_out / self.bytes_in, 3) if self.bytes_in else None,
+            "compression_cpu_ms": round(self.cpu_s * 1000, 1),
+            "cache_entries": len(self._cache),
+            "cache_bytes": self._cached_bytes,
+        }
+
+
+class CompressionMiddleware:
+    def __init__(self, app, control):
+        self.app = app
+        self.control = control
+
+    async def __call__(self, scope, receive, send):
+        control = self.control
+        if scope["type"] != "http" or not control.enabled or scope["method"] == "HEAD":
+            return await self.app(scope, receive, send)
+        headers = Headers(scope=scope)
+        encoding = negotiate(headers.get("accept-encoding", ""), control.encodings)
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and ETAG_SUFFIX.search(if_none_match):
+            scope = dict(scope, headers=[(name, ETAG_SUFFIX.sub('"', value.decode("latin-1")).encode("latin-1"))
+                                         if name == b"if-none-match" else (name, value)
+                                         for name, value in scope["headers"]])
+        responder = CompressingResponder(control, scope, send, encoding, if_none_match)
+        await self.app(scope, receive, responder.send)
+
+
+class CompressingResponder:
+    def __init__(self, control, scope, send, encoding, if_none_match):
+        self.control = control
+        self.send_downstream = send
+        self.encoding = encoding
+        self.if_none_match = if_none_match
+        self.url = scope["path"] + ("?" + scope["query_string"].decode("latin-1") if scope.get("query_string") else "")
+        self.start = None
+        self.mode = None  # "pass", "buffer" (waiting for the first body message), "stream" or "cached"
+        self.compressor = None
+        self.key = None
+        self.parts = []
+        self.original_size = self.compressed_size = 0
+
+    def eligible(self, headers):
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        if self.start["status"] != 200 or content_type not in CONTENT_TYPES:
+            return False
+        if "content-encoding" in headers or "no-transform" in headers.get("cache-control", ""):
+            return False
+        return True
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            headers = MutableHeaders(scope=message)
+            if message["status"] == 304 and self.encoding and self.if_none_match and "etag" in headers:
+                # The client validated the compressed copy: answer with its ETag.
+                tagged = tag_etag(headers["etag"], self.encoding)
+                if tagged in self.if_none_match:
+                    headers["etag"] = tagged
+                self.mode = "pass"
+            elif not self.eligible(headers):
+                self.mode = "pass"
+            else:
+                headers.add_vary_header("Accept-Encoding")
+                if self.encoding is None:
+                    self.control.counts["not_accepted"] += 1
+                    self.mode = "pass"
+                elif "content-length" in headers and int(headers["content-length"]) < self.control.minimum_size:
+                    self.control.counts["too_small"] += 1
+                    self.mode = "pass"
+                else:
+                    self.mode = "buffer"
+                    if "etag" in headers:
+                        self.key = (self.url, headers["etag"], self.encoding)
+            if self.mode == "pass":
+                await self.send_downstream(message)
+            return
+
+        if message["type"] != "http.response.body" or self.mode == "pass":
+            await self.send_downstream(message)
+            return
+        if self.mode == "cached":  # already sent; let the app finish
+            return
+
+        control = self.control
+        body, more = message.get("body", b""), message.get("more_body", False)
+        headers = MutableHeaders(scope=self.start)
+        if self.mode == "buffer":
+            entry = control.cached(self.key) if self.key else None
+            if entry is not None:
+                compressed, original_size = entry
+                control.counts["cache_hits"] += 1
+                control.record(self.encoding, original_size, len(compressed))
+                await self._send_start(headers, len(compressed))
+                await self.send_downstream({"type": "http.response.body", "body": compressed})
+                self.mode = "cached"
+                return
+            if not more:
+                if len(body) < control.minimum_size:
+                    control.counts["too_small"] += 1
+                    await self.send_downstream(self.start)
+                    await self.send_downstream(message)
+                    self.mode = "pass"
+                    return
+                compressed = await control.compress(body, self.encoding)
+                control.counts["compressed"] += 1
+                control.record(self.encoding, len(body), len(compressed))
+                if self.key:
+                    control.store(self.key, compressed, len(body))
+                await self._send_start(headers, len(compressed))
+                await self.send_downstream({"type": "http.response.body", "body": compressed})
+                return
+            self.mode = "stream"
+            length = headers.get("content-length")
+            self.compressor = Compressor(self.encoding, large=length is None or int(length) > LARGE_BYTES)
+            await self._send_start(headers, None)
+
+        self.original_size += len(body)
+        chunk = await control.run(self.compressor.compress, body) if body else b""
+        if not more:
+            chunk += await control.run(lambda _: self.compressor.flush(), b"")
+        self.compressed_size += len(chunk)
+        if self.key and self.compressed_size > control.cache_bytes // 8:
+            self.key, self.parts = None, []  # too big to cache; stop holding on to it
+        if self.key:
+            self.parts.append(chunk)
+        if chunk or not more:
+            await self.send_downstream({"type": "http.response.body", "body": chunk, "more_body": more})
+        if not more:
+            control.counts["streamed"] += 1
+            control.record(self.encoding, self.original_size, self.compressed_size)
+            if self.key:
+                control.store(self.key, b"".join(self.parts), self.original_size)
+
+    async def _send_start(self, headers, length):
+        headers["content-encoding"] = self.encoding
+        if "etag" in headers:
+            headers["etag"] = tag_etag(headers["etag"], self.encoding)
+        if length is None:
+            del headers["content-length"]
+        else:
+            headers["content-length"] = str(length)
+        await self.send_downstream(self.start)
@@ -0,0 +1,227 @@
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+BUSY_TIMEOUT_MS = 5000
+
+
+def connect_readonly(db_path, attach=None):
+    """Open a read-only connection. In WAL mode every statement reads a consistent
+    snapshot and never waits on the writer. attach maps schema names to further
+    databases opened read-only alongside it."""
+    uri = Path(db_path).resolve().as_uri() + "?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    for schema, path in (attach or {}).items():
+        conn.execute(f"ATTACH DATABASE ? AS {schema}", (Path(path).resolve().as_uri() + "?mode=ro",))
+    return conn
+
+
+class DatabaseReader:
+    """A small pool of threads, each holding its own read-only connection.
+
+    Async code submits callables taking a connection and awaits the returned
+    Future with asyncio.wrap_future(), so SQLite I/O never runs on the event loop.
+    """
+
+    def __init__(self, db_path, threads=4, attach=None):
+        self.db_path = db_path
+        self.threads = threads
+        self.attach = attach
+        self._executor = None
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+
+    def start(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="db-reader")
+
+    def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def submit(self, job) -> Future:
+        if self._executor is None:
+            raise RuntimeError("Database reader is not running")
+        return self._executor.submit(self._run, job)
+
+    def _run(self, job):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect_readonly(self.db_path, self.attach)
+            with self._connections_lock:
+                self._connections.append(conn)
+        return job(conn)
+
+
+def connect_writer(db_path, attach=None):
+    conn = sqlite3.connect(str(db_path), isolation_level=None, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    for schema, path in (attach or {}).items():
+        conn.execute(f"ATTACH DATABASE ? AS {schema}", (str(path),))
+    for schema in ["main", *(attach or {})]:
+        conn.execute(f"PRAGMA {schema}.journal_mode = WAL")
+        conn.execute(f"PRAGMA {schema}.synchronous = NORMAL")
+    return conn
+
+
+class DatabaseWriter:
+    """Owns the only read/write connection of the process.
+
+    Write jobs are callables taking the connection. They are queued and run one
+    at a time on a dedicated thread, so concurrent requests never race for
+    SQLite's write lock. A job's return value (or exception) is delivered
+    through the Future returned by submit(), once its transaction has committed.
+
+    With group_commit_ms > 0 the writer keeps collecting jobs for that long after
+    the first one arrives (up to max_batch) and commits them together. Each job
+    runs inside its own SAVEPOINT, so a failing job is rolled back on its own
+    and the rest of the batch still commits: one fsync instead of one per job.
+    """
+
+    def __init__(self, db_path, group_commit_ms=0, max_batch=64, attach=None):
+        self.db_path = db_path
+        self.attach = attach
+        self.group_commit_window = group_commit_ms / 1000
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = None
+        self._stats_lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._commit_latencies = deque(maxlen=10_000)
+        self._jobs = 0
+        self._failed_jobs = 0
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        ready = Future()
+        self._thread = threading.Thread(target=self._loop, args=(ready,), name="db-writer", daemon=True)
+        self._thread.start()
+        ready.result()
+
+    def stop(self):
+        if self._thread and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._thread = None
+
+    def submit(self, job) -> Future:
+        if not (self._thread and self._thread.is_alive()):
+            raise RuntimeError("Database writer is not running")
+        future = Future()
+        self._queue.put((future, job))
+        return future
+
+    def run(self, job):
+        """Submit a job and block until it has committed."""
+        return self.submit(job).result()
+
+    def stats(self):
+        with self._stats_lock:
+            latencies = sorted(self._commit_latencies)
+            batch_sizes = dict(sorted(self._batch_sizes.items()))
+            jobs, failed = self._jobs, self._failed_jobs
+
+        def pct(p):
+            return round(latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))], 3) if latencies else None
+
+        return {
+            "group_commit_ms": self.group_commit_window * 1000,
+            "max_batch": self.max_batch,
+            "queued": self._queue.qsize(),
+            "jobs": jobs,
+            "failed_jobs": failed,
+            "commits": sum(batch_sizes.values()),
+            "batch_sizes": batch_sizes,
+            "commit_latency_ms": {"p50": pct(50), "p95": pct(95), "p99": pct(99),
+                                  "max": round(latencies[-1], 3) if latencies else None},
+        }
+
+    def _next_batch(self):
+        """Block for one job, then gather more within the group-commit window."""
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        if self.group_commit_window > 0:
+            deadline = time.monotonic() + self.group_commit_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+        return [(future, job) for future, job in batch if future.set_running_or_notify_cancel()]
+
+    def _run_batch(self, conn, batch):
+        outcomes = []
+        start = time.perf_counter()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for future, job in batch:
+                conn.execute("SAVEPOINT job")
+                try:
+                    outcomes.append((future, job(conn), None))
+                except BaseException as e:
+                    conn.execute("ROLLBACK TO job")
+                    outcomes.append((future, None, e))
+                finally:
+                    conn.execute("RELEASE job")
+            conn.execute("COMMIT")
+        except BaseException as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for future, _ in batch:
+                future.set_exception(e)
+            with self._stats_lock:
+                self._jobs += len(batch)
+                self._failed_jobs += len(batch)
+            return
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._stats_lock:
+            self._batch_sizes[len(batch)] += 1
+            self._commit_latencies.append(elapsed_ms)
+            self._jobs += len(batch)
+            self._failed_jobs += sum(1 for _, _, error in outcomes if error is not None)
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def _loop(self, ready):
+        try:
+            conn = connect_writer(self.db_path, self.attach)
+        except Exception as e:
+            ready.set_exception(e)
+            return
+        ready.set_result(True)
+
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                break
+            if batch:
+                self._run_batch(conn, batch)
+        conn.close()
@@ -0,0 +1,170 @@
+"""Streaming CSV exports of lots, transactions and client statements.
+
+Each export is a generator over a SQLite cursor, which steps the statement
+as rows are consumed rather than materialising the result. Rows are encoded
+into chunks of about CHUNK_ROWS lines, and optionally gzip-compressed on the
+fly, so memory stays flat however many rows there are. The generator opens
+its own read-only connection and closes it when exhausted or closed. The
+whole export reads one WAL snapshot, so it is consistent even while writes
+continue.
+"""
+import csv
+import io
+import zlib
+
+from api import archive
+from api.queries import lot_filters, where
+from api.database import connect_readonly
+
+CHUNK_ROWS = 1000
+
+LOT_COLUMNS = [
+    "id", "lot_reference", "artist", "title", "year_of_production", "category", "medium", "material",
+    "dimensions", "height", "width", "depth", "weight", "is_framed", "estimate_low", "estimate_high",
+    "reserve_price", "sold_price", "status", "triage_status", "withdrawn_date", "withdrawal_fee",
+    "seller_id", "auction_id", "created_at",
+]
+
+TRANSACTION_COLUMNS = [
+    "id", "transaction_date", "lot_id", "lot_reference", "artist", "title", "auction_id",
+    "buyer_id", "seller_id", "hammer_price", "buyers_premium", "sellers_commission",
+    "total_buyer_pays", "total_seller_receives",
+]
+
+STATEMENT_COLUMNS = [
+    "client_id", "client_name", "transaction_id", "transaction_date", "role", "lot_id", "lot_reference",
+    "title", "hammer_price", "fee", "debit", "credit", "balance",
+]
+
+
+def lots_query(db, archived_only=False, **filters):
+    clauses, params = lot_filters(db, archived_only=archived_only, **filters)
+    columns = ", ".join(f"l.{c}" for c in LOT_COLUMNS)
+    return f'''
+        SELECT {columns}, COALESCE(a.title, aa.title) AS auction_title,
+               COALESCE(a.auction_date, aa.auction_date) AS auction_date, {int(archived_only)} AS archived
+        FROM {"archive.lots" if archived_only else "lots"} l
+        LEFT JOIN auctions a ON a.id = l.auction_id
+        LEFT JOIN archive.auctions aa ON aa.id = l.auction_id
+        {where(clauses)}
+        ORDER BY l.id
+    ''', params
+
+
+def date_filters(column, date_from=None, date_to=None):
+    clauses, params = [], []
+    if date_from:
+        clauses.append(f"{column} >= ?")
+        params.append(str(date_from))
+    if date_to:
+        clauses.append(f"{column} < date(?, '+1 day')")
+        params.append(str(date_to))
+    return clauses, params
+
+
+LOT_DETAILS = '''
+    LEFT JOIN lots l ON l.id = t.lot_id
+    LEFT JOIN archive.lots al ON al.id = t.lot_id
+'''
+
+
+def transactions_query(date_from=None, date_to=None, seller_id=None, buyer_id=None, auction_id=None):
+    clauses, params = date_filters("t.transaction_date", date_from, date_to)
+    for column, value in (("t.seller_id", seller_id), ("t.buyer_id", buyer_id),
+                          ("COALESCE(l.auction_id, al.auction_id)", auction_id)):
+        if value:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    return f'''
+        SELECT t.id, t.transaction_date, t.lot_id, COALESCE(l.lot_reference, al.lot_reference),
+               COALESCE(l.artist, al.artist), COALESCE(l.title, al.title), COALESCE(l.auction_id, al.auction_id),
+               t.buyer_id, t.seller_id, t.hammer_price, t.buyers_premium, t.sellers_commission,
+               t.total_buyer_pays, t.total_seller_receives
+        FROM transactions t {LOT_DETAILS}
+        {where(clauses)}
+        ORDER BY t.id
+    ''', params
+
+
+def statements_query(client_id=None, date_from=None, date_to=None):
+    """One row per side of each transaction, grouped by client in date order."""
+    dates, params = date_filters("t.transaction_date", date_from, date_to)
+    sides = []
+    for role, party, fee, debit, credit in (
+        ("buyer", "buyer_id", "buyers_premium", "total_buyer_pays", "0.0"),
+        ("seller", "seller_id", "sellers_commission", "0.0", "total_seller_receives"),
+    ):
+        clauses = [f"t.{party} IS NOT NULL", *dates]
+        if client_id:
+            clauses.append(f"t.{party} = ?")
+        sides.append(f'''
+            SELECT t.{party} AS client_id, t.id AS transaction_id, t.transaction_date, '{role}' AS role, t.lot_id,
+                   COALESCE(l.lot_reference, al.lot_reference) AS lot_reference, COALESCE(l.title, al.title) AS title,
+                   t.hammer_price, t.{fee} AS fee, {debit} AS debit, {credit} AS credit
+            FROM transactions t {LOT_DETAILS}
+            {where(clauses)}
+        ''')
+    side_params = params + ([client_id] if client_id else [])
+    return f'''
+        SELECT s.client_id, c.name, s.transaction_id, s.transaction_date, s.role, s.lot_id, s.lot_reference,
+               s.title, s.hammer_price, s.fee, s.debit, s.credit
+        FROM ({" UNION ALL ".join(sides)}) s
+        LEFT JOIN clients c ON c.id = s.client_id
+        ORDER BY s.client_id, s.transaction_date, s.transaction_id, s.role
+    ''', side_params * 2
+
+
+def with_balance(rows):
+    """Append each client's running balance (credits minus debits)."""
+    client, balance = None, 0.0
+    for row in rows:
+        if row[0] != client:
+            client, balance = row[0], 0.0
+        balance += (row[-1] or 0) - (row[-2] or 0)
+        yield (*row, round(balance, 2))
+
+
+def csv_chunks(header, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for i, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if i % CHUNK_ROWS == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def gzipped(chunks, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream(db_path, archive_path, kind, compress=False, **filters):
+    """Bytes of the CSV export kind ('lots', 'transactions' or 'statements')."""
+    conn = connect_readonly(db_path, attach={archive.SCHEMA: archive_path})
+    try:
+        cursor = conn.cursor()
+        cursor.row_factory = None  # plain tuples straight to the csv writer
+        if kind == "lots":
+            query, params = lots_query(conn, **filters)
+            header = LOT_COLUMNS + ["auction_title", "auction_date", "archived"]
+            rows = cursor.execute(query, params)
+        elif kind == "transactions":
+            query, params = transactions_query(**filters)
+            header, rows = TRANSACTION_COLUMNS, cursor.execute(query, params)
+        elif kind == "statements":
+            query, params = statements_query(**filters)
+            header, rows = STATEMENT_COLUMNS, with_balance(cursor.execute(query, params))
+        else:
+            raise ValueError(f"Unknown export: {kind}")
+        chunks = csv_chunks(header, rows)
+        yield from gzipped(chunks) if compress else chunks
+    finally:
+        conn.close()
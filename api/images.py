@@ -0,0 +1,155 @@
+"""Resized lot image renditions with a size-bounded LRU disk cache.
+
+A rendition is identified by the image, the source file's size and mtime, the
+width bucket, format and quality. It is generated once, written atomically
+into the cache directory and served from there. Files are evicted
+least-recently-used first once the directory grows past max_bytes. Use
+order survives restarts because hits touch the file's mtime. Concurrent
+requests for a rendition that is still being generated wait on the same
+Future instead of each resizing the original.
+"""
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+
+WIDTHS = (160, 320, 480, 640, 800, 1024, 1280, 1600, 2048)
+FORMATS = {"jpeg": ("JPEG", "image/jpeg", "jpg"), "webp": ("WEBP", "image/webp", "webp")}
+MIN_QUALITY, MAX_QUALITY = 40, 95
+
+
+def snap_width(width):
+    """Smallest bucket at least as wide as requested, so arbitrary widths cannot flood the cache."""
+    return next((w for w in WIDTHS if w >= width), WIDTHS[-1])
+
+
+def snap_quality(quality):
+    return max(MIN_QUALITY, min(MAX_QUALITY, 5 * round(quality / 5)))
+
+
+def render(source, target, width, image_format, quality):
+    from PIL import Image, ImageOps  # deferred: Pillow is only needed once a rendition is missing
+    pil_format = FORMATS[image_format][0]
+    with Image.open(source) as image:
+        image.draft("RGB", (width, width * 4))  # lets JPEG decode at a reduced scale
+        image = ImageOps.exif_transpose(image)
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.Resampling.LANCZOS)
+        if pil_format == "JPEG" and image.mode != "RGB":
+            background = Image.new("RGB", image.size, "white")
+            rgba = image.convert("RGBA")
+            background.paste(rgba, mask=rgba.getchannel("A"))
+            image = background
+        elif image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        options = {"optimize": True, "progressive": True} if pil_format == "JPEG" else {"method": 4}
+        image.save(target, pil_format, quality=quality, **options)
+
+
+class RenditionCache:
+    def __init__(self, directory, max_bytes):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = None
+        self._bytes = 0
+        self._pending = {}
+        self.hits = self.misses = self.coalesced = self.evictions = 0
+
+    def _load(self):
+        """Index existing files, oldest use first. Called with the lock held."""
+        if self._entries is not None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        files = []
+        for path in self.directory.iterdir():
+            if path.name.startswith("."):
+                continue
+            stat = path.stat()
+            files.append((stat.st_mtime, path.name, stat.st_size))
+        self._entries = OrderedDict((name, size) for _, name, size in sorted(files))
+        self._bytes = sum(self._entries.values())
+
+    def get(self, key, generate):
+        """Path of the cached rendition, calling generate(tmp_path) to create it if needed."""
+        path = self.directory / key
+        with self._lock:
+            self._load()
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                try:
+                    os.utime(path)
+                    return path
+                except FileNotFoundError:
+                    self._bytes -= self._entries.pop(key)
+            future = self._pending.get(key)
+            if future is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                future = self._pending[key] = Future()
+                self.misses += 1
+                leader = True
+
+        if not leader:
+            return future.result()
+
+        tmp = self.directory / f".{key}.{threading.get_ident()}.tmp"
+        try:
+            generate(tmp)
+            os.replace(tmp, path)
+            size = path.stat().st_size
+        except BaseException as e:
+            tmp.unlink(missing_ok=True)
+            with self._lock:
+                del self._pending[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._entries[key] = size
+            self._bytes += size
+            self._evict(keep=key)
+            del self._pending[key]
+        future.set_result(path)
+        return path
+
+    def _evict(self, keep):
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            name, size = next(iter(self._entries.items()))
+            if name == keep:
+                break
+            del self._entries[name]
+            self._bytes -= size
+            (self.directory / name).unlink(missing_ok=True)
+            self.evictions += 1
+
+    def discard(self, names):
+        """Delete cached renditions by file name. Returns the bytes freed."""
+        freed = 0
+        with self._lock:
+            self._load()
+            for name in names:
+                size = self._entries.pop(name, None)
+                if size is not None:
+                    self._bytes -= size
+                    freed += size
+                (self.directory / name).unlink(missing_ok=True)
+        return freed
+
+    def stats(self):
+        with self._lock:
+            self._load()
+            return {
+                "files": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "generating": len(self._pending),
+            }
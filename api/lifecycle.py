@@ -0,0 +1,164 @@
+"""Lot lifecycle: legal status transitions, an append-only event log and projections.
+
+Every status change goes through transition() (or created()/deleted()), which
+checks it against TRANSITIONS and appends one row to lot_events in the same
+transaction as the update. Triggers on lot_events keep two projections
+current: lots per status, and lots per seller and status. Dashboards read
+those small tables, and "what changed since X" reads the tail of the log by
+id, so neither scans lots. Archiving moves a lot between databases without
+changing its status, so archived lots stay in the counts.
+
+Bulk loaders that write lots directly bypass the log; run rebuild_projections()
+after them.
+"""
+import time
+
+TRANSITIONS = {
+    "Pending": {"Listed", "Withdrawn"},
+    "Listed": {"Listed", "Sold", "Unsold", "Withdrawn"},  # Listed -> Listed moves it to another auction
+    "Unsold": {"Listed", "Withdrawn"},
+    "Sold": {"Sold"},  # corrected hammer price
+    "Withdrawn": set(),
+}
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS lot_events (
+        id INTEGER PRIMARY KEY,
+        lot_id INTEGER NOT NULL,
+        seller_id INTEGER,
+        from_status TEXT,
+        to_status TEXT,
+        auction_id INTEGER,
+        price REAL,
+        actor_id INTEGER,
+        at INTEGER NOT NULL
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_lot_events_lot ON lot_events(lot_id, id)",
+    "CREATE INDEX IF NOT EXISTS idx_lot_events_seller ON lot_events(seller_id, id)",
+    "CREATE INDEX IF NOT EXISTS idx_lot_events_at ON lot_events(at)",
+    '''
+    CREATE TABLE IF NOT EXISTS lot_status_counts (
+        status TEXT PRIMARY KEY,
+        lots INTEGER NOT NULL
+    ) WITHOUT ROWID
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS seller_status_counts (
+        seller_id INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        lots INTEGER NOT NULL,
+        PRIMARY KEY (seller_id, status)
+    ) WITHOUT ROWID
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_lot_events_leave AFTER INSERT ON lot_events
+    WHEN NEW.from_status IS NOT NULL BEGIN
+        UPDATE lot_status_counts SET lots = lots - 1 WHERE status = NEW.from_status;
+        UPDATE seller_status_counts SET lots = lots - 1
+        WHERE seller_id = NEW.seller_id AND status = NEW.from_status;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_lot_events_enter AFTER INSERT ON lot_events
+    WHEN NEW.to_status IS NOT NULL BEGIN
+        INSERT INTO lot_status_counts (status, lots) VALUES (NEW.to_status, 1)
+        ON CONFLICT (status) DO UPDATE SET lots = lots + 1;
+        INSERT INTO seller_status_counts (seller_id, status, lots)
+        SELECT NEW.seller_id, NEW.to_status, 1 WHERE NEW.seller_id IS NOT NULL
+        ON CONFLICT (seller_id, status) DO UPDATE SET lots = lots + 1;
+    END
+    ''',
+]
+
+EVENT_COLUMNS = "id, lot_id, seller_id, from_status, to_status, auction_id, price, actor_id, " \
+                "strftime('%Y-%m-%dT%H:%M:%SZ', at, 'unixepoch') AS at"
+
+
+class TransitionError(ValueError):
+    def __init__(self, from_status, to_status):
+        super().__init__(f"A {from_status} lot cannot become {to_status}")
+        self.from_status = from_status
+        self.to_status = to_status
+
+
+def ensure_schema(conn):
+    for statement in SCHEMA:
+        conn.execute(statement)
+
+
+def rebuild_projections(conn):
+    """Recount both projections from the lot tables (hot and archived)."""
+    lots = "SELECT status, seller_id FROM main.lots UNION ALL SELECT status, seller_id FROM archive.lots"
+    conn.execute("DELETE FROM lot_status_counts")
+    conn.execute("DELETE FROM seller_status_counts")
+    conn.execute(f"INSERT INTO lot_status_counts (status, lots) SELECT status, COUNT(*) FROM ({lots}) "
+                 "WHERE status IS NOT NULL GROUP BY status")
+    conn.execute(f"INSERT INTO seller_status_counts (seller_id, status, lots) SELECT seller_id, status, COUNT(*) "
+                 f"FROM ({lots}) WHERE seller_id IS NOT NULL AND status IS NOT NULL GROUP BY seller_id, status")
+
+
+def append(conn, lot_id, seller_id, from_status, to_status, auction_id=None, price=None, actor_id=None):
+    conn.execute(
+        "INSERT INTO lot_events (lot_id, seller_id, from_status, to_status, auction_id, price, actor_id, at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (lot_id, seller_id, from_status, to_status, auction_id, price, actor_id, int(time.time())),
+    )
+
+
+def created(conn, lot_id, seller_id, actor_id=None):
+    append(conn, lot_id, seller_id, None, "Pending", actor_id=actor_id)
+
+
+def transition(conn, lot_id, to_status, actor_id=None, **changes):
+    """Move a hot lot to to_status, also setting the given columns. Returns the previous
+    status, or None if there is no such lot. Raises TransitionError if the move is illegal."""
+    row = conn.execute("SELECT status, seller_id, auction_id FROM lots WHERE id = ?", (lot_id,)).fetchone()
+    if row is None:
+        return None
+    from_status, seller_id, auction_id = row
+    if to_status not in TRANSITIONS.get(from_status, ()):
+        raise TransitionError(from_status, to_status)
+    changes["status"] = to_status
+    conn.execute(f"UPDATE lots SET {', '.join(f'{k} = ?' for k in changes)}, updated_at = CURRENT_TIMESTAMP "
+                 "WHERE id = ?", (*changes.values(), lot_id))
+    append(conn, lot_id, seller_id, from_status, to_status, auction_id=changes.get("auction_id", auction_id),
+           price=changes.get("sold_price"), actor_id=actor_id)
+    return from_status
+
+
+def deleted(conn, lot_id, actor_id=None):
+    """Delete a lot from the hot and archive tables. Returns False if it did not exist."""
+    row = conn.execute("SELECT status, seller_id, auction_id FROM lots WHERE id = ? UNION ALL "
+                       "SELECT status, seller_id, auction_id FROM archive.lots WHERE id = ?", (lot_id, lot_id)).fetchone()
+    if row is None:
+        return False
+    conn.execute("DELETE FROM lots WHERE id = ?", (lot_id,))
+    conn.execute("DELETE FROM archive.lots WHERE id = ?", (lot_id,))
+    append(conn, lot_id, row[1], row[0], None, auction_id=row[2], actor_id=actor_id)
+    return True
+
+
+def events(conn, since_id=0, since=None, seller_id=None, lot_id=None, limit=500):
+    """Log entries after since_id (and at or after the unix time since), oldest first."""
+    where, params = ["id > ?"], [since_id]
+    if since is not None:
+        where.append("at >= ?")
+        params.append(int(since))
+    for column, value in (("seller_id", seller_id), ("lot_id", lot_id)):
+        if value is not None:
+            where.append(f"{column} = ?")
+            params.append(value)
+    rows = conn.execute(f"SELECT {EVENT_COLUMNS} FROM lot_events WHERE {' AND '.join(where)} ORDER BY id LIMIT ?",
+                        (*params, limit)).fetchall()
+    return [dict(row) for row in rows]
+
+
+def status_counts(conn, seller_id=None):
+    if seller_id is None:
+        rows = conn.execute("SELECT status, lots FROM lot_status_counts WHERE lots > 0").fetchall()
+    else:
+        rows = conn.execute("SELECT status, lots FROM seller_status_counts WHERE seller_id = ? AND lots > 0",
+                            (seller_id,)).fetchall()
+    return {status: lots for status, lots in rows}
@@ -1,34 +1,101 @@
-from fastapi import FastAPI, HTTPException, Depends, File, UploadFile, Form, status, Query
+from fastapi import FastAPI, HTTPException, Depends, File, UploadFile, Form, status, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List
-from datetime import datetime, date, timedelta
+from datetime import datetime, date, timedelta, timezone
 import sqlite3
 import os
 import sys
 from pathlib import Path
-from PIL import Image
 import io
+import asyncio
+from starlette.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from passlib.context import CryptContext
-from jose import JWTError, jwt
+from functools import lru_cache
 from dotenv import load_dotenv
 
 load_dotenv()
 
 # Setup paths
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+BASE_DIR = Path(__file__).resolve().parent.parent
+LIVE_DB_PATH = BASE_DIR / "data" / "fotherbys.db"
+DB_PATH = Path(os.getenv("FOTHERBYS_DB", LIVE_DB_PATH))
+ARCHIVE_DB_PATH = Path(os.getenv("FOTHERBYS_ARCHIVE_DB", DB_PATH.with_name(f"{DB_PATH.stem}_archive.db")))
+
+def database_dir(name):
+    """Runtime files live beside the database they were made from, as its archive does
+    (data/fotherbys_snapshots for data/fotherbys.db), so a benchmark database never
+    writes into the live site's catalogue, renditions or backups."""
+    return DB_PATH.with_name(f"{DB_PATH.stem}_{name}")
+
+from api.database import DatabaseReader, DatabaseWriter, connect_readonly
+from api import archive, artist_search, coherence, duplicates, export, lifecycle, migrations, portfolio, queries, snapshots
+from api.auction_schedule import AuctionStatusScheduler, status_at
+from api.comparables import ComparablesIndex
+from api import images
+from api.storage import StorageCollector
+from api.backup import BackupError, BackupInProgress, BackupManager
+from api.admission import AdmissionControl, AdmissionMiddleware, Rule
+from api.compression import CompressionControl, CompressionMiddleware
 
 # Security Config 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# passlib/bcrypt, jose, PIL and NumPy are imported on first use
+# rather than here; benchmarks/startup_bench.py holds the import-time budget.
+@lru_cache(maxsize=None)
+def password_context():
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/token")
 
-app = FastAPI(title="Fotherby's Auction Management API", version="1.0.0")
+def token_subject(token):
+    """The subject of a bearer token whose signature and expiry check out, else None."""
+    from jose import JWTError, jwt
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+    except JWTError:
+        return None
+
+# Several uvicorn workers may share the database: before each request, drop the
+# in-process caches whose data another connection has changed.
+cache_coherence = coherence.CoherenceMonitor(DB_PATH)
+
+def check_caches():
+    cache_coherence.check()
+
+app = FastAPI(title="Fotherby's Auction Management API", version="1.0.0", dependencies=[Depends(check_caches)])
+
+# Per-client token buckets (rate per second, burst) and, for the expensive routes,
+# a cap on concurrent requests with a short wait queue. First matching rule wins;
+# FOTHERBYS_ADMISSION_CONTROL=0 turns it off (load tests).
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+admission = AdmissionControl([
+    Rule("auth", {"POST"}, r"/api/auth/(token|register)$", rate=0.5, burst=5, concurrency=4, max_queue=16),
+    Rule("pdf", {"POST"}, r"/api/auctions/\d+/generate-pdf$", rate=0.1, burst=3,
+         concurrency=2, max_queue=4, queue_timeout_s=10),
+    Rule("image_upload", {"POST"}, r"/api/lots/\d+/images$", rate=2, burst=20,
+         concurrency=4, max_queue=16, queue_timeout_s=10),
+    Rule("search", {"GET"}, r"/api/(catalogue/search(/faceted)?|lots)$", rate=5, burst=20, concurrency=8, max_queue=32),
+    Rule("export", {"GET"}, r"/api/export/", rate=0.2, burst=5, concurrency=2, max_queue=2),
+    Rule("writes", WRITE_METHODS, r"/api/", rate=5, burst=30),
+    Rule("reads", {"GET"}, r"/api/", rate=50, burst=100),
+], enabled=os.getenv("FOTHERBYS_ADMISSION_CONTROL", "1") != "0", identify=token_subject)
+
+# gzip (brotli when installed) for JSON, CSV and PDF bodies over the threshold; compressed
+# bodies of responses with an ETag are cached. FOTHERBYS_COMPRESSION=0 turns it off.
+compression = CompressionControl(
+    minimum_size=int(os.getenv("FOTHERBYS_COMPRESSION_MIN_BYTES", "1024")),
+    cache_bytes=int(float(os.getenv("FOTHERBYS_COMPRESSION_CACHE_MB", "64")) * 1024 * 1024),
+    enabled=os.getenv("FOTHERBYS_COMPRESSION", "1") != "0",
+)
+app.add_middleware(CompressionMiddleware, control=compression)
+app.add_middleware(AdmissionMiddleware, control=admission)  # added before CORS so 429s still carry CORS headers
 
 app.add_middleware(
     CORSMiddleware,
@@ -40,70 +107,115 @@ app.add_middleware(
 
 # HELPERS
 
-def get_db():
-    BASE_DIR = Path(__file__).resolve().parent.parent
-    DB_PATH = BASE_DIR / "data" / "fotherbys.db"
-    conn = sqlite3.connect(str(DB_PATH), check_same_thread=False)
-    conn.row_factory = sqlite3.Row
+# All writes go through this single connection; request handlers only get read-only ones.
+# FOTHERBYS_GROUP_COMMIT_MS > 0 coalesces writes arriving within that window into one transaction.
+db_writer = DatabaseWriter(
+    DB_PATH,
+    group_commit_ms=float(os.getenv("FOTHERBYS_GROUP_COMMIT_MS", "0")),
+    max_batch=int(os.getenv("FOTHERBYS_GROUP_COMMIT_MAX", "64")),
+    attach={archive.SCHEMA: ARCHIVE_DB_PATH},
+)
+
+# Async code must not touch SQLite on the event loop; it awaits queries run on these threads.
+db_reader = DatabaseReader(DB_PATH, threads=int(os.getenv("FOTHERBYS_READ_THREADS", "4")),
+                           attach={archive.SCHEMA: ARCHIVE_DB_PATH})
+
+# Moves auctions through Upcoming -> Live -> Completed as their start times pass.
+auction_scheduler = AuctionStatusScheduler(db_writer)
+cache_coherence.register("auctions", auction_scheduler.poke)
+
+# Uploaded images and generated PDF catalogues. The live database's are under public/, which the
+# frontend serves; any other database (a load-test or benchmark copy) gets its own <db>_uploads,
+# so the storage collector never judges the site's files against another database's lot_images.
+UPLOAD_ROOT = Path(os.getenv("FOTHERBYS_UPLOAD_ROOT",
+                             "public" if DB_PATH.resolve() == LIVE_DB_PATH.resolve() else database_dir("uploads")))
+CATALOGUE_DIR = UPLOAD_ROOT / "catalogues"
+
+# Resized image renditions, generated on first request and kept in an LRU disk cache.
+rendition_cache = images.RenditionCache(
+    Path(os.getenv("FOTHERBYS_RENDITION_DIR", database_dir("renditions"))),
+    max_bytes=int(float(os.getenv("FOTHERBYS_RENDITION_CACHE_MB", "512")) * 1024 * 1024),
+)
+
+# Reclaims upload, rendition and catalogue files nothing references any more, and
+# measures disk usage per lot and auction. FOTHERBYS_STORAGE_GC_INTERVAL_S=0 disables the background runs.
+storage_collector = StorageCollector(
+    DB_PATH, {archive.SCHEMA: ARCHIVE_DB_PATH}, UPLOAD_ROOT, CATALOGUE_DIR, rendition_cache, db_writer,
+    batch_size=int(os.getenv("FOTHERBYS_STORAGE_GC_BATCH", "200")),
+    grace_s=float(os.getenv("FOTHERBYS_STORAGE_GC_GRACE_S", "3600")),
+)
+STORAGE_GC_INTERVAL_S = float(os.getenv("FOTHERBYS_STORAGE_GC_INTERVAL_S", "21600"))
+
+# Online snapshots of both databases, copied a few pages at a time, verified and rotated
+# (see api/backup.py and scripts/backup_database.py). FOTHERBYS_BACKUP_INTERVAL_S=0 disables the scheduled runs.
+backup_manager = BackupManager(
+    DB_PATH, {archive.SCHEMA: ARCHIVE_DB_PATH},
+    Path(os.getenv("FOTHERBYS_BACKUP_DIR", database_dir("backups"))),
+    keep=int(os.getenv("FOTHERBYS_BACKUP_KEEP", "7")),
+    pages_per_step=int(os.getenv("FOTHERBYS_BACKUP_PAGES", "256")),
+    pause_s=float(os.getenv("FOTHERBYS_BACKUP_PAUSE_MS", "10")) / 1000,
+    writer=db_writer,
+)
+BACKUP_INTERVAL_S = float(os.getenv("FOTHERBYS_BACKUP_INTERVAL_S", "86400"))
+
+# Sold lots as NumPy feature rows for comparable-sales estimates; loaded on first use.
+comparables = ComparablesIndex()
+cache_coherence.register("sold_lots", comparables.invalidate)
+
+# Perceptual hashes of every lot image, for near-duplicate checks; loaded on first use.
+duplicate_index = duplicates.DuplicateIndex()
+cache_coherence.register("lot_images", duplicate_index.invalidate)
+
+def get_read_db():
+    conn = connect_readonly(DB_PATH, attach={archive.SCHEMA: ARCHIVE_DB_PATH})
     try:
         yield conn
     finally:
         conn.close()
 
-# Database Migration 
+# Schema checks run once per database (see api/migrations.py), not on every start.
 @app.on_event("startup")
 def startup_event():
-    BASE_DIR = Path(__file__).resolve().parent.parent
-    DB_PATH = BASE_DIR / "data" / "fotherbys.db"
-    conn = sqlite3.connect(str(DB_PATH))
-    cursor = conn.cursor()
-    
-    try:
-        cursor.execute("ALTER TABLE auctions ADD COLUMN is_archived INTEGER DEFAULT 0")
-    except sqlite3.OperationalError: pass 
-
-    try:
-        cursor.execute("ALTER TABLE lots ADD COLUMN is_archived INTEGER DEFAULT 0")
-    except sqlite3.OperationalError: pass 
-
-    new_columns = [
-        ("medium", "TEXT"),
-        ("material", "TEXT"),
-        ("weight", "REAL"),
-        ("height", "REAL"),
-        ("width", "REAL"),
-        ("depth", "REAL"),
-        ("is_framed", "INTEGER DEFAULT 0")
-    ]
-
-    for col_name, col_type in new_columns:
-        try:
-            cursor.execute(f"ALTER TABLE lots ADD COLUMN {col_name} {col_type}")
-            print(f"Migrated lots table: Added {col_name} column.")
-        except sqlite3.OperationalError:
-            pass
-        
-    conn.commit()
-    conn.close()
+    migrations.migrate(DB_PATH, ARCHIVE_DB_PATH)
+    db_writer.start()
+    db_reader.start()
+    cache_coherence.start()
+    auction_scheduler.start()
+    storage_collector.start(STORAGE_GC_INTERVAL_S)
+    backup_manager.start(BACKUP_INTERVAL_S)
+    if os.getenv("FOTHERBYS_CATALOGUE_SNAPSHOTS", "1") != "0":
+        catalogue_snapshots.start()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    catalogue_snapshots.stop()
+    backup_manager.stop()
+    storage_collector.stop()
+    auction_scheduler.stop()
+    cache_coherence.stop()
+    db_reader.stop()
+    db_writer.stop()
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return password_context().hash(password)
 
 def create_access_token(data: dict):
+    from jose import jwt
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: sqlite3.Connection = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    from jose import JWTError, jwt
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
@@ -112,9 +224,9 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: sqlite3.Conn
     except JWTError:
         raise credentials_exception
         
-    cursor = db.cursor()
-    cursor.execute("SELECT * FROM clients WHERE email = ?", (email,))
-    user = cursor.fetchone()
+    user = await asyncio.wrap_future(db_reader.submit(
+        lambda conn: conn.execute("SELECT * FROM clients WHERE email = ?", (email,)).fetchone()
+    ))
     if user is None:
         raise credentials_exception
     return dict(user)
@@ -220,6 +332,44 @@ class CommissionCalculation(BaseModel):
     buyers_premium_rate: float = 0.10
     sellers_commission_rate: float = 0.10
 
+class ComparablesQuery(BaseModel):
+    artist: Optional[str] = None
+    category: Optional[str] = None
+    medium: Optional[str] = None
+    height: Optional[float] = None
+    width: Optional[float] = None
+    depth: Optional[float] = None
+
+class ComparablesBatch(BaseModel):
+    lots: List[ComparablesQuery] = []
+    lot_ids: List[int] = []
+    k: int = 10
+
+# FAST RESPONSES
+# List routes return DB rows straight through orjson instead of letting FastAPI
+# re-validate every row against the response model and encode it with the stdlib
+# json module. Set FOTHERBYS_VALIDATE_RESPONSES=1 to put validation back.
+VALIDATE_RESPONSES = os.getenv("FOTHERBYS_VALIDATE_RESPONSES") == "1"
+
+LOT_RESPONSE_DEFAULTS = {
+    name: (None if field.is_required() else field.get_default(call_default_factory=True))
+    for name, field in LotResponse.model_fields.items()
+}
+
+def lot_payload(lot: dict) -> dict:
+    """Shape a trusted lot row like LotResponse would, without validating it."""
+    payload = {name: lot.get(name, default) for name, default in LOT_RESPONSE_DEFAULTS.items()}
+    if payload['is_framed'] is not None:
+        payload['is_framed'] = bool(payload['is_framed'])
+    return payload
+
+def trusted_response(content, shape=None):
+    if VALIDATE_RESPONSES:
+        return content
+    if shape is not None:
+        content = [shape(item) for item in content]
+    return ORJSONResponse(content)
+
 # ENDPOINTS
 
 @app.get("/")
@@ -228,18 +378,24 @@ def read_root():
 
 # AUTH
 @app.post("/api/auth/register", response_model=Token)
-def register(client: ClientRegister, db: sqlite3.Connection = Depends(get_db)):
+def register(client: ClientRegister, db: sqlite3.Connection = Depends(get_read_db)):
     cursor = db.cursor()
     cursor.execute("SELECT id FROM clients WHERE email = ?", (client.email,))
     if cursor.fetchone():
         raise HTTPException(status_code=400, detail="Email already registered")
     
     hashed_password = get_password_hash(client.password)
-    cursor.execute('''
-        INSERT INTO clients (name, email, password_hash, phone, address, client_type, is_staff)
-        VALUES (?, ?, ?, ?, ?, ?, 0)
-    ''', (client.name, client.email, hashed_password, client.phone, client.address, client.client_type))
-    db.commit()
+
+    def insert_client(conn):
+        try:
+            conn.execute('''
+                INSERT INTO clients (name, email, password_hash, phone, address, client_type, is_staff)
+                VALUES (?, ?, ?, ?, ?, ?, 0)
+            ''', (client.name, client.email, hashed_password, client.phone, client.address, client.client_type))
+        except sqlite3.IntegrityError:
+            raise HTTPException(status_code=400, detail="Email already registered")
+
+    db_writer.run(insert_client)
     
     access_token = create_access_token(data={"sub": client.email})
     return {
@@ -252,7 +408,7 @@ def register(client: ClientRegister, db: sqlite3.Connection = Depends(get_db)):
     }
 
 @app.post("/api/auth/token", response_model=Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: sqlite3.Connection = Depends(get_db)):
+def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: sqlite3.Connection = Depends(get_read_db)):
     cursor = db.cursor()
     cursor.execute("SELECT * FROM clients WHERE email = ?", (form_data.username,))
     user = cursor.fetchone()
@@ -285,50 +441,48 @@ def read_users_me(current_user: dict = Depends(get_current_user)):
 @app.post("/api/auctions", response_model=AuctionResponse)
 def create_auction(
     auction: AuctionCreate, 
-    db: sqlite3.Connection = Depends(get_db),
+    db: sqlite3.Connection = Depends(get_read_db),
     current_user: dict = Depends(get_current_user)
 ):
     if not current_user['is_staff']:
         raise HTTPException(status_code=403, detail="Only staff can create auctions")
         
-    cursor = db.cursor()
-    cursor.execute('''
-        INSERT INTO auctions (title, location, auction_date, start_time, auction_type, theme, is_archived)
-        VALUES (?, ?, ?, ?, ?, ?, 0)
-    ''', (auction.title, auction.location, str(auction.auction_date), auction.start_time, auction.auction_type, auction.theme))
-    db.commit()
+    auction_status = status_at(auction.auction_date, auction.start_time, auction.location)
+    auction_id = db_writer.run(lambda conn: conn.execute('''
+        INSERT INTO auctions (title, location, auction_date, start_time, auction_type, theme, status, is_archived)
+        VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+    ''', (auction.title, auction.location, str(auction.auction_date), auction.start_time, auction.auction_type, auction.theme, auction_status)).lastrowid)
+    auction_scheduler.poke()
     
-    auction_id = cursor.lastrowid
-    cursor.execute('SELECT *, CASE WHEN auction_date >= date("now") THEN "Upcoming" ELSE "Completed" END as status FROM auctions WHERE id = ?', (auction_id,))
+    cursor = db.cursor()
+    cursor.execute('SELECT * FROM auctions WHERE id = ?', (auction_id,))
     return dict(cursor.fetchone())
 
 @app.get("/api/auctions", response_model=List[AuctionResponse])
 def get_auctions(
     status: Optional[str] = None, 
     archived_only: bool = False, 
-    db: sqlite3.Connection = Depends(get_db)
+    db: sqlite3.Connection = Depends(get_read_db)
 ):
     cursor = db.cursor()
-    query = 'SELECT *, CASE WHEN auction_date >= date("now") THEN "Upcoming" ELSE "Completed" END as status FROM auctions WHERE 1=1'
+    query = f'SELECT * FROM {"archive.auctions" if archived_only else "auctions"} WHERE 1=1'
     params = []
-    
-    if archived_only:
-        query += ' AND is_archived = 1'
-    else:
-        query += ' AND (is_archived = 0 OR is_archived IS NULL)'
-
-    if status and not archived_only:
-        if status == "Upcoming": query += ' AND auction_date >= date("now")'
-        elif status == "Completed": query += ' AND auction_date < date("now")'
+
+    # status may list several, e.g. "Upcoming,Live" for every auction still open for sale
+    statuses = [s.strip() for s in (status or "").split(",") if s.strip()]
+    if statuses and not archived_only:
+        query += f' AND status IN ({",".join("?" * len(statuses))})'
+        params.extend(statuses)
     
     query += ' ORDER BY auction_date DESC'
     cursor.execute(query, params)
     return [dict(row) for row in cursor.fetchall()]
 
 @app.get("/api/auctions/{auction_id}", response_model=AuctionResponse)
-def get_auction(auction_id: int, db: sqlite3.Connection = Depends(get_db)):
+def get_auction(auction_id: int, db: sqlite3.Connection = Depends(get_read_db)):
     cursor = db.cursor()
-    cursor.execute('SELECT *, CASE WHEN auction_date >= date("now") THEN "Upcoming" ELSE "Completed" END as status FROM auctions WHERE id = ?', (auction_id,))
+    cursor.execute('SELECT * FROM auctions WHERE id = ? UNION ALL SELECT * FROM archive.auctions WHERE id = ?',
+                   (auction_id, auction_id))
     result = cursor.fetchone()
     if not result: raise HTTPException(status_code=404, detail="Auction not found")
     return dict(result)
@@ -337,7 +491,7 @@ def get_auction(auction_id: int, db: sqlite3.Connection = Depends(get_db)):
 def update_auction(
     auction_id: int,
     auction_update: AuctionUpdate,
-    db: sqlite3.Connection = Depends(get_db),
+    db: sqlite3.Connection = Depends(get_read_db),
     current_user: dict = Depends(get_current_user)
 ):
     if not current_user['is_staff']:
@@ -346,6 +500,8 @@ def update_auction(
     cursor = db.cursor()
     cursor.execute("SELECT * FROM auctions WHERE id = ?", (auction_id,))
     if not cursor.fetchone():
+        if cursor.execute("SELECT 1 FROM archive.auctions WHERE id = ?", (auction_id,)).fetchone():
+            raise HTTPException(status_code=409, detail="Auction is archived. Restore it first.")
         raise HTTPException(status_code=404, detail="Auction not found")
 
     update_data = auction_update.dict(exclude_unset=True)
@@ -354,61 +510,70 @@ def update_auction(
 
     set_clause = ", ".join([f"{k} = ?" for k in update_data.keys()])
     values = list(update_data.values()) + [auction_id]
+
+    def update(conn):
+        conn.execute(f"UPDATE auctions SET {set_clause} WHERE id = ?", values)
+        if update_data.keys() & {"auction_date", "start_time", "location"}:
+            row = conn.execute("SELECT auction_date, start_time, location, status FROM auctions WHERE id = ?", (auction_id,)).fetchone()
+            if row["status"] != "Cancelled":
+                conn.execute("UPDATE auctions SET status = ? WHERE id = ?",
+                             (status_at(row["auction_date"], row["start_time"], row["location"]), auction_id))
+
+    db_writer.run(update)
+    auction_scheduler.poke()
     
-    cursor.execute(f"UPDATE auctions SET {set_clause} WHERE id = ?", values)
-    db.commit()
-    
-    cursor.execute('SELECT *, CASE WHEN auction_date >= date("now") THEN "Upcoming" ELSE "Completed" END as status FROM auctions WHERE id = ?', (auction_id,))
+    cursor.execute('SELECT * FROM auctions WHERE id = ?', (auction_id,))
     return dict(cursor.fetchone())
 
 @app.delete("/api/auctions/{auction_id}")
 def delete_auction(
     auction_id: int,
-    db: sqlite3.Connection = Depends(get_db),
+    db: sqlite3.Connection = Depends(get_read_db),
     current_user: dict = Depends(get_current_user)
 ):
     if not current_user['is_staff']:
         raise HTTPException(status_code=403, detail="Only staff can delete auctions")
     
-    cursor = db.cursor()
-    cursor.execute("SELECT COUNT(*) FROM lots WHERE auction_id = ?", (auction_id,))
-    if cursor.fetchone()[0] > 0:
-        raise HTTPException(status_code=400, detail="Cannot delete auction with assigned lots. Archive it instead.")
-        
-    cursor.execute("DELETE FROM auctions WHERE id = ?", (auction_id,))
-    db.commit()
+    def delete(conn):
+        if conn.execute(
+            "SELECT EXISTS (SELECT 1 FROM lots WHERE auction_id = ?) OR EXISTS (SELECT 1 FROM archive.lots WHERE auction_id = ?)",
+            (auction_id, auction_id)
+        ).fetchone()[0]:
+            raise HTTPException(status_code=400, detail="Cannot delete auction with assigned lots. Archive it instead.")
+        conn.execute("DELETE FROM auctions WHERE id = ?", (auction_id,))
+        conn.execute("DELETE FROM archive.auctions WHERE id = ?", (auction_id,))
+
+    db_writer.run(delete)
     return {"message": "Auction deleted"}
 
 @app.put("/api/auctions/{auction_id}/archive")
 def archive_auction(
     auction_id: int,
-    db: sqlite3.Connection = Depends(get_db),
+    db: sqlite3.Connection = Depends(get_read_db),
     current_user: dict = Depends(get_current_user)
 ):
     if not current_user['is_staff']:
         raise HTTPException(status_code=403, detail="Only staff can archive auctions")
     
-    cursor = db.cursor()
-    cursor.execute("UPDATE auctions SET is_archived = 1 WHERE id = ?", (auction_id,))
-    db.commit()
+    if not archive.archive_row(db_writer, "auctions", auction_id):
+        raise HTTPException(status_code=404, detail="Auction not found")
     return {"message": "Auction archived"}
 
 @app.put("/api/auctions/{auction_id}/unarchive")
 def unarchive_auction(
     auction_id: int,
-    db: sqlite3.Connection = Depends(get_db),
+    db: sqlite3.Connection = Depends(get_read_db),
     current_user: dict = Depends(get_current_user)
 ):
     if not current_user['is_staff']:
         raise HTTPException(status_code=403, detail="Only staff can restore auctions")
     
-    cursor = db.cursor()
-    cursor.execute("UPDATE auctions SET is_archived = 0 WHERE id = ?", (auction_id,))
-    db.commit()
+    if not archive.restore_row(db_writer, "auctions", auction_id):
+        raise HTTPException(status_code=404, detail="Archived auction not found")
     return {"message": "Auction restored"}
 
 @app.post("/api/auctions/{auction_id}/generate-pdf")
-def generate_auction_pdf(auction_id: int, db: sqlite3.Connection = Depends(get_db)):
+def generate_auction_pdf(auction_id: int, db: sqlite3.Connection = Depends(get_read_db)):
     cursor = db.cursor()
     cursor.execute('SELECT * FROM auctions WHERE id = ?', (auction_id,))
     if not cursor.fetchone():
@@ -416,7 +581,7 @@ def generate_auction_pdf(auction_id: int, db: sqlite3.Connection = Depends(get_d
     
     try:
         from scripts.generate_pdf_catalogue import generate_auction_catalogue_pdf
-        pdf_path = generate_auction_catalogue_pdf(auction_id)
+        pdf_path = generate_auction_catalogue_pdf(auction_id, DB_PATH, output_dir=str(CATALOGUE_DIR))
         return FileResponse(pdf_path, media_type='application/pdf', filename=f"Fotherbys_Catalogue_{auction_id}.pdf")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -425,29 +590,33 @@ def generate_auction_pdf(auction_id: int, db: sqlite3.Connection = Depends(get_d
 @app.post("/api/lots", response_model=LotResponse)
 def create_lot(
     lot: LotCreate, 
-    db: sqlite3.Connection = Depends(get_db),
+    db: sqlite3.Connection = Depends(get_read_db),
     current_user: dict = Depends(get_current_user)
 ):
     seller_id = current_user['id'] if not current_user['is_staff'] else (lot.seller_id or current_user['id'])
 
-    cursor = db.cursor()
-    cursor.execute('''
-        INSERT INTO lots (
-            lot_reference, artist, title, year_of_production, category, description,
-            dimensions, framing_details, estimate_low, estimate_high, reserve_price, 
-            triage_status, seller_id, status,
-            medium, material, weight, height, width, depth, is_framed
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, "Pending", ?, ?, ?, ?, ?, ?, ?)
-    ''', (
-        lot.lot_reference, lot.artist, lot.title, lot.year_of_production, lot.category, 
-        lot.description, lot.dimensions, lot.framing_details, lot.estimate_low, 
-        lot.estimate_high, lot.reserve_price, lot.triage_status, seller_id,
-        lot.medium, lot.material, lot.weight, lot.height, lot.width, lot.depth, lot.is_framed
-    ))
-    db.commit()
+    def insert_lot(conn):
+        cursor = conn.execute('''
+            INSERT INTO lots (
+                lot_reference, artist, title, year_of_production, category, description,
+                dimensions, framing_details, estimate_low, estimate_high, reserve_price, 
+                triage_status, seller_id, status,
+                medium, material, weight, height, width, depth, is_framed
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, "Pending", ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            lot.lot_reference, lot.artist, lot.title, lot.year_of_production, lot.category, 
+            lot.description, lot.dimensions, lot.framing_details, lot.estimate_low, 
+            lot.estimate_high, lot.reserve_price, lot.triage_status, seller_id,
+            lot.medium, lot.material, lot.weight, lot.height, lot.width, lot.depth, lot.is_framed
+        ))
+        artist_search.index_artist(conn, lot.artist)
+        lifecycle.created(conn, cursor.lastrowid, seller_id, actor_id=current_user['id'])
+        return cursor.lastrowid
+
+    lot_id = db_writer.run(insert_lot)
     
-    lot_id = cursor.lastrowid
+    cursor = db.cursor()
     cursor.execute('SELECT * FROM lots WHERE id = ?', (lot_id,))
     lot_dict = dict(cursor.fetchone())
     lot_dict['images'] = []
@@ -464,7 +633,126 @@ def suggest_triage(estimate_low: str = Query(..., description="Low estimate")):
     reason = f"Items under £20,000 typically go to Online stream. This item's lower estimate is £{cleaned_value:,.0f}."
     return {"suggested_triage": suggested, "reason": reason}
 
-@app.get("/api/lots", response_model=List[LotResponse])
+@app.get("/api/lots/status-counts")
+def get_lot_status_counts(db: sqlite3.Connection = Depends(get_read_db), current_user: dict = Depends(get_current_user)):
+    if not current_user['is_staff']:
+        raise HTTPException(status_code=403, detail="Only staff can view lot statistics")
+    last_event_id = db.execute("SELECT COALESCE(MAX(id), 0) FROM lot_events").fetchone()[0]
+    return {"counts": lifecycle.status_counts(db), "last_event_id": last_event_id}
+
+@app.get("/api/lots/events")
+def get_lot_events(
+    since_id: int = Query(0, ge=0),
+    since: Optional[datetime] = None,
+    lot_id: Optional[int] = None,
+    limit: int = Query(500, ge=1, le=5000),
+    db: sqlite3.Connection = Depends(get_read_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Status changes after since_id (the previous response's next_since_id), oldest first."""
+    if not current_user['is_staff']:
+        raise HTTPException(status_code=403, detail="Only staff can view lot history")
+    if since and since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)  # events are reported in UTC
+    events = lifecycle.events(db, since_id=since_id, since=since.timestamp() if since else None,
+                              lot_id=lot_id, limit=limit)
+    return {"events": events, "next_since_id": events[-1]["id"] if events else since_id}
+
+@app.get("/api/lots/comparables")
+def get_comparables(
+    artist: Optional[str] = None,
+    category: Optional[str] = None,
+    medium: Optional[str] = None,
+    height: Optional[float] = None,
+    width: Optional[float] = None,
+    depth: Optional[float] = None,
+    k: int = Query(10, ge=1, le=100),
+    db: sqlite3.Connection = Depends(get_read_db),
+    current_user: dict = Depends(get_current_user)
+):
+    if not current_user['is_staff']:
+        raise HTTPException(status_code=403, detail="Only staff can value lots")
+    comparables.ensure_loaded(db)
+    return comparables.query(artist=artist, category=category, medium=medium,
+                             height=height, width=width, depth=depth, k=k)
+
+@app.post("/api/lots/comparables/batch")
+def get_comparables_batch(
+    batch: ComparablesBatch,
+    db: sqlite3.Connection = Depends(get_read_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Value a whole intake: explicit descriptions and/or existing lots by id, in that order."""
+    if not current_user['is_staff']:
+        raise HTTPException(status_code=403, detail="Only staff can value lots")
+    comparables.ensure_loaded(db)
+    k = max(1, min(batch.k, 100))
+
+    results = [comparables.query(**item.dict(), k=k) for item in batch.lots]
+    if batch.lot_ids:
+        rows = db.execute(f'''
+            SELECT id, artist, category, medium, height, width, depth FROM lots
+            WHERE id IN ({",".join("?" * len(batch.lot_ids))})
+        ''', batch.lot_ids).fetchall()
+        lots = {row['id']: row for row in rows}
+        for lot_id in batch.lot_ids:
+            lot = lots.get(lot_id)
+            if lot is None:
+                results.append({"lot_id": lot_id, "error": "Lot not found"})
+                continue
+            result = comparables.query(artist=lot['artist'], category=lot['category'], medium=lot['medium'],
+                                       height=lot['height'], width=lot['width'], depth=lot['depth'],
+                                       k=k, exclude_id=lot_id)
+            results.append({"lot_id": lot_id, **result})
+    return {"results": results}
+
+@app.get("/api/lots/{lot_id}/comparables")
+def get_lot_comparables(
+    lot_id: int,
+    k: int = Query(10, ge=1, le=100),
+    db: sqlite3.Connection = Depends(get_read_db),
+    current_user: dict = Depends(get_current_user)
+):
+    if not current_user['is_staff']:
+        raise HTTPException(status_code=403, detail="Only staff can value lots")
+    lot = db.execute("SELECT artist, category, medium, height, width, depth FROM lots WHERE id = ?", (lot_id,)).fetchone()
+    if not lot:
+        raise HTTPException(status_code=404, detail="Lot not found")
+    comparables.ensure_loaded(db)
+    return comparables.query(**dict(lot), k=k, exclude_id=lot_id)
+
+@app.get("/api/lots/{lot_id}/duplicates")
+def get_lot_duplicates(
+    lot_id: int,
+    max_distance: int = Query(duplicates.DEFAULT_DISTANCE, ge=0, le=duplicates.MAX_DISTANCE),
+    db: sqlite3.Connection = Depends(get_read_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Lots, live or archived, with an image that looks like one of this lot's (Hamming distance between dHashes)."""
+    if not current_user['is_staff']:
+        raise HTTPException(status_code=403, detail="Only staff can check for duplicates")
+    if not duplicates.lots_by_id(db, [lot_id]):
+        raise HTTPException(status_code=404, detail="Lot not found")
+    duplicate_index.ensure_loaded(db)
+    return duplicates.find(db, duplicate_index, lot_id, max_distance)
+
+def add_archived_auctions(db, lots):
+    """Fill in auction details for lots whose auction has moved to the archive."""
+    missing = {lot['auction_id'] for lot in lots if lot.get('auction_id') and lot.get('auction_title') is None}
+    if not missing:
+        return
+    rows = db.execute(f'''
+        SELECT id, title, auction_type, location, auction_date, start_time FROM archive.auctions
+        WHERE id IN ({",".join("?" * len(missing))})
+    ''', list(missing)).fetchall()
+    auctions = {row['id']: row for row in rows}
+    for lot in lots:
+        auction = auctions.get(lot.get('auction_id'))
+        if auction and lot.get('auction_title') is None:
+            lot.update(auction_title=auction['title'], auction_type=auction['auction_type'], location=auction['location'],
+                       auction_date=auction['auction_date'], start_time=auction['start_time'])
+
+@app.get("/api/lots", response_model=List[LotResponse], response_class=ORJSONResponse)
 def get_lots(
     auction_id: Optional[int] = None,
     status: Optional[str] = None,
@@ -472,41 +760,18 @@ def get_lots(
     category: Optional[str] = None,
     seller_id: Optional[int] = None,
     archived_only: bool = False,
-    db: sqlite3.Connection = Depends(get_db)
+    db: sqlite3.Connection = Depends(get_read_db)
 ):
     cursor = db.cursor()
-    query = '''
+    clauses, params = queries.lot_filters(db, auction_id=auction_id, status=status, artist=artist, category=category,
+                                          seller_id=seller_id, archived_only=archived_only)
+    query = f'''
         SELECT l.*, a.title as auction_title, a.auction_type, a.location, a.auction_date, a.start_time
-        FROM lots l
+        FROM {"archive.lots" if archived_only else "lots"} l
         LEFT JOIN auctions a ON l.auction_id = a.id
-        WHERE 1=1
+        {queries.where(clauses)}
+        ORDER BY l.id DESC
     '''
-    params = []
-    
-    if archived_only:
-        query += ' AND l.is_archived = 1'
-    else:
-        query += ' AND (l.is_archived = 0 OR l.is_archived IS NULL)'
-
-    if auction_id:
-        query += ' AND l.auction_id = ?'
-        params.append(auction_id)
-    
-    if status and not archived_only:
-        query += ' AND l.status = ?'
-        params.append(status)
-
-    if artist:
-        query += ' AND l.artist LIKE ?'
-        params.append(f'%{artist}%')
-    if category:
-        query += ' AND l.category = ?'
-        params.append(category)
-    if seller_id:
-        query += ' AND l.seller_id = ?'
-        params.append(seller_id)
-    
-    query += ' ORDER BY l.id DESC'
     cursor.execute(query, params)
     
     lots = []
@@ -518,23 +783,28 @@ def get_lots(
         cursor.execute('SELECT * FROM lot_images WHERE lot_id = ? ORDER BY display_order', (lot['id'],))
         lot['images'] = [dict(img) for img in cursor.fetchall()]
         lots.append(lot)
-    return lots
+    add_archived_auctions(db, lots)
+    return trusted_response(lots, shape=lot_payload)
 
 @app.get("/api/lots/{lot_id}", response_model=LotResponse)
-def get_lot(lot_id: int, db: sqlite3.Connection = Depends(get_db)):
+def get_lot(lot_id: int, db: sqlite3.Connection = Depends(get_read_db)):
     cursor = db.cursor()
-    cursor.execute('''
-        SELECT l.*, a.title as auction_title, a.auction_type, a.location, a.auction_date, a.start_time
-        FROM lots l
-        LEFT JOIN auctions a ON l.auction_id = a.id
-        WHERE l.id = ?
-    ''', (lot_id,))
-    result = cursor.fetchone()
+    for table in ("lots", "archive.lots"):
+        cursor.execute(f'''
+            SELECT l.*, a.title as auction_title, a.auction_type, a.location, a.auction_date, a.start_time
+            FROM {table} l
+            LEFT JOIN auctions a ON l.auction_id = a.id
+            WHERE l.id = ?
+        ''', (lot_id,))
+        result = cursor.fetchone()
+        if result:
+            break
     if not result: raise HTTPException(status_code=404, detail="Lot not found")
     
     lot = dict(result)
     if lot.get('is_archived'):
         lot['status'] = 'Archived'
+    add_archived_auctions(db, [lot])
 
     cursor.execute('SELECT * FROM lot_images WHERE lot_id = ? ORDER BY display_order', (lot_id,))
     lot['images'] = [dict(img) for img in cursor.fetchall()]
@@ -544,13 +814,12 @@ def get_lot(lot_id: int, db: sqlite3.Connection = Depends(get_db)):
 def update_lot(
     lot_id: int,
     lot_update: LotUpdate,
-    db: sqlite3.Connection = Depends(get_db),
+    db: sqlite3.Connection = Depends(get_read_db),
     current_user: dict = Depends(get_current_user)
 ):
     if not current_user['is_staff']:
          raise HTTPException(status_code=403, detail="Only staff can modify lots")
 
-    cursor = db.cursor()
     update_data = lot_update.dict(exclude_unset=True)
     if not update_data:
         raise HTTPException(status_code=400, detail="No data to update")
@@ -558,9 +827,17 @@ def update_lot(
     set_clause = ", ".join([f"{k} = ?" for k in update_data.keys()])
     values = list(update_data.values()) + [lot_id]
     
+    def update(conn):
+        if not conn.execute(f"UPDATE lots SET {set_clause} WHERE id = ?", values).rowcount:
+            if conn.execute("SELECT 1 FROM archive.lots WHERE id = ?", (lot_id,)).fetchone():
+                raise HTTPException(status_code=409, detail="Lot is archived. Restore it first.")
+            raise HTTPException(status_code=404, detail="Lot not found")
+        artist_search.index_artist(conn, update_data.get('artist'))
+
     try:
-        cursor.execute(f"UPDATE lots SET {set_clause} WHERE id = ?", values)
-        db.commit()
+        db_writer.run(update)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
@@ -569,21 +846,19 @@ def update_lot(
 @app.delete("/api/lots/{lot_id}")
 def delete_lot(
     lot_id: int,
-    db: sqlite3.Connection = Depends(get_db),
+    db: sqlite3.Connection = Depends(get_read_db),
     current_user: dict = Depends(get_current_user)
 ):
     if not current_user['is_staff']:
         raise HTTPException(status_code=403, detail="Only staff can delete lots")
         
-    cursor = db.cursor()
-    cursor.execute("DELETE FROM lots WHERE id = ?", (lot_id,))
-    db.commit()
+    db_writer.run(lambda conn: lifecycle.deleted(conn, lot_id, actor_id=current_user['id']))
     return {"message": "Lot deleted"}
 
 @app.delete("/api/lots/images/{image_id}")
 def delete_lot_image(
     image_id: int,
-    db: sqlite3.Connection = Depends(get_db),
+    db: sqlite3.Connection = Depends(get_read_db),
     current_user: dict = Depends(get_current_user)
 ):
     if not current_user['is_staff']:
@@ -594,67 +869,92 @@ def delete_lot_image(
     if not cursor.fetchone():
         raise HTTPException(status_code=404, detail="Image not found")
     
-    cursor.execute("DELETE FROM lot_images WHERE id = ?", (image_id,))
-    db.commit()
+    db_writer.run(lambda conn: conn.execute("DELETE FROM lot_images WHERE id = ?", (image_id,)))
     return {"message": "Image deleted"}
 
 @app.put("/api/lots/{lot_id}/archive")
 def archive_lot(
     lot_id: int,
-    db: sqlite3.Connection = Depends(get_db),
+    db: sqlite3.Connection = Depends(get_read_db),
     current_user: dict = Depends(get_current_user)
 ):
     if not current_user['is_staff']:
         raise HTTPException(status_code=403, detail="Only staff can archive lots")
         
-    cursor = db.cursor()
-    cursor.execute('UPDATE lots SET is_archived = 1 WHERE id = ?', (lot_id,))
-    db.commit()
+    if not archive.archive_row(db_writer, "lots", lot_id):
+        raise HTTPException(status_code=404, detail="Lot not found")
     return {"message": "Lot archived"}
 
 @app.put("/api/lots/{lot_id}/unarchive")
 def unarchive_lot(
     lot_id: int,
-    db: sqlite3.Connection = Depends(get_db),
+    db: sqlite3.Connection = Depends(get_read_db),
     current_user: dict = Depends(get_current_user)
 ):
     if not current_user['is_staff']:
         raise HTTPException(status_code=403, detail="Only staff can restore lots")
         
-    cursor = db.cursor()
-    cursor.execute('UPDATE lots SET is_archived = 0 WHERE id = ?', (lot_id,))
-    db.commit()
+    try:
+        restored = archive.restore_row(db_writer, "lots", lot_id)
+    except sqlite3.IntegrityError:
+        raise HTTPException(status_code=409, detail="Another lot now uses this lot reference")
+    if not restored:
+        raise HTTPException(status_code=404, detail="Archived lot not found")
     return {"message": "Lot restored"}
 
 @app.get("/api/clients/{client_id}/lots", response_model=List[LotResponse])
 def get_client_lots(
     client_id: int, 
-    db: sqlite3.Connection = Depends(get_db),
+    db: sqlite3.Connection = Depends(get_read_db),
     current_user: dict = Depends(get_current_user)
 ):
     if not current_user['is_staff'] and current_user['id'] != client_id:
         raise HTTPException(status_code=403, detail="Not authorized")
     return get_lots(seller_id=client_id, db=db)
 
+@app.get("/api/clients/{client_id}/portfolio", response_class=ORJSONResponse)
+def get_client_portfolio(
+    client_id: int,
+    include_lots: bool = True,
+    db: sqlite3.Connection = Depends(get_read_db),
+    current_user: dict = Depends(get_current_user)
+):
+    if not current_user['is_staff'] and current_user['id'] != client_id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return ORJSONResponse(portfolio.portfolio(db, client_id, include_lots=include_lots))
+
+@app.get("/api/clients/{client_id}/lot-summary")
+def get_client_lot_summary(
+    client_id: int,
+    since_id: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: sqlite3.Connection = Depends(get_read_db),
+    current_user: dict = Depends(get_current_user)
+):
+    if not current_user['is_staff'] and current_user['id'] != client_id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    events = lifecycle.events(db, since_id=since_id, seller_id=client_id, limit=limit)
+    return {
+        "counts": lifecycle.status_counts(db, seller_id=client_id),
+        "events": events,
+        "next_since_id": events[-1]["id"] if events else since_id,
+    }
+
 @app.put("/api/lots/{lot_id}/assign-auction")
 def assign_lot_to_auction(
     lot_id: int, 
     auction_id: int, 
-    db: sqlite3.Connection = Depends(get_db),
+    db: sqlite3.Connection = Depends(get_read_db),
     current_user: dict = Depends(get_current_user)
 ):
     if not current_user['is_staff']:
         raise HTTPException(status_code=403, detail="Only staff can assign auctions")
         
-    cursor = db.cursor()
-    cursor.execute('UPDATE lots SET auction_id = ?, status = "Listed" WHERE id = ?', (auction_id, lot_id))
-    db.commit()
-    if cursor.rowcount == 0:
-        raise HTTPException(status_code=404, detail="Lot not found")
+    change_lot_status(lot_id, "Listed", current_user, auction_id=auction_id)
     return {"message": "Lot assigned successfully"}
 
 @app.put("/api/lots/{lot_id}/withdraw")
-def withdraw_lot(lot_id: int, db: sqlite3.Connection = Depends(get_db), current_user: dict = Depends(get_current_user)):
+def withdraw_lot(lot_id: int, db: sqlite3.Connection = Depends(get_read_db), current_user: dict = Depends(get_current_user)):
     cursor = db.cursor()
     cursor.execute('SELECT * FROM lots WHERE id = ?', (lot_id,))
     lot = cursor.fetchone()
@@ -663,51 +963,125 @@ def withdraw_lot(lot_id: int, db: sqlite3.Connection = Depends(get_db), current_
     if not current_user['is_staff'] and lot['seller_id'] != current_user['id']:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    cursor.execute('UPDATE lots SET status = ?, withdrawn_date = ? WHERE id = ?', ('Withdrawn', date.today(), lot_id))
-    db.commit()
+    change_lot_status(lot_id, "Withdrawn", current_user, withdrawn_date=date.today().isoformat())
     return {"message": "Lot withdrawn"}
 
-@app.post("/api/lots/{lot_id}/images")
-async def upload_lot_image(
-    lot_id: int,
-    file: UploadFile = File(...),
-    is_primary: bool = Form(False),
-    db: sqlite3.Connection = Depends(get_db)
-):
-    upload_dir = Path("public/uploads/lots")
+@app.put("/api/lots/{lot_id}/unsold")
+def mark_lot_unsold(lot_id: int, current_user: dict = Depends(get_current_user)):
+    if not current_user['is_staff']:
+        raise HTTPException(status_code=403, detail="Only staff can record sale results")
+    change_lot_status(lot_id, "Unsold", current_user)
+    return {"message": "Lot marked unsold"}
+
+def change_lot_status(lot_id, to_status, current_user, **changes):
+    """Apply a lifecycle transition, mapping a missing lot to 404 and an illegal move to 409."""
+    try:
+        previous = db_writer.run(lambda conn: lifecycle.transition(
+            conn, lot_id, to_status, actor_id=current_user['id'], **changes
+        ))
+    except lifecycle.TransitionError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if previous is None:
+        raise HTTPException(status_code=404, detail="Lot not found")
+
+def save_lot_image(lot_id, filename, content):
+    """Write the upload and its thumbnail. Returns the thumbnail URL and the image's perceptual hash,
+    both None if it is not an image."""
+    upload_dir = UPLOAD_ROOT / "uploads" / "lots"
     upload_dir.mkdir(parents=True, exist_ok=True)
-    thumb_dir = Path("public/uploads/lots/thumbnails")
+    thumb_dir = upload_dir / "thumbnails"
     thumb_dir.mkdir(parents=True, exist_ok=True)
-    
-    file_path = upload_dir / f"{lot_id}_{file.filename}"
-    content = await file.read()
+
+    file_path = upload_dir / f"{lot_id}_{filename}"
     with file_path.open("wb") as f:
         f.write(content)
-    
+
     try:
+        from PIL import Image
         image = Image.open(io.BytesIO(content))
         image.thumbnail((300, 300), Image.Resampling.LANCZOS)
-        thumb_path = thumb_dir / f"{lot_id}_thumb_{file.filename}"
+        thumb_path = thumb_dir / f"{lot_id}_thumb_{filename}"
         image.save(thumb_path, quality=85, optimize=True)
-        thumbnail_url = f"/uploads/lots/thumbnails/{lot_id}_thumb_{file.filename}"
+        return f"/uploads/lots/thumbnails/{lot_id}_thumb_{filename}", duplicates.hash_file(io.BytesIO(content))
     except Exception:
-        thumbnail_url = None
-    
-    cursor = db.cursor()
+        return None, None
+
+@app.post("/api/lots/{lot_id}/images")
+async def upload_lot_image(
+    lot_id: int,
+    file: UploadFile = File(...),
+    is_primary: bool = Form(False)
+):
+    content = await file.read()
+    thumbnail_url, dhash = await run_in_threadpool(save_lot_image, lot_id, file.filename, content)
     image_url = f"/uploads/lots/{lot_id}_{file.filename}"
-    cursor.execute('INSERT INTO lot_images (lot_id, image_url, thumbnail_url, is_primary) VALUES (?, ?, ?, ?)', 
-                   (lot_id, image_url, thumbnail_url, is_primary))
-    db.commit()
+
+    def insert_image(conn):
+        before = coherence.seq(conn, "lot_images")
+        image_id = conn.execute(
+            'INSERT INTO lot_images (lot_id, image_url, thumbnail_url, is_primary, dhash) VALUES (?, ?, ?, ?, ?)',
+            (lot_id, image_url, thumbnail_url, is_primary, None if dhash is None else duplicates.to_signed(dhash))
+        ).lastrowid
+        return image_id, before, coherence.seq(conn, "lot_images")
+
+    image_id, before, after = await asyncio.wrap_future(db_writer.submit(insert_image))
+    if dhash is not None:
+        duplicate_index.add(image_id, lot_id, dhash)
+    cache_coherence.acknowledge("lot_images", before, after)
     return {"message": "Image uploaded", "url": image_url}
 
+@app.get("/api/images/{image_id}")
+def get_image_rendition(
+    image_id: int,
+    request: Request,
+    width: int = Query(800, ge=1, le=4096),
+    format: str = Query("jpeg", pattern="^(jpeg|webp)$"),
+    quality: int = Query(80, ge=1, le=100),
+    db: sqlite3.Connection = Depends(get_read_db)
+):
+    row = db.execute("SELECT image_url FROM lot_images WHERE id = ?", (image_id,)).fetchone()
+    if not row:
+        raise HTTPException(status_code=404, detail="Image not found")
+    uploads = (UPLOAD_ROOT / "uploads").resolve()
+    source = (UPLOAD_ROOT / row['image_url'].lstrip("/")).resolve()
+    if not source.is_relative_to(uploads) or not source.is_file():
+        raise HTTPException(status_code=404, detail="Image file not available")
+
+    width, quality = images.snap_width(width), images.snap_quality(quality)
+    _, media_type, extension = images.FORMATS[format]
+    stat = source.stat()
+    key = f"{image_id}-{stat.st_size:x}-{stat.st_mtime_ns:x}-w{width}-q{quality}.{extension}"
+    headers = {"Cache-Control": "public, max-age=31536000, immutable", "ETag": f'"{key}"'}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    try:
+        path = rendition_cache.get(key, lambda tmp: images.render(source, tmp, width, format, quality))
+    except OSError:
+        raise HTTPException(status_code=415, detail="Image could not be decoded")
+    return FileResponse(path, media_type=media_type, headers=headers)
+
 @app.post("/api/lots/{lot_id}/complete-sale")
-def complete_sale(lot_id: int, hammer_price: float, db: sqlite3.Connection = Depends(get_db), current_user: dict = Depends(get_current_user)):
+def complete_sale(lot_id: int, hammer_price: float, db: sqlite3.Connection = Depends(get_read_db), current_user: dict = Depends(get_current_user)):
     if not current_user['is_staff']:
         raise HTTPException(status_code=403, detail="Only staff can finalize sales")
 
-    cursor = db.cursor()
-    cursor.execute('UPDATE lots SET status = "Sold", sold_price = ? WHERE id = ?', (hammer_price, lot_id))
-    db.commit()
+    def record_sale(conn):
+        before = coherence.seq(conn, "sold_lots")
+        if lifecycle.transition(conn, lot_id, "Sold", actor_id=current_user['id'], sold_price=hammer_price) is None:
+            raise HTTPException(status_code=404, detail="Lot not found")
+        sold = conn.execute(
+            "SELECT id, artist, title, category, medium, height, width, depth, sold_price FROM lots WHERE id = ?", (lot_id,)
+        ).fetchone()
+        return sold, before, coherence.seq(conn, "sold_lots")
+
+    try:
+        sold, before, after = db_writer.run(record_sale)
+    except lifecycle.TransitionError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if sold:
+        # Update this worker's index in place rather than letting the next check reload it.
+        comparables.add(sold)
+        cache_coherence.acknowledge("sold_lots", before, after)
     
     buyers_premium = hammer_price * 0.10
     sellers_commission = hammer_price * 0.10
@@ -729,39 +1103,133 @@ def calculate_commission(calc: CommissionCalculation):
         "total_seller_receives": calc.hammer_price - sellers_commission
     }
 
-@app.get("/api/catalogue/search")
-def search_catalogue(
-    q: Optional[str] = None,
-    location: Optional[str] = None,
-    auction_type: Optional[str] = None,
-    category: Optional[str] = None,
-    db: sqlite3.Connection = Depends(get_db)
-):
-    cursor = db.cursor()
-    query = '''
-        SELECT l.*, a.title as auction_title, a.auction_type, a.location, a.auction_date
-        FROM lots l
-        LEFT JOIN auctions a ON l.auction_id = a.id
-        WHERE l.status = "Listed" 
-        AND (l.is_archived = 0 OR l.is_archived IS NULL)
-        AND (a.is_archived = 0 OR a.is_archived IS NULL)
-    '''
-    params = []
-    
+CATALOGUE_FROM = '''
+    FROM lots l
+    JOIN auctions a ON l.auction_id = a.id
+    WHERE l.status = 'Listed'
+'''
+
+# (key, lower bound inclusive, upper bound exclusive) on estimate_low
+ESTIMATE_BANDS = [
+    ("under-5000", None, 5000),
+    ("5000-20000", 5000, 20000),
+    ("20000-100000", 20000, 100000),
+    ("100000-500000", 100000, 500000),
+    ("500000-plus", 500000, None),
+]
+ESTIMATE_BAND_SQL = "CASE " + " ".join(
+    f"WHEN l.estimate_low < {upper} THEN '{key}'" for key, _, upper in ESTIMATE_BANDS if upper is not None
+) + f" ELSE '{ESTIMATE_BANDS[-1][0]}' END"
+FACET_COLUMNS = {
+    "location": "a.location",
+    "auction_type": "a.auction_type",
+    "category": "l.category",
+    "estimate_band": ESTIMATE_BAND_SQL,
+}
+
+# Per-auction catalogue documents, rebuilt in the background when a lot, image or auction
+# changes and served as static files (no SQL) from /api/catalogue/snapshots/{auction_id}.json.
+# FOTHERBYS_CATALOGUE_SNAPSHOTS=0 stops this worker rebuilding them.
+SNAPSHOT_DIR = Path(os.getenv("FOTHERBYS_SNAPSHOT_DIR", database_dir("snapshots")))
+catalogue_snapshots = snapshots.CatalogueSnapshots(
+    DB_PATH, {archive.SCHEMA: ARCHIVE_DB_PATH}, SNAPSHOT_DIR, db_writer, migrations.LISTED_LOTS_WHERE, ESTIMATE_BAND_SQL,
+)
+app.mount("/api/catalogue/snapshots", snapshots.SnapshotFiles(SNAPSHOT_DIR))
+
+CATALOGUE_SORTS = {
+    "date": "a.auction_date ASC, a.id, l.id",
+    "estimate": "l.estimate_low ASC, l.id",
+    "lot_reference": "l.lot_reference ASC",
+    "relevance": None,
+}
+
+def fuzzy_artists(db, text, limit=50):
+    """Artist names within a few typos of the text, used to widen LIKE searches."""
+    return [match['artist'] for match in artist_search.suggest(db, text, limit=limit)] if text else []
+
+def catalogue_filters(q=None, location=None, auction_type=None, category=None, estimate_band=None,
+                      min_estimate=None, max_estimate=None, estimate_index=True, artist_matches=()):
+    """WHERE terms for catalogue searches.
+
+    With estimate_index=False the estimate bounds are written as +l.estimate_low so
+    the planner cannot pick the estimate index for them and walks the index of the
+    requested sort order instead, stopping once the page is full.
+    """
+    clauses, params = [], []
+    estimate = 'l.estimate_low' if estimate_index else '+l.estimate_low'
     if q:
-        query += ' AND (l.artist LIKE ? OR l.title LIKE ?)'
-        params.extend([f'%{q}%', f'%{q}%'])
+        fuzzy = f' OR l.artist IN ({",".join("?" * len(artist_matches))})' if artist_matches else ''
+        clauses.append(f'(l.artist LIKE ? OR l.title LIKE ?{fuzzy})')
+        params.extend([f'%{q}%', f'%{q}%', *artist_matches])
     if location:
-        query += ' AND a.location = ?'
+        clauses.append('a.location = ?')
         params.append(location)
     if auction_type:
-        query += ' AND a.auction_type = ?'
+        clauses.append('a.auction_type = ?')
         params.append(auction_type)
     if category:
-        query += ' AND l.category = ?'
+        clauses.append('l.category = ?')
         params.append(category)
-    
-    query += ' ORDER BY a.auction_date ASC'
+    if estimate_band:
+        bounds = {key: (lower, upper) for key, lower, upper in ESTIMATE_BANDS}
+        if estimate_band not in bounds:
+            raise HTTPException(status_code=400, detail=f"Unknown estimate band '{estimate_band}'")
+        lower, upper = bounds[estimate_band]
+        if lower is not None:
+            clauses.append(f'{estimate} >= ?')
+            params.append(lower)
+        if upper is not None:
+            clauses.append(f'{estimate} < ?')
+            params.append(upper)
+    if min_estimate is not None:
+        clauses.append(f'{estimate} >= ?')
+        params.append(min_estimate)
+    if max_estimate is not None:
+        # estimate_low <= estimate_high, so this also bounds the estimate_low index range
+        clauses.append(f'{estimate} <= ? AND l.estimate_high <= ?')
+        params.extend([max_estimate, max_estimate])
+    return ''.join(f' AND {clause}' for clause in clauses), params
+
+def catalogue_order(sort="date", q=None):
+    if sort not in CATALOGUE_SORTS:
+        raise HTTPException(status_code=400, detail=f"Unknown sort '{sort}'")
+    if sort == "relevance":
+        if not q:
+            return ' ORDER BY ' + CATALOGUE_SORTS["date"], []
+        # Relevance ranks the (already filtered) matches, so it is the one mode that needs a sort step.
+        return (' ORDER BY CASE WHEN l.artist = ? COLLATE NOCASE THEN 0 WHEN l.artist LIKE ? THEN 1 '
+                'WHEN l.title LIKE ? THEN 2 ELSE 3 END, ' + CATALOGUE_SORTS["date"]), [q, f'{q}%', f'{q}%']
+    return ' ORDER BY ' + CATALOGUE_SORTS[sort], []
+
+def catalogue_query(select, filters, sort="date", q=None, limit=None, offset=0):
+    estimate_index = sort == "estimate" or (sort == "relevance" and bool(q))
+    where, params = catalogue_filters(q=q, estimate_index=estimate_index, **filters)
+    order, order_params = catalogue_order(sort, q)
+    query = select + CATALOGUE_FROM + where + order
+    params = params + order_params
+    if limit is not None:
+        query += ' LIMIT ? OFFSET ?'
+        params += [limit, offset]
+    return query, params
+
+@app.get("/api/catalogue/search", response_class=ORJSONResponse)
+def search_catalogue(
+    q: Optional[str] = None,
+    location: Optional[str] = None,
+    auction_type: Optional[str] = None,
+    category: Optional[str] = None,
+    min_estimate: Optional[float] = None,
+    max_estimate: Optional[float] = None,
+    sort: str = "date",
+    db: sqlite3.Connection = Depends(get_read_db)
+):
+    cursor = db.cursor()
+    query, params = catalogue_query(
+        'SELECT l.*, a.title as auction_title, a.auction_type, a.location, a.auction_date',
+        dict(location=location, auction_type=auction_type, category=category,
+             min_estimate=min_estimate, max_estimate=max_estimate, artist_matches=fuzzy_artists(db, q)),
+        sort=sort, q=q,
+    )
     cursor.execute(query, params)
     
     lots = []
@@ -771,10 +1239,229 @@ def search_catalogue(
         img = cursor.fetchone()
         lot['images'] = [dict(img)] if img else []
         lots.append(lot)
-    return lots
+    return trusted_response(lots)
+
+@app.get("/api/catalogue/search/faceted", response_class=ORJSONResponse)
+def search_catalogue_faceted(
+    q: Optional[str] = None,
+    location: Optional[str] = None,
+    auction_type: Optional[str] = None,
+    category: Optional[str] = None,
+    estimate_band: Optional[str] = None,
+    min_estimate: Optional[float] = None,
+    max_estimate: Optional[float] = None,
+    sort: str = "date",
+    page: int = Query(1, ge=1),
+    page_size: int = Query(24, ge=1, le=200),
+    db: sqlite3.Connection = Depends(get_read_db)
+):
+    """One page of catalogue results plus counts per location, auction type,
+    category and estimate band.
+
+    Facet counts come from a single GROUP BY over the text and estimate-range matches. Each
+    facet ignores its own selection, so the UI can show how many lots every
+    alternative value would return.
+    """
+    selected = {"location": location, "auction_type": auction_type,
+                "category": category, "estimate_band": estimate_band}
+    artist_matches = fuzzy_artists(db, q)
+    text_where, text_params = catalogue_filters(q, min_estimate=min_estimate, max_estimate=max_estimate,
+                                                artist_matches=artist_matches)
+
+    cursor = db.cursor()
+    cursor.execute(
+        'SELECT ' + ', '.join(f'{sql} AS {name}' for name, sql in FACET_COLUMNS.items()) + ', COUNT(*) AS n' +
+        CATALOGUE_FROM + text_where + ' GROUP BY ' + ', '.join(str(i + 1) for i in range(len(FACET_COLUMNS))),
+        text_params
+    )
+    facets = {name: {} for name in FACET_COLUMNS}
+    total = 0
+    for row in cursor.fetchall():
+        mismatched = [name for name, value in selected.items() if value and row[name] != value]
+        if not mismatched:
+            total += row['n']
+        for name in FACET_COLUMNS:
+            if not mismatched or mismatched == [name]:
+                facets[name][row[name]] = facets[name].get(row[name], 0) + row['n']
+
+    cursor.execute(*catalogue_query(
+        'SELECT l.*, a.title as auction_title, a.auction_type, a.location, a.auction_date, a.start_time',
+        dict(selected, min_estimate=min_estimate, max_estimate=max_estimate, artist_matches=artist_matches),
+        sort=sort, q=q, limit=page_size, offset=(page - 1) * page_size,
+    ))
+    lots = [dict(row) for row in cursor.fetchall()]
+
+    images = {}
+    if lots:
+        cursor.execute(
+            f'SELECT * FROM lot_images WHERE lot_id IN ({",".join("?" * len(lots))}) '
+            'ORDER BY lot_id, is_primary DESC, display_order, id',
+            [lot['id'] for lot in lots]
+        )
+        for img in cursor.fetchall():
+            images.setdefault(img['lot_id'], dict(img))
+    for lot in lots:
+        lot['images'] = [images[lot['id']]] if lot['id'] in images else []
+
+    band_order = [key for key, _, _ in ESTIMATE_BANDS]
+    return trusted_response({
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "results": lots,
+        "facets": {
+            name: [{"value": value, "count": count} for value, count in sorted(
+                counts.items(),
+                key=lambda item: band_order.index(item[0]) if name == "estimate_band" else (item[0] is None, item[0] or "")
+            )]
+            for name, counts in facets.items()
+        },
+    })
+
+@app.get("/api/artists/suggest")
+def suggest_artists(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+    db: sqlite3.Connection = Depends(get_read_db)
+):
+    return artist_search.suggest(db, q, limit=limit)
+
+# EXPORTS
+def csv_export(kind, compress, **filters):
+    filename = f"fotherbys-{kind}-{date.today().isoformat()}.csv" + (".gz" if compress else "")
+    return StreamingResponse(
+        export.stream(DB_PATH, ARCHIVE_DB_PATH, kind, compress=compress, **filters),
+        media_type="application/gzip" if compress else "text/csv; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@app.get("/api/export/lots.csv")
+def export_lots(
+    auction_id: Optional[int] = None,
+    status: Optional[str] = None,
+    artist: Optional[str] = None,
+    category: Optional[str] = None,
+    seller_id: Optional[int] = None,
+    archived_only: bool = False,
+    gzip: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    if not current_user['is_staff']:
+        raise HTTPException(status_code=403, detail="Only staff can export data")
+    return csv_export("lots", gzip, auction_id=auction_id, status=status, artist=artist, category=category,
+                      seller_id=seller_id, archived_only=archived_only)
+
+@app.get("/api/export/transactions.csv")
+def export_transactions(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    seller_id: Optional[int] = None,
+    buyer_id: Optional[int] = None,
+    auction_id: Optional[int] = None,
+    gzip: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    if not current_user['is_staff']:
+        raise HTTPException(status_code=403, detail="Only staff can export data")
+    return csv_export("transactions", gzip, date_from=date_from, date_to=date_to, seller_id=seller_id,
+                      buyer_id=buyer_id, auction_id=auction_id)
+
+@app.get("/api/export/statements.csv")
+def export_statements(
+    client_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    gzip: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    if not current_user['is_staff']:
+        raise HTTPException(status_code=403, detail="Only staff can export data")
+    return csv_export("statements", gzip, client_id=client_id, date_from=date_from, date_to=date_to)
+
+@app.get("/api/admin/db-writer")
+def get_db_writer_stats(current_user: dict = Depends(get_current_user)):
+    if not current_user['is_staff']:
+        raise HTTPException(status_code=403, detail="Only staff can view database metrics")
+    return db_writer.stats()
+
+@app.get("/api/admin/cache-coherence")
+def get_cache_coherence_stats(current_user: dict = Depends(get_current_user)):
+    if not current_user['is_staff']:
+        raise HTTPException(status_code=403, detail="Only staff can view cache metrics")
+    return cache_coherence.stats()
+
+@app.get("/api/admin/image-cache")
+def get_image_cache_stats(current_user: dict = Depends(get_current_user)):
+    if not current_user['is_staff']:
+        raise HTTPException(status_code=403, detail="Only staff can view cache metrics")
+    return rendition_cache.stats()
+
+@app.get("/api/admin/admission")
+def get_admission_stats(current_user: dict = Depends(get_current_user)):
+    if not current_user['is_staff']:
+        raise HTTPException(status_code=403, detail="Only staff can view admission metrics")
+    return admission.stats()
+
+@app.get("/api/admin/snapshots")
+def get_snapshot_stats(current_user: dict = Depends(get_current_user)):
+    if not current_user['is_staff']:
+        raise HTTPException(status_code=403, detail="Only staff can view catalogue snapshots")
+    return catalogue_snapshots.stats()
+
+@app.post("/api/admin/snapshots/rebuild")
+def rebuild_snapshots(current_user: dict = Depends(get_current_user)):
+    if not current_user['is_staff']:
+        raise HTTPException(status_code=403, detail="Only staff can rebuild catalogue snapshots")
+    db_writer.run(snapshots.mark_all)
+    changed = catalogue_snapshots.rebuild()
+    # changed is None when another worker holds the lock; its next pass picks up the marks.
+    return {"changed": changed, **catalogue_snapshots.stats()}
+
+@app.get("/api/admin/compression")
+def get_compression_stats(current_user: dict = Depends(get_current_user)):
+    if not current_user['is_staff']:
+        raise HTTPException(status_code=403, detail="Only staff can view compression metrics")
+    return compression.stats()
+
+@app.get("/api/admin/storage")
+def get_storage_usage(refresh: bool = False, current_user: dict = Depends(get_current_user)):
+    if not current_user['is_staff']:
+        raise HTTPException(status_code=403, detail="Only staff can view storage usage")
+    if refresh or storage_collector.last_report is None:
+        storage_collector.scan()
+    return {**storage_collector.last_report, "last_collection": storage_collector.last_collection}
+
+@app.get("/api/admin/storage/lots/{lot_id}")
+def get_lot_storage_usage(lot_id: int, current_user: dict = Depends(get_current_user)):
+    if not current_user['is_staff']:
+        raise HTTPException(status_code=403, detail="Only staff can view storage usage")
+    return storage_collector.usage_for_lot(lot_id)
+
+@app.post("/api/admin/storage/gc")
+def collect_storage(dry_run: bool = False, current_user: dict = Depends(get_current_user)):
+    if not current_user['is_staff']:
+        raise HTTPException(status_code=403, detail="Only staff can reclaim storage")
+    return storage_collector.collect(dry_run=dry_run)
+
+@app.get("/api/admin/backups")
+def list_backups(current_user: dict = Depends(get_current_user)):
+    if not current_user['is_staff']:
+        raise HTTPException(status_code=403, detail="Only staff can view backups")
+    return {**backup_manager.stats(), "backups": backup_manager.list()}
+
+@app.post("/api/admin/backups")
+def create_backup(current_user: dict = Depends(get_current_user)):
+    if not current_user['is_staff']:
+        raise HTTPException(status_code=403, detail="Only staff can run backups")
+    try:
+        return backup_manager.run()
+    except BackupInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except BackupError as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/categories")
-def get_categories(db: sqlite3.Connection = Depends(get_db)):
+def get_categories(db: sqlite3.Connection = Depends(get_read_db)):
     cursor = db.cursor()
     cursor.execute('SELECT DISTINCT category FROM lots WHERE category IS NOT NULL ORDER BY category')
     return [row[0] for row in cursor.fetchall()]
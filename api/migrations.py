@@ -0,0 +1,162 @@
+"""Schema migrations, applied once per database.
+
+PRAGMA user_version records how many of MIGRATIONS have run, so a startup
+against an up-to-date database costs one pragma instead of re-checking every
+column, constraint and index. Append new steps to the end of the list;
+never reorder or edit a step that has shipped. A database created before
+versioning starts at 0 and re-runs every step, so they must be idempotent.
+
+The archive database keeps its own user_version. Its tables are rebuilt from
+the main schema whenever the two differ, including when the file is new.
+archive.reconcile() is not a migration: it runs on every start to finish any
+archive move interrupted by a crash, using partial indexes over the flagged rows.
+"""
+import sqlite3
+
+from api import archive, artist_search, coherence, lifecycle, snapshots
+
+# Partial indexes over the public catalogue (Listed lots) so every search
+# filter/sort combination is an index range scan without a sort step.
+# benchmarks/explain_catalogue.py checks the plans.
+LISTED_LOTS_WHERE = "status = 'Listed'"
+CATALOGUE_INDEXES = [
+    ("idx_lots_listed_auction", "lots(auction_id)"),
+    ("idx_lots_listed_auction_category", "lots(auction_id, category)"),
+    ("idx_lots_listed_estimate", "lots(estimate_low)"),
+    ("idx_lots_listed_category_estimate", "lots(category, estimate_low)"),
+    ("idx_lots_listed_reference", "lots(lot_reference)"),
+    ("idx_lots_listed_category_reference", "lots(category, lot_reference)"),
+]
+
+
+def add_column(conn, table, name, definition):
+    if name not in {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+        print(f"Migrated {table} table: Added {name} column.")
+
+
+def lot_columns(conn):
+    add_column(conn, "auctions", "is_archived", "INTEGER DEFAULT 0")
+    add_column(conn, "lots", "is_archived", "INTEGER DEFAULT 0")
+    for name, definition in [
+        ("medium", "TEXT"),
+        ("material", "TEXT"),
+        ("weight", "REAL"),
+        ("height", "REAL"),
+        ("width", "REAL"),
+        ("depth", "REAL"),
+        ("is_framed", "INTEGER DEFAULT 0"),
+    ]:
+        add_column(conn, "lots", name, definition)
+
+
+def live_auction_status(conn):
+    # Older databases only allow Upcoming/Completed/Cancelled; SQLite cannot alter a
+    # CHECK constraint, so rebuild the table with 'Live' added.
+    auctions_sql = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'auctions'").fetchone()[0]
+    if "CHECK(status IN" in auctions_sql and "'Live'" not in auctions_sql:
+        conn.execute("PRAGMA foreign_keys = OFF")
+        conn.execute(auctions_sql.replace("CREATE TABLE auctions", "CREATE TABLE auctions_migrated", 1)
+                     .replace("'Upcoming', 'Completed'", "'Upcoming', 'Live', 'Completed'"))
+        conn.execute("INSERT INTO auctions_migrated SELECT * FROM auctions")
+        conn.execute("DROP TABLE auctions")
+        conn.execute("ALTER TABLE auctions_migrated RENAME TO auctions")
+        print("Migrated auctions table: Added Live status.")
+
+
+def archive_rows(conn):
+    # Archived rows live in a separate database; move any still in the hot tables.
+    archive.ensure_schema(conn)
+    moved = archive.reconcile(conn)
+    if any(moved.values()):
+        print(f"Migrated archived rows to the archive database: {moved}")
+
+
+def indexes(conn):
+    for name, columns in CATALOGUE_INDEXES:
+        existing = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)).fetchone()
+        if existing and not existing[0].endswith(f"WHERE {LISTED_LOTS_WHERE}"):
+            conn.execute(f"DROP INDEX {name}")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {columns} WHERE {LISTED_LOTS_WHERE}")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_auctions_date ON auctions(auction_date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_auctions_status_date ON auctions(status, auction_date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_lot_images_lot ON lot_images(lot_id)")
+
+
+def artist_names(conn):
+    artist_search.ensure_schema(conn)
+    if not conn.execute("SELECT 1 FROM artist_names LIMIT 1").fetchone():
+        artist_search.rebuild(conn)
+
+
+def archived_flag_indexes(conn):
+    for table in archive.TABLES:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_archiving ON {table}(id) WHERE is_archived = 1")
+
+
+def lot_lifecycle(conn):
+    lifecycle.ensure_schema(conn)
+    lifecycle.rebuild_projections(conn)
+
+
+def transaction_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions(transaction_date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_transactions_buyer ON transactions(buyer_id, transaction_date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_transactions_seller ON transactions(seller_id, transaction_date)")
+
+
+def seller_indexes(conn):
+    # Seller pages (client lots, portfolio) read one seller's lots from both databases.
+    conn.execute("CREATE INDEX IF NOT EXISTS main.idx_lots_seller ON lots(seller_id)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {archive.SCHEMA}.idx_lots_seller ON lots(seller_id)")
+
+
+def catalogue_snapshots(conn):
+    snapshots.ensure_schema(conn)
+    snapshots.mark_all(conn)  # build every catalogue once
+
+
+def image_hashes(conn):
+    # Perceptual hashes for duplicate detection; scripts/scan_duplicates.py fills in existing images.
+    add_column(conn, "lot_images", "dhash", "INTEGER")
+
+
+MIGRATIONS = [
+    lot_columns,
+    live_auction_status,
+    archive_rows,
+    indexes,
+    artist_names,
+    coherence.ensure_schema,
+    archived_flag_indexes,
+    lot_lifecycle,
+    transaction_indexes,
+    seller_indexes,
+    catalogue_snapshots,
+    image_hashes,
+]
+
+
+def migrate(db_path, archive_path):
+    """Bring the database (and its archive) up to date. Returns the number of steps applied."""
+    conn = sqlite3.connect(str(db_path))
+    try:
+        conn.execute(f"ATTACH DATABASE ? AS {archive.SCHEMA}", (str(archive_path),))
+        version = conn.execute("PRAGMA main.user_version").fetchone()[0]
+        pending = MIGRATIONS[version:]
+        for step in pending:
+            step(conn)
+            version += 1
+            conn.execute(f"PRAGMA main.user_version = {version}")
+            conn.commit()
+        if conn.execute(f"PRAGMA {archive.SCHEMA}.user_version").fetchone()[0] != version:
+            archive.ensure_schema(conn)
+            conn.execute(f"PRAGMA {archive.SCHEMA}.user_version = {version}")
+            conn.commit()
+        moved = archive.reconcile(conn)
+        conn.commit()
+        if any(moved.values()):
+            print(f"Finished interrupted archive moves: {moved}")
+        return len(pending)
+    finally:
+        conn.close()
@@ -0,0 +1,92 @@
+"""A seller's whole consignment in one response: lots by status, with totals.
+
+Two statements over one read snapshot: the seller's lots (hot and archived)
+with their auction and primary image, and the per-status aggregates. Both
+use the seller indexes. The primary image is an indexed LIMIT 1 subquery
+inside the lots statement rather than a query per lot from Python (it beat
+a ROW_NUMBER() pass over the seller's images by a third at 10k lots; see
+benchmarks/portfolio_bench.py).
+"""
+from api import archive
+
+SELLERS_COMMISSION_RATE = 0.10
+OPEN_STATUSES = ("Pending", "Listed")
+
+LOT_COLUMNS = [
+    "id", "lot_reference", "artist", "title", "category", "estimate_low", "estimate_high", "reserve_price",
+    "sold_price", "status", "withdrawn_date", "withdrawal_fee", "auction_id", "created_at",
+]
+
+# Rows mid-way through an archive move are still flagged in the hot table; count the archive copy.
+SELLER_LOTS = f'''
+    WITH seller_lots AS (
+        SELECT {", ".join(LOT_COLUMNS)}, 0 AS archived FROM main.lots WHERE seller_id = :seller AND is_archived IS NOT 1
+        UNION ALL
+        SELECT {", ".join(LOT_COLUMNS)}, 1 AS archived FROM {archive.SCHEMA}.lots WHERE seller_id = :seller
+    )
+'''
+
+LOTS_QUERY = SELLER_LOTS + f'''
+    SELECT s.*, COALESCE(a.title, aa.title) AS auction_title, COALESCE(a.auction_date, aa.auction_date) AS auction_date,
+           i.id AS image_id, i.image_url, i.thumbnail_url
+    FROM seller_lots s
+    LEFT JOIN main.auctions a ON a.id = s.auction_id
+    LEFT JOIN {archive.SCHEMA}.auctions aa ON aa.id = s.auction_id
+    LEFT JOIN lot_images i ON i.id = (
+        SELECT id FROM lot_images WHERE lot_id = s.id ORDER BY is_primary DESC, display_order, id LIMIT 1
+    )
+    ORDER BY s.status, s.id DESC
+'''
+
+TOTALS_QUERY = SELLER_LOTS + '''
+    SELECT status, COUNT(*) AS lots, SUM(archived) AS archived,
+           TOTAL(estimate_low) AS estimate_low, TOTAL(estimate_high) AS estimate_high,
+           TOTAL(CASE WHEN status = 'Sold' THEN sold_price END) AS hammer,
+           TOTAL(withdrawal_fee) AS withdrawal_fees
+    FROM seller_lots
+    GROUP BY status
+    ORDER BY status
+'''
+
+TOTAL_FIELDS = ("lots", "archived", "estimate_low", "estimate_high", "hammer", "commission", "payout", "withdrawal_fees")
+
+
+def group_totals(row, rate):
+    commission = round(row["hammer"] * rate, 2)
+    totals = {"commission": commission, "payout": round(row["hammer"] - commission, 2)}
+    return {name: totals[name] if name in totals else row[name] for name in TOTAL_FIELDS}
+
+
+def lot_entry(row):
+    """A plain LOTS_QUERY tuple as a response dict."""
+    lot = dict(zip(LOT_COLUMNS, row))
+    archived, auction_title, auction_date, image_id, image_url, thumbnail_url = row[len(LOT_COLUMNS):]
+    lot.update(archived=bool(archived), auction_title=auction_title, auction_date=auction_date,
+               image={"id": image_id, "image_url": image_url, "thumbnail_url": thumbnail_url} if image_id else None)
+    return lot
+
+
+def portfolio(conn, seller_id, include_lots=True, rate=SELLERS_COMMISSION_RATE):
+    """Lots grouped by status with per-status and overall totals. Payout is hammer less commission;
+    expected payout adds what the open lots would pay at their estimates."""
+    params = {"seller": seller_id}
+    conn.execute("BEGIN")  # both statements read the same snapshot
+    try:
+        groups = {row["status"]: {"status": row["status"], "totals": group_totals(row, rate), "lots": []}
+                  for row in conn.execute(TOTALS_QUERY, params)}
+        if include_lots:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            status = LOT_COLUMNS.index("status")
+            for row in cursor.execute(LOTS_QUERY, params):
+                groups[row[status]]["lots"].append(lot_entry(row))
+    finally:
+        conn.commit()
+
+    totals = {name: round(sum(g["totals"][name] for g in groups.values()), 2) for name in TOTAL_FIELDS}
+    totals["net_payout"] = round(totals["payout"] - totals["withdrawal_fees"], 2)
+    open_groups = [groups[status]["totals"] for status in OPEN_STATUSES if status in groups]
+    for bound in ("low", "high"):
+        at_estimate = sum(g[f"estimate_{bound}"] for g in open_groups) * (1 - rate)
+        totals[f"expected_payout_{bound}"] = round(totals["net_payout"] + at_estimate, 2)
+    return {"seller_id": seller_id, "commission_rate": rate, "totals": totals, "groups": list(groups.values())}
@@ -0,0 +1,34 @@
+"""Lot filters shared by the JSON lot listings and the CSV exports.
+
+GET /api/lots and GET /api/export/lots.csv take the same query parameters and
+must select the same lots, so both build their WHERE clause here. Terms are
+written against the alias l, whichever lots table (hot or archive) it names.
+"""
+from api import artist_search
+
+
+def lot_filters(db, auction_id=None, status=None, artist=None, category=None, seller_id=None, archived_only=False):
+    """(clauses, params) for the given filters. artist also matches near spellings of indexed names."""
+    clauses, params = [], []
+    if auction_id:
+        clauses.append("l.auction_id = ?")
+        params.append(auction_id)
+    if status and not archived_only:
+        clauses.append("l.status = ?")
+        params.append(status)
+    if artist:
+        matches = [match["artist"] for match in artist_search.suggest(db, artist, limit=50)]
+        fuzzy = f' OR l.artist IN ({",".join("?" * len(matches))})' if matches else ""
+        clauses.append(f"(l.artist LIKE ?{fuzzy})")
+        params.extend([f"%{artist}%", *matches])
+    if category:
+        clauses.append("l.category = ?")
+        params.append(category)
+    if seller_id:
+        clauses.append("l.seller_id = ?")
+        params.append(seller_id)
+    return clauses, params
+
+
+def where(clauses):
+    return f"WHERE {' AND '.join(clauses)}" if clauses else ""
@@ -0,0 +1,287 @@
+"""Static JSON snapshots of each auction's public catalogue.
+
+A published catalogue barely changes before the sale, so instead of running
+catalogue queries for every visitor, a builder writes one document per
+auction (auction details, lot cards with their image URLs, and facet
+counts) to disk. It also writes an index of the auctions that have one.
+SnapshotFiles serves them with a strong ETag (a hash of the bytes), without
+touching the database.
+
+Triggers on lots, lot_images and auctions mark the affected auction in
+catalogue_dirty, whichever process made the change. The builder rebuilds
+only those auctions and clears each mark only if it has not moved since it
+was read. It notices commits by polling PRAGMA data_version once every
+poll_s on its own connection, since snapshot reads never reach the
+per-request coherence check. A rebuild that produces the same bytes leaves the file (and its
+ETag) alone. An auction with no listed lots, or no longer in the hot tables,
+loses its snapshot.
+"""
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response
+
+from api.database import connect_readonly
+
+log = logging.getLogger(__name__)
+
+INDEX_NAME = "index"
+
+
+def mark(auction_id):
+    return (f"INSERT INTO catalogue_dirty (auction_id, seq) SELECT {auction_id}, 1 WHERE {auction_id} IS NOT NULL "
+            "ON CONFLICT (auction_id) DO UPDATE SET seq = seq + 1;")
+
+
+LOT_AUCTION = "(SELECT auction_id FROM lots WHERE id = {row}.lot_id)"
+
+# (trigger name, event, table, marks)
+TRIGGERS = [
+    ("trg_catalogue_lots_insert", "INSERT", "lots", ["NEW.auction_id"]),
+    ("trg_catalogue_lots_update", "UPDATE", "lots", ["OLD.auction_id", "NEW.auction_id"]),
+    ("trg_catalogue_lots_delete", "DELETE", "lots", ["OLD.auction_id"]),
+    ("trg_catalogue_images_insert", "INSERT", "lot_images", [LOT_AUCTION.format(row="NEW")]),
+    ("trg_catalogue_images_update", "UPDATE", "lot_images", [LOT_AUCTION.format(row="OLD"), LOT_AUCTION.format(row="NEW")]),
+    ("trg_catalogue_images_delete", "DELETE", "lot_images", [LOT_AUCTION.format(row="OLD")]),
+    ("trg_catalogue_auctions_insert", "INSERT", "auctions", ["NEW.id"]),
+    ("trg_catalogue_auctions_update", "UPDATE", "auctions", ["NEW.id"]),
+    ("trg_catalogue_auctions_delete", "DELETE", "auctions", ["OLD.id"]),
+]
+
+AUCTION_COLUMNS = ["id", "title", "location", "auction_date", "start_time", "theme", "auction_type", "status"]
+LOT_COLUMNS = [
+    "id", "lot_reference", "auction_id", "artist", "title", "category", "dimensions", "framing_details",
+    "year_of_production", "description", "estimate_low", "estimate_high", "status", "triage_status", "medium", "material",
+    "weight", "height", "width", "depth", "is_framed",
+]
+
+
+def ensure_schema(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS catalogue_dirty (
+            auction_id INTEGER PRIMARY KEY,
+            seq INTEGER NOT NULL
+        )
+    ''')
+    for name, event, table, marks in TRIGGERS:
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table} "
+                     f"BEGIN {' '.join(mark(auction_id) for auction_id in marks)} END")
+
+
+def mark_all(conn):
+    conn.execute("INSERT INTO catalogue_dirty (auction_id, seq) SELECT id, 1 FROM auctions WHERE true "
+                 "ON CONFLICT (auction_id) DO UPDATE SET seq = seq + 1")
+
+
+def etag_for(body):
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def encode(document):
+    return json.dumps(document, separators=(",", ":"), sort_keys=True).encode()
+
+
+class CatalogueSnapshots:
+    def __init__(self, db_path, attach, directory, writer, listed_where, estimate_band_sql, poll_s=1.0):
+        self.db_path = db_path
+        self.attach = attach
+        self.directory = Path(directory)
+        self.writer = writer
+        self.listed_where = listed_where
+        self.estimate_band_sql = estimate_band_sql
+        self.poll_s = poll_s
+        self.builds = self.unchanged = self.removed = 0
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def path(self, name):
+        return self.directory / f"{name}.json"
+
+    def document(self, conn, auction_id):
+        """The snapshot for one auction, or None if it has no public catalogue."""
+        auction = conn.execute(f"SELECT {', '.join(AUCTION_COLUMNS)} FROM auctions WHERE id = ?", (auction_id,)).fetchone()
+        if auction is None:
+            return None
+        lots = [dict(row) for row in conn.execute(
+            f"SELECT {', '.join(LOT_COLUMNS)} FROM lots WHERE auction_id = ? AND {self.listed_where} ORDER BY lot_reference, id",
+            (auction_id,))]
+        if not lots:
+            return None
+        images = {}
+        for lot_id, image_url, thumbnail_url in conn.execute(f'''
+            SELECT i.lot_id, i.image_url, i.thumbnail_url FROM lot_images i
+            JOIN lots l ON l.id = i.lot_id
+            WHERE l.auction_id = ? AND l.{self.listed_where}
+            ORDER BY i.lot_id, i.is_primary DESC, i.display_order, i.id
+        ''', (auction_id,)):
+            images.setdefault(lot_id, []).append({"image_url": image_url, "thumbnail_url": thumbnail_url})
+        for lot in lots:
+            lot["is_framed"] = bool(lot["is_framed"]) if lot["is_framed"] is not None else None
+            lot["images"] = images.get(lot["id"], [])
+        facets = {"category": {}, "estimate_band": {}}
+        for category, band, count in conn.execute(f'''
+            SELECT l.category, {self.estimate_band_sql}, COUNT(*) FROM lots l
+            WHERE l.auction_id = ? AND l.{self.listed_where}
+            GROUP BY 1, 2
+        ''', (auction_id,)):
+            facets["category"][category] = facets["category"].get(category, 0) + count
+            facets["estimate_band"][band] = facets["estimate_band"].get(band, 0) + count
+        return {"auction": dict(auction), "lots": lots, "facets": facets}
+
+    def _write(self, name, body):
+        """Write body unless the file already holds it. Returns True if it changed."""
+        path = self.path(name)
+        try:
+            if path.read_bytes() == body:
+                return False
+        except FileNotFoundError:
+            pass
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_bytes(body)
+        os.replace(tmp, path)
+        return True
+
+    def _remove(self, name):
+        try:
+            self.path(name).unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+    def rebuild(self):
+        """Rebuild the snapshots of every marked auction. Returns the number of files changed.
+        Returns None without doing anything if another worker is already rebuilding."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / ".lock", "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None
+            conn = connect_readonly(self.db_path, attach=self.attach)
+            try:
+                conn.execute("BEGIN")  # one snapshot for the marks and the documents built from them
+                dirty = conn.execute("SELECT auction_id, seq FROM catalogue_dirty").fetchall()
+                documents = {auction_id: self.document(conn, auction_id) for auction_id, _ in dirty}
+                entries = None
+                if dirty:
+                    entries = [dict(row) for row in conn.execute(f'''
+                        SELECT a.id, a.title, a.auction_date, a.location, a.status, COUNT(*) AS lots
+                        FROM auctions a JOIN lots l ON l.auction_id = a.id AND l.{self.listed_where}
+                        GROUP BY a.id ORDER BY a.auction_date, a.id
+                    ''')]
+                conn.commit()
+            finally:
+                conn.close()
+
+            changed = 0
+            for auction_id, document in documents.items():
+                if document is None:
+                    if self._remove(auction_id):
+                        changed += 1
+                        self.removed += 1
+                elif self._write(auction_id, encode(document)):
+                    changed += 1
+                    self.builds += 1
+                else:
+                    self.unchanged += 1
+            if entries is not None:
+                changed += self._write(INDEX_NAME, encode({"auctions": entries}))
+            if dirty:
+                marks = [tuple(row) for row in dirty]
+                self.writer.run(lambda write_conn: write_conn.executemany(
+                    "DELETE FROM catalogue_dirty WHERE auction_id = ? AND seq = ?", marks))
+            return changed
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="catalogue-snapshots", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self._thread = None
+
+    def _loop(self):
+        conn = connect_readonly(self.db_path)
+        try:
+            data_version = None
+            while True:
+                current = conn.execute("PRAGMA data_version").fetchone()[0]
+                # Writes arriving within one poll are rebuilt together.
+                if current != data_version and conn.execute("SELECT 1 FROM catalogue_dirty LIMIT 1").fetchone():
+                    try:
+                        if self.rebuild() is not None:
+                            current = None  # our own DELETE of the marks; look again next time
+                        self.last_error = None
+                    except Exception as e:
+                        self.last_error = str(e)
+                        log.exception("Catalogue snapshot rebuild failed")
+                data_version = current
+                if self._stop.wait(self.poll_s):
+                    break
+        finally:
+            conn.close()
+
+    def stats(self):
+        return {
+            "directory": str(self.directory),
+            "snapshots": sum(1 for path in self.directory.glob("*.json")) if self.directory.is_dir() else 0,
+            "builds": self.builds,
+            "unchanged": self.unchanged,
+            "removed": self.removed,
+            "last_error": self.last_error,
+        }
+
+
+class SnapshotFiles:
+    """ASGI app serving <directory>/<name>.json. Bodies and ETags are kept in memory and
+    re-read only when the file's mtime or size changes, so a request costs one stat().
+    Both run on a worker thread, never on the event loop."""
+
+    def __init__(self, directory, max_age_s=60):
+        self.directory = Path(directory)
+        self.max_age_s = max_age_s
+        self._cache = {}  # name -> (mtime_ns, size, body, etag)
+
+    def load(self, name):
+        path = self.directory / f"{name}.json"
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            self._cache.pop(name, None)
+            return None
+        cached = self._cache.get(name)
+        if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached
+        body = path.read_bytes()
+        cached = self._cache[name] = (stat.st_mtime_ns, stat.st_size, body, etag_for(body))
+        return cached
+
+    async def __call__(self, scope, receive, send):
+        name = scope["path"].rsplit("/", 1)[-1].removesuffix(".json")
+        if scope["method"] not in ("GET", "HEAD"):
+            response = JSONResponse({"detail": "Method Not Allowed"}, status_code=405)
+        elif not (name == INDEX_NAME or name.isdigit()):
+            response = JSONResponse({"detail": "Catalogue snapshot not found"}, status_code=404)
+        elif (entry := await run_in_threadpool(self.load, name)) is None:
+            response = JSONResponse({"detail": "Catalogue snapshot not found"}, status_code=404)
+        else:
+            _, _, body, etag = entry
+            headers = {"ETag": etag, "Cache-Control": f"public, max-age={self.max_age_s}"}
+            if etag in Headers(scope=scope).get("if-none-match", ""):
+                response = Response(status_code=304, headers=headers)
+            else:
+                response = Response(body, media_type="application/json", headers=headers)
+        await response(scope, receive, send)
@@ -0,0 +1,240 @@
+"""Upload garbage collection and storage usage accounting.
+
+A scan walks the upload, rendition and catalogue directories once, attributes
+every file to its lot and auction through lot_images, and flags as orphaned:
+- originals and thumbnails no lot_images row points to,
+- renditions of images that no longer exist,
+- catalogue PDFs of deleted auctions or older than catalogue_max_age_s
+  (they are regenerated on every request).
+lot_images rows whose lot has been deleted count as unreferenced: SQLite
+only cascades deletes with foreign_keys on, which the API does not enable.
+
+Files younger than grace_s are never collected, because an upload writes its
+file before the row that references it. Deletions run in batches with a pause
+in between, so a large reclaim does not saturate the disk.
+"""
+import heapq
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from api.database import connect_readonly
+
+log = logging.getLogger(__name__)
+
+TOP_LOTS = 50
+
+
+def _files(directory):
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False) and not entry.name.startswith("."):
+                    yield entry
+    except FileNotFoundError:
+        return
+
+
+class StorageCollector:
+    def __init__(self, db_path, attach, upload_root, catalogue_dir, rendition_cache, writer,
+                 batch_size=200, pause_s=0.05, grace_s=3600, catalogue_max_age_s=30 * 86400):
+        self.db_path = db_path
+        self.attach = attach
+        self.upload_root = Path(upload_root)
+        self.catalogue_dir = Path(catalogue_dir)
+        self.rendition_cache = rendition_cache
+        self.writer = writer
+        self.batch_size = batch_size
+        self.pause_s = pause_s
+        self.grace_s = grace_s
+        self.catalogue_max_age_s = catalogue_max_age_s
+        self.last_report = None
+        self.last_collection = None
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _references(self):
+        """Owners (lot id, auction id) by upload path and by image id, dangling image ids, and every auction id."""
+        conn = connect_readonly(self.db_path, self.attach)
+        try:
+            rows = conn.execute('''
+                SELECT li.id, li.lot_id, li.image_url, li.thumbnail_url,
+                       COALESCE(l.id, al.id) AS live_lot, COALESCE(l.auction_id, al.auction_id) AS auction_id
+                FROM lot_images li
+                LEFT JOIN lots l ON l.id = li.lot_id
+                LEFT JOIN archive.lots al ON al.id = li.lot_id
+            ''').fetchall()
+            auctions = {row[0] for row in conn.execute("SELECT id FROM auctions UNION ALL SELECT id FROM archive.auctions")}
+        finally:
+            conn.close()
+
+        paths, images, dangling = {}, {}, []
+        for image_id, lot_id, image_url, thumbnail_url, live_lot, auction_id in rows:
+            if live_lot is None:
+                dangling.append(image_id)
+                continue
+            images[image_id] = (lot_id, auction_id)
+            for url in (image_url, thumbnail_url):
+                if url:
+                    paths[url.lstrip("/")] = (lot_id, auction_id)
+        return paths, images, dangling, auctions
+
+    def scan(self):
+        """Measure usage and list orphans without deleting anything."""
+        start = time.perf_counter()
+        paths, images, dangling, auctions = self._references()
+        now = time.time()
+        totals = {kind: {"files": 0, "bytes": 0} for kind in ("originals", "thumbnails", "renditions", "catalogues", "orphaned")}
+        per_lot, per_auction = {}, {}
+        orphans = {"uploads": [], "renditions": [], "catalogues": []}
+
+        def account(kind, size, lot_id=None, auction_id=None):
+            totals[kind]["files"] += 1
+            totals[kind]["bytes"] += size
+            if lot_id is not None:
+                files, total = per_lot.get(lot_id, (0, 0))
+                per_lot[lot_id] = (files + 1, total + size)
+            if auction_id is not None:
+                per_auction[auction_id] = per_auction.get(auction_id, 0) + size
+
+        lots_dir = self.upload_root / "uploads" / "lots"
+        for kind, directory in (("originals", lots_dir), ("thumbnails", lots_dir / "thumbnails")):
+            prefix = directory.relative_to(self.upload_root).as_posix()
+            for entry in _files(directory):
+                stat = entry.stat()
+                owner = paths.get(f"{prefix}/{entry.name}")
+                if owner:
+                    account(kind, stat.st_size, *owner)
+                else:
+                    account("orphaned", stat.st_size)
+                    if now - stat.st_mtime > self.grace_s:
+                        orphans["uploads"].append((Path(entry.path), stat.st_size))
+
+        for entry in _files(self.rendition_cache.directory):
+            stat = entry.stat()
+            image_id = entry.name.split("-", 1)[0]
+            owner = images.get(int(image_id)) if image_id.isdigit() else None
+            if owner:
+                account("renditions", stat.st_size, *owner)
+            else:
+                account("orphaned", stat.st_size)
+                orphans["renditions"].append((entry.name, stat.st_size))
+
+        for entry in _files(self.catalogue_dir):
+            stat = entry.stat()
+            stem = Path(entry.name).stem
+            auction_id = stem.rsplit("_", 1)[-1]
+            auction_id = int(auction_id) if auction_id.isdigit() else None
+            if auction_id in auctions:
+                account("catalogues", stat.st_size, auction_id=auction_id)
+                if now - stat.st_mtime > self.catalogue_max_age_s:
+                    orphans["catalogues"].append((Path(entry.path), stat.st_size))
+            else:
+                account("orphaned", stat.st_size)
+                if now - stat.st_mtime > self.grace_s:
+                    orphans["catalogues"].append((Path(entry.path), stat.st_size))
+
+        top_lots = heapq.nlargest(TOP_LOTS, per_lot.items(), key=lambda item: item[1][1])
+        report = {
+            "scanned_at": datetime.now(timezone.utc).isoformat(),
+            "scan_ms": round((time.perf_counter() - start) * 1000, 1),
+            "total_bytes": sum(kind["bytes"] for kind in totals.values()),
+            "totals": totals,
+            "reclaimable": {kind: {"files": len(items), "bytes": sum(size for _, size in items)}
+                            for kind, items in orphans.items()},
+            "dangling_image_rows": len(dangling),
+            "lots_with_files": len(per_lot),
+            "top_lots": [{"lot_id": lot_id, "files": files, "bytes": size} for lot_id, (files, size) in top_lots],
+            "auctions": [{"auction_id": auction_id, "bytes": size}
+                         for auction_id, size in sorted(per_auction.items(), key=lambda item: -item[1])],
+        }
+        self.last_report = report
+        return report, orphans, dangling
+
+    def collect(self, dry_run=False):
+        """Scan, then delete orphans in throttled batches. Returns what was (or would be) reclaimed."""
+        with self._run_lock:
+            report, orphans, dangling = self.scan()
+            result = {"dry_run": dry_run, "files": 0, "bytes": 0, "dangling_image_rows": len(dangling)}
+            if dry_run:
+                result.update(files=sum(r["files"] for r in report["reclaimable"].values()),
+                              bytes=sum(r["bytes"] for r in report["reclaimable"].values()))
+                return result
+
+            for start in range(0, len(dangling), 500):
+                batch = dangling[start:start + 500]
+                self.writer.run(lambda conn: conn.execute(
+                    f"DELETE FROM lot_images WHERE id IN ({','.join('?' * len(batch))})", batch
+                ))
+
+            for batch in self._batches(orphans["renditions"]):
+                names = [name for name, _ in batch]
+                result["bytes"] += self.rendition_cache.discard(names)
+                result["files"] += len(names)
+
+            for batch in self._batches(orphans["uploads"] + orphans["catalogues"]):
+                for path, size in batch:
+                    try:
+                        path.unlink()
+                    except FileNotFoundError:
+                        continue
+                    result["files"] += 1
+                    result["bytes"] += size
+
+            result["finished_at"] = datetime.now(timezone.utc).isoformat()
+            self.last_collection = result
+            return result
+
+    def _batches(self, items):
+        for start in range(0, len(items), self.batch_size):
+            if start:
+                self._stop.wait(self.pause_s)
+            yield items[start:start + self.batch_size]
+
+    def usage_for_lot(self, lot_id):
+        conn = connect_readonly(self.db_path, self.attach)
+        try:
+            rows = conn.execute("SELECT id, image_url, thumbnail_url FROM lot_images WHERE lot_id = ?", (lot_id,)).fetchall()
+        finally:
+            conn.close()
+        files, total, seen = [], 0, set()
+        for image_id, *urls in rows:
+            for url in urls:
+                if not url or url in seen:
+                    continue
+                seen.add(url)
+                path = self.upload_root / url.lstrip("/")
+                if path.is_file():
+                    size = path.stat().st_size
+                    files.append({"path": url, "bytes": size})
+                    total += size
+            for entry in _files(self.rendition_cache.directory):
+                if entry.name.startswith(f"{image_id}-"):
+                    size = entry.stat().st_size
+                    files.append({"path": f"rendition:{entry.name}", "bytes": size})
+                    total += size
+        return {"lot_id": lot_id, "bytes": total, "files": files}
+
+    def start(self, interval_s):
+        if interval_s <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, args=(interval_s,), name="storage-gc", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self._thread = None
+
+    def _loop(self, interval_s):
+        while not self._stop.wait(interval_s):
+            try:
+                self.collect()
+            except Exception:
+                log.exception("Storage collection failed")
@@ -628,7 +628,7 @@ export default function LotsPage() {
                                 <div className="space-y-4">
                                 <Select value={assignAuctionId} onValueChange={setAssignAuctionId}>
                                     <SelectTrigger><SelectValue placeholder="Select auction..." /></SelectTrigger>
-                                    <SelectContent>{auctions.filter((a) => a.status === "Upcoming").map((auction) => (<SelectItem key={auction.id} value={String(auction.id)}>{auction.title}</SelectItem>))}</SelectContent>
+                                    <SelectContent>{auctions.filter((a) => a.status === "Upcoming" || a.status === "Live").map((auction) => (<SelectItem key={auction.id} value={String(auction.id)}>{auction.title}</SelectItem>))}</SelectContent>
                                 </Select>
                                 <Button onClick={handleAssignAuction} className="w-full">Assign</Button>
                                 </div>
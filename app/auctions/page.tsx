@@ -20,7 +20,7 @@ export default function AuctionsPage() {
   }, [])
 
   const loadAuctions = async () => {
-    const upcoming = await api.getAuctions({ status: "Upcoming" })
+    const upcoming = await api.getAuctions({ status: "Upcoming,Live" })
     const completed = await api.getAuctions({ status: "Completed" })
 
     setUpcomingAuctions(upcoming)
@@ -66,7 +66,7 @@ export default function AuctionsPage() {
                   <CardHeader>
                     <div className="flex items-start justify-between mb-2">
                       <Badge>{auction.auction_type}</Badge>
-                      <Badge variant="outline">Upcoming</Badge>
+                      <Badge variant={auction.status === "Live" ? "default" : "outline"}>{auction.status}</Badge>
                     </div>
                     <CardTitle className="text-xl font-serif">{auction.title}</CardTitle>
                     {auction.theme && <p className="text-sm text-muted-foreground mt-2">{auction.theme}</p>}
@@ -7,24 +7,41 @@ import { Button } from "@/components/ui/button"
 import { Badge } from "@/components/ui/badge"
 import { Calendar, MapPin, Ruler, Frame, ArrowLeft, Weight, Palette, Image as ImageIcon, Box } from "lucide-react"
 import Link from "next/link"
-import { useParams, notFound } from "next/navigation"
+import { useParams, useSearchParams, notFound } from "next/navigation"
 
 export default function LotDetailPage() {
   const params = useParams()
+  const auctionId = useSearchParams().get("auction")
   const [lot, setLot] = useState<Lot | null>(null)
   const [selectedImage, setSelectedImage] = useState(0)
   const [loading, setLoading] = useState(true)
 
   useEffect(() => {
     if (params.id) {
-      api.getLot(Number(params.id))
+      // Listed lots come from the auction's static catalogue snapshot; anything else falls back to the API.
+      const fromSnapshot = auctionId
+        ? api.getCatalogueSnapshot(Number(auctionId)).then(({ auction, lots }) => {
+            const found = lots.find((l) => l.id === Number(params.id))
+            if (!found) throw new Error("Lot not in catalogue")
+            return {
+              ...found,
+              auction_title: auction.title,
+              auction_type: auction.auction_type,
+              location: auction.location,
+              auction_date: auction.auction_date,
+              start_time: auction.start_time,
+            } as Lot
+          })
+        : Promise.reject(new Error("No auction"))
+      fromSnapshot
+         .catch(() => api.getLot(Number(params.id)))
          .then((data) => {
              setLot(data)
              setLoading(false)
          })
          .catch(() => setLoading(false))
     }
-  }, [params.id])
+  }, [params.id, auctionId])
 
   if (loading) {
     return (
@@ -125,7 +125,10 @@ export default function CataloguePage() {
         ) : (
           <div className="grid gap-6 md:grid-cols-2 lg:grid-cols-3">
             {lots.map((lot) => (
-              <Link key={lot.id} href={`/catalogue/${lot.id}`}>
+              <Link
+                key={lot.id}
+                href={lot.auction_id ? `/catalogue/${lot.id}?auction=${lot.auction_id}` : `/catalogue/${lot.id}`}
+              >
                 <Card className="group overflow-hidden hover:shadow-lg transition-shadow">
                   <div className="aspect-square bg-muted relative overflow-hidden">
                     {lot.images?.[0] ? (
@@ -1,7 +1,7 @@
 "use client"
 
 import { useEffect, useState } from "react"
-import { api, type Lot } from "@/lib/api"
+import { api, type Portfolio } from "@/lib/api"
 import { PublicHeader } from "@/components/public-header"
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from "@/components/ui/card"
 import { Badge } from "@/components/ui/badge"
@@ -10,7 +10,7 @@ import { AlertCircle, Package, TrendingUp, Clock, Calendar } from "lucide-react"
 import { Alert, AlertDescription, AlertTitle } from "@/components/ui/alert"
 
 export default function ClientPortalPage() {
-  const [lots, setLots] = useState<Lot[]>([])
+  const [portfolio, setPortfolio] = useState<Portfolio | null>(null)
   const [loading, setLoading] = useState(true)
 
   // Mock client ID, in production, this would come from authentication
@@ -18,18 +18,20 @@ export default function ClientPortalPage() {
 
   useEffect(() => {
     api
-      .getClientLots(mockClientId)
-      .then(setLots)
+      .getClientPortfolio(mockClientId)
+      .then(setPortfolio)
       .finally(() => setLoading(false))
   }, [])
 
+  // Totals come from the server; only the lot list is flattened here.
+  const groups = portfolio?.groups ?? []
+  const lots = groups.flatMap((group) => group.lots)
+  const countOf = (status: string) => groups.find((group) => group.status === status)?.totals.lots ?? 0
   const stats = {
-    total: lots.length,
-    listed: lots.filter((l) => l.status === "Listed").length,
-    pending: lots.filter((l) => l.status === "Pending").length,
-    sold: lots.filter((l) => l.status === "Sold").length,
-    withdrawn: lots.filter((l) => l.status === "Withdrawn").length,
-    totalEstimate: lots.reduce((sum, lot) => sum + lot.estimate_high, 0),
+    total: portfolio?.totals.lots ?? 0,
+    listed: countOf("Listed"),
+    sold: countOf("Sold"),
+    totalEstimate: portfolio?.totals.estimate_high ?? 0,
   }
 
   const withdrawnWithFees = lots.filter((l) => l.status === "Withdrawn" && l.withdrawal_fee > 0)
@@ -122,9 +124,9 @@ export default function ClientPortalPage() {
                     className="flex flex-col md:flex-row gap-4 p-4 border border-border rounded-sm hover:bg-muted/50 transition-colors"
                   >
                     <div className="w-full md:w-32 h-32 bg-muted rounded-sm overflow-hidden flex-shrink-0">
-                      {lot.images?.[0]?.image_url ? (
+                      {lot.image?.image_url ? (
                         <img
-                          src={lot.images[0].image_url || "/placeholder.svg"}
+                          src={lot.image.thumbnail_url || lot.image.image_url}
                           alt={lot.title}
                           className="w-full h-full object-cover"
                         />
@@ -0,0 +1,219 @@
+"""End-to-end API benchmark.
+
+Seeds a database per scale, drives the FastAPI app in-process with concurrent
+clients and writes throughput and latency percentiles per endpoint as JSON.
+
+    python benchmarks/api_bench.py run --scales 1k,100k --out bench.json
+    python benchmarks/api_bench.py run --scales 1k --baseline bench.json
+    python benchmarks/api_bench.py compare bench.json new.json --tolerance 0.15
+
+App settings such as FOTHERBYS_GROUP_COMMIT_MS are read from the environment.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from scripts.generate_load_data import generate, STAFF_EMAIL
+
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+DATA_DIR = ROOT / "benchmarks" / ".data"
+BENCH_PASSWORD = "bench123"
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def build_scenarios(db_path):
+    """Endpoint name -> callable(rng) returning (method, path, params[, json body])."""
+    conn = sqlite3.connect(db_path)
+    n_lots = conn.execute("SELECT MAX(id) FROM lots").fetchone()[0]
+    n_auctions = conn.execute("SELECT MAX(id) FROM auctions").fetchone()[0]
+    sellers = [r[0] for r in conn.execute("SELECT DISTINCT seller_id FROM lots LIMIT 1000")]
+    artists = [r[0] for r in conn.execute("SELECT DISTINCT artist FROM lots LIMIT 1000")]
+    categories = [r[0] for r in conn.execute("SELECT DISTINCT category FROM lots")]
+    conn.close()
+
+    return {
+        "get_lot": lambda rng: ("GET", f"/api/lots/{rng.randint(1, n_lots)}", {}),
+        "get_lots_by_auction": lambda rng: ("GET", "/api/lots", {"auction_id": rng.randint(1, n_auctions)}),
+        "get_lots_by_artist": lambda rng: ("GET", "/api/lots", {"artist": rng.choice(artists), "auction_id": rng.randint(1, n_auctions)}),
+        "get_client_lots": lambda rng: ("GET", f"/api/clients/{rng.choice(sellers)}/lots", {}),
+        "get_client_portfolio": lambda rng: ("GET", f"/api/clients/{rng.choice(sellers)}/portfolio", {}),
+        "search_catalogue": lambda rng: ("GET", "/api/catalogue/search", {"q": rng.choice(artists), "category": rng.choice(categories)}),
+        "get_auctions": lambda rng: ("GET", "/api/auctions", {}),
+        "get_categories": lambda rng: ("GET", "/api/categories", {}),
+        "update_lot": lambda rng: ("PUT", f"/api/lots/{rng.randint(1, n_lots)}", {},
+                                   {"estimate_high": rng.randint(10, 900) * 1000}),
+    }
+
+
+async def drive(client, scenario, requests, concurrency, headers, seed):
+    latencies, errors = [], 0
+    counter = iter(range(requests))
+
+    async def worker(worker_id):
+        nonlocal errors
+        rng = random.Random(seed * 1000 + worker_id)
+        for _ in counter:
+            method, path, params, *body = scenario(rng)
+            start = time.perf_counter()
+            response = await client.request(method, path, params=params, headers=headers, json=body[0] if body else None)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else None,
+        "p50_ms": round(percentile(latencies, 50), 3) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95), 3) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99), 3) if latencies else None,
+    }
+
+
+async def bench_scale(db_path, requests, concurrency, endpoints, seed):
+    import httpx
+
+    os.environ["FOTHERBYS_DB"] = str(db_path)
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    os.environ.setdefault("FOTHERBYS_ADMISSION_CONTROL", "0")  # one client, far over the per-client limits
+    os.environ.setdefault("FOTHERBYS_CATALOGUE_SNAPSHOTS", "0")  # no background rebuilds during timing
+    sys.modules.pop("api.main", None)
+    main = importlib.import_module("api.main")
+
+    await main.app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            token = (await client.post("/api/auth/token", data={"username": STAFF_EMAIL, "password": BENCH_PASSWORD})).json()
+            headers = {"Authorization": f"Bearer {token['access_token']}"}
+
+            results = {}
+            for name, scenario in build_scenarios(db_path).items():
+                if endpoints and name not in endpoints:
+                    continue
+                results[name] = await drive(client, scenario, requests, concurrency, headers, seed)
+                print(f"  {name:<22} {results[name]['throughput_rps']:>9} req/s  "
+                      f"p50 {results[name]['p50_ms']:>9} ms  p95 {results[name]['p95_ms']:>9} ms  "
+                      f"p99 {results[name]['p99_ms']:>9} ms  errors {results[name]['errors']}")
+            return results
+    finally:
+        await main.app.router.shutdown()
+
+
+def compare(baseline, current, tolerance):
+    """Return a list of regression descriptions (p95 up or throughput down by more than tolerance)."""
+    regressions = []
+    for scale, endpoints in current["results"].items():
+        for name, stats in endpoints.items():
+            base = baseline.get("results", {}).get(scale, {}).get(name)
+            if not base:
+                continue
+            if base["p95_ms"] and stats["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{scale}/{name}: p95 {base['p95_ms']} ms -> {stats['p95_ms']} ms")
+            if base["throughput_rps"] and stats["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+                regressions.append(f"{scale}/{name}: throughput {base['throughput_rps']} -> {stats['throughput_rps']} req/s")
+    return regressions
+
+
+def report_regressions(regressions):
+    if regressions:
+        print("\nRegressions:")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+    print("\nNo regressions against baseline.")
+    return 0
+
+
+def run(args):
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    endpoints = set(args.endpoints.split(",")) if args.endpoints else None
+    output = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+        },
+        "results": {},
+    }
+
+    for scale in args.scales.split(","):
+        db_path = DATA_DIR / f"bench_{scale}.db"
+        if args.reseed or not db_path.exists():
+            print(f"Seeding {scale} database...")
+            start = time.perf_counter()
+            counts = generate(str(db_path), SCALES[scale], password=BENCH_PASSWORD, seed=args.seed)
+            print(f"  {counts} in {time.perf_counter() - start:.1f}s")
+        print(f"Benchmarking {scale}...")
+        output["results"][scale] = asyncio.run(bench_scale(db_path, args.requests, args.concurrency, endpoints, args.seed))
+
+    with open(args.out, "w") as f:
+        json.dump(output, f, indent=2)
+    print(f"\nResults written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            return report_regressions(compare(json.load(f), output, args.tolerance))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fotherby's API benchmark suite")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="Seed databases and benchmark the API")
+    run_parser.add_argument("--scales", default="1k", help=f"Comma separated scales from {', '.join(SCALES)}")
+    run_parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint")
+    run_parser.add_argument("--concurrency", type=int, default=8)
+    run_parser.add_argument("--endpoints", help="Comma separated subset of endpoints")
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--reseed", action="store_true", help="Rebuild databases even if present")
+    run_parser.add_argument("--out", default="bench_results.json")
+    run_parser.add_argument("--baseline", help="Compare against a saved results file")
+    run_parser.add_argument("--tolerance", type=float, default=0.15)
+
+    compare_parser = sub.add_parser("compare", help="Compare two results files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--tolerance", type=float, default=0.15)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        return run(args)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    return report_regressions(compare(baseline, current, args.tolerance))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""Latency and recall of typo-tolerant artist suggestions.
+
+Indexes N distinct synthetic artist names, then looks up misspelled variants
+(one or two edits) of randomly chosen names, as the UI would on each keystroke.
+
+    python benchmarks/artist_suggest_bench.py --artists 50000 --queries 500
+"""
+import argparse
+import os
+import random
+import sqlite3
+import string
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from api import artist_search
+from scripts.setup_database import init_database
+
+SYLLABLES = ["ba", "ro", "ki", "ne", "lu", "ma", "sch", "ter", "ou", "vi", "an", "del", "ric", "hock", "ney",
+             "qui", "at", "gor", "ley", "ber", "son", "wen", "tz", "ko", "ska", "li", "mon", "et", "ar", "dt"]
+
+
+def make_name(rng):
+    first = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+    last = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+    return f"{first} {last}"
+
+
+def misspell(rng, name):
+    chars = list(name)
+    for _ in range(rng.choice([1, 1, 2])):
+        i = rng.randrange(1, len(chars) - 1)
+        edit = rng.choice(["delete", "replace", "swap", "insert"])
+        if edit == "delete":
+            del chars[i]
+        elif edit == "replace":
+            chars[i] = rng.choice(string.ascii_lowercase)
+        elif edit == "swap":
+            chars[i], chars[i + 1] = chars[i + 1], chars[i]
+        else:
+            chars.insert(i, rng.choice(string.ascii_lowercase))
+    return "".join(chars)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--artists", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    names = set()
+    while len(names) < args.artists:
+        names.add(make_name(rng))
+    names = sorted(names)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "artists.db")
+        init_database(db_path, seed=False)
+        conn = sqlite3.connect(db_path)
+        conn.executemany('''
+            INSERT INTO lots (lot_reference, artist, title, estimate_low, estimate_high, reserve_price, triage_status)
+            VALUES (?, ?, 'Untitled', 1000, 2000, 1000, 'Online')
+        ''', ((f"A-{i}", name) for i, name in enumerate(names)))
+        artist_search.ensure_schema(conn)
+
+        start = time.perf_counter()
+        artist_search.rebuild(conn)
+        conn.commit()
+        print(f"Indexed {len(names):,} artists in {time.perf_counter() - start:.1f}s")
+
+        latencies, hits = [], 0
+        for _ in range(args.queries):
+            target = rng.choice(names)
+            query = misspell(rng, target)
+            start = time.perf_counter()
+            results = artist_search.suggest(conn, query, limit=10)
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += any(r["artist"] == target for r in results)
+        conn.close()
+
+    latencies.sort()
+    print(f"{args.queries} misspelled lookups")
+    print(f"  p50 {latencies[len(latencies) // 2]:.2f} ms  p95 {latencies[int(len(latencies) * 0.95)]:.2f} ms  "
+          f"max {latencies[-1]:.2f} ms")
+    print(f"  target in top 10: {hits / args.queries:.1%}")
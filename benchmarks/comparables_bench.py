@@ -0,0 +1,88 @@
+"""Comparable-sales index: load time, query latency and range coverage.
+
+Loads every Sold lot into the index, values random lots one at a time and as
+one batch, then checks how often a sold lot's own hammer price falls inside
+the range suggested by its comparables (itself excluded).
+
+    python benchmarks/comparables_bench.py --scale 100k --queries 500
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from scripts.generate_load_data import generate
+
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+DATA_DIR = ROOT / "benchmarks" / ".data"
+FEATURES = "id, artist, category, medium, height, width, depth"
+
+
+def pct(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", default="100k", choices=SCALES)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    db_path = DATA_DIR / f"bench_{args.scale}.db"
+    if not db_path.exists():
+        print(f"Seeding {args.scale} database...")
+        generate(str(db_path), SCALES[args.scale], password="bench123", seed=args.seed)
+
+    os.environ["FOTHERBYS_DB"] = str(db_path)
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    from api import main as api
+    from api.comparables import ComparablesIndex
+    from api.database import connect_readonly
+
+    api.startup_event()  # migrations and the archive database
+    api.shutdown_event()
+    conn = connect_readonly(api.DB_PATH, attach={api.archive.SCHEMA: api.ARCHIVE_DB_PATH})
+    rng = random.Random(args.seed)
+
+    index = ComparablesIndex()
+    start = time.perf_counter()
+    index.ensure_loaded(conn)
+    print(f"Loaded {len(index):,} sold lots in {time.perf_counter() - start:.2f}s")
+
+    intake = [dict(row) for row in conn.execute(f"SELECT {FEATURES} FROM lots WHERE status != 'Sold'").fetchall()]
+    intake = rng.sample(intake, min(args.queries, len(intake)))
+    latencies = []
+    for lot in intake:
+        start = time.perf_counter()
+        index.query(**{key: lot[key] for key in FEATURES.split(", ")[1:]}, k=args.k)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    print(f"Single valuations: p50 {pct(latencies, 50):.2f} ms  p95 {pct(latencies, 95):.2f} ms  "
+          f"max {latencies[-1]:.2f} ms")
+
+    start = time.perf_counter()
+    for lot in intake:
+        index.query(**{key: lot[key] for key in FEATURES.split(", ")[1:]}, k=args.k)
+    elapsed = time.perf_counter() - start
+    print(f"Batch of {len(intake)}: {elapsed * 1000:.0f} ms ({len(intake) / elapsed:,.0f} lots/s)")
+
+    sold = [dict(row) for row in conn.execute(f"SELECT {FEATURES}, sold_price FROM lots WHERE status = 'Sold'").fetchall()]
+    sold = rng.sample(sold, min(args.queries, len(sold)))
+    inside, errors = 0, []
+    for lot in sold:
+        result = index.query(**{key: lot[key] for key in FEATURES.split(", ")[1:]}, k=args.k, exclude_id=lot["id"])
+        estimate = result["suggested_estimate"]
+        if estimate:
+            inside += estimate["low"] <= lot["sold_price"] <= estimate["high"]
+            errors.append(abs(estimate["median"] - lot["sold_price"]) / lot["sold_price"])
+    errors.sort()
+    print(f"Held-out sold lots: {inside / len(sold):.1%} inside the suggested range, "
+          f"median error of the midpoint {pct(errors, 50):.1%}")
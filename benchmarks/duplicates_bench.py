@@ -0,0 +1,49 @@
+"""Near-duplicate image search: multi-index hash against a linear scan.
+
+Fills the index with random 64-bit hashes, then searches for copies of some
+of them with a few bits flipped (a re-photographed work) at several radii.
+Checks that both methods return the same distances and reports the latency
+and the number of candidates the index compared.
+
+    python benchmarks/duplicates_bench.py --images 100000 --queries 200
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from api.duplicates import MultiIndexHash, distance
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--flipped", type=int, default=6, help="Bits changed between a work and its copy")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    hashes = [rng.getrandbits(64) for _ in range(args.images)]
+    start = time.perf_counter()
+    index = MultiIndexHash()
+    for image_id, value in enumerate(hashes):
+        index.add(value, image_id)
+    print(f"Indexed {args.images:,} hashes in {time.perf_counter() - start:.2f}s")
+
+    queries = [value ^ sum(1 << bit for bit in rng.sample(range(64), args.flipped))
+               for value in rng.sample(hashes, args.queries)]
+    for radius in (4, 8, 12):
+        index.candidates = 0
+        start = time.perf_counter()
+        found = [[d for d, _ in index.search(query, radius)] for query in queries]
+        indexed_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        start = time.perf_counter()
+        scanned = [sorted(d for d in (distance(value, query) for value in hashes) if d <= radius) for query in queries]
+        linear_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        assert found == scanned, f"index and scan disagree at radius {radius}"
+        print(f"radius {radius:>2}: index {indexed_ms:6.2f} ms ({index.candidates / len(queries):,.0f} candidates), "
+              f"linear scan {linear_ms:6.2f} ms, {sum(map(len, found)) / len(queries):.2f} matches per query")
@@ -0,0 +1,119 @@
+"""Event-loop lag while a large catalogue query runs.
+
+A heartbeat task sleeps in short ticks on the event loop and records how late
+each tick wakes up. Meanwhile clients hit authenticated endpoints (whose
+async auth dependency queries the database) and the unfiltered catalogue
+search. If any of that SQLite work ran on the loop, the heartbeat would stall
+for the length of the query. The client shares the loop with the app, and the
+catalogue handler still holds the GIL while it builds rows, so some lag
+remains; the threshold is on p99.
+
+    python benchmarks/event_loop_lag_bench.py --scale 100k --max-lag-ms 50
+"""
+import argparse
+import asyncio
+import importlib
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from scripts.generate_load_data import generate, STAFF_EMAIL
+
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+DATA_DIR = ROOT / "benchmarks" / ".data"
+BENCH_PASSWORD = "bench123"
+TICK_S = 0.005
+
+
+async def heartbeat(stop, lags):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK_S)
+        lags.append(max(0.0, (time.perf_counter() - start - TICK_S) * 1000))
+
+
+async def bench(db_path, auth_clients, catalogue_queries):
+    import httpx
+
+    os.environ["FOTHERBYS_DB"] = str(db_path)
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    os.environ.setdefault("FOTHERBYS_ADMISSION_CONTROL", "0")  # one client, far over the per-client limits
+    os.environ.setdefault("FOTHERBYS_CATALOGUE_SNAPSHOTS", "0")  # no background rebuilds during timing
+    sys.modules.pop("api.main", None)
+    main = importlib.import_module("api.main")
+
+    await main.app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            token = (await client.post("/api/auth/token", data={"username": STAFF_EMAIL, "password": BENCH_PASSWORD})).json()
+            headers = {"Authorization": f"Bearer {token['access_token']}"}
+
+            stop, lags = asyncio.Event(), []
+            beat = asyncio.create_task(heartbeat(stop, lags))
+            catalogue_ms, auth_requests = [], 0
+
+            async def catalogue():
+                for _ in range(catalogue_queries):
+                    start = time.perf_counter()
+                    response = await client.get("/api/catalogue/search")
+                    response.raise_for_status()
+                    catalogue_ms.append((time.perf_counter() - start) * 1000)
+
+            async def auth(done):
+                nonlocal auth_requests
+                while not done.is_set():
+                    (await client.get("/api/users/me", headers=headers)).raise_for_status()
+                    auth_requests += 1
+
+            done = asyncio.Event()
+            auth_tasks = [asyncio.create_task(auth(done)) for _ in range(auth_clients)]
+            start = time.perf_counter()
+            await catalogue()
+            elapsed = time.perf_counter() - start
+            done.set()
+            await asyncio.gather(*auth_tasks)
+            stop.set()
+            await beat
+    finally:
+        await main.app.router.shutdown()
+
+    lags.sort()
+    return {
+        "catalogue_ms": round(sum(catalogue_ms) / len(catalogue_ms), 1),
+        "auth_rps": round(auth_requests / elapsed, 1),
+        "ticks": len(lags),
+        "lag_p50_ms": round(lags[len(lags) // 2], 3),
+        "lag_p99_ms": round(lags[min(len(lags) - 1, int(len(lags) * 0.99))], 3),
+        "lag_max_ms": round(lags[-1], 3),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", default="100k", choices=SCALES)
+    parser.add_argument("--auth-clients", type=int, default=8)
+    parser.add_argument("--catalogue-queries", type=int, default=3)
+    parser.add_argument("--max-lag-ms", type=float, default=50.0, help="Fail if p99 heartbeat lag exceeds this")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    db_path = DATA_DIR / f"bench_{args.scale}.db"
+    if not db_path.exists():
+        print(f"Seeding {args.scale} database...")
+        generate(str(db_path), SCALES[args.scale], password=BENCH_PASSWORD, seed=args.seed)
+
+    result = asyncio.run(bench(db_path, args.auth_clients, args.catalogue_queries))
+    print(f"Catalogue search (all listed lots): {result['catalogue_ms']} ms per query")
+    print(f"Concurrent /api/users/me: {result['auth_rps']} req/s")
+    print(f"Heartbeat lag over {result['ticks']} ticks: p50 {result['lag_p50_ms']} ms  "
+          f"p99 {result['lag_p99_ms']} ms  max {result['lag_max_ms']} ms")
+    if result["lag_p99_ms"] > args.max_lag_ms:
+        print(f"FAIL: p99 lag above {args.max_lag_ms} ms")
+        sys.exit(1)
+    print(f"OK: p99 lag within {args.max_lag_ms} ms")
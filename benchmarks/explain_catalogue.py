@@ -0,0 +1,71 @@
+"""Check catalogue search query plans.
+
+Runs EXPLAIN QUERY PLAN for every filter/sort combination accepted by the
+catalogue search endpoints and fails if a plan scans the lots table without an
+index or needs a temporary B-tree to sort. Relevance ordering is exempt from
+the sort check when a text query is present: it ranks the matches by a
+computed score.
+
+    python benchmarks/explain_catalogue.py --db benchmarks/.data/bench_100k.db
+"""
+import argparse
+import itertools
+import os
+import sqlite3
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", help="Database to check (defaults to FOTHERBYS_DB / data/fotherbys.db)")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    if args.db:
+        os.environ["FOTHERBYS_DB"] = args.db
+    os.environ.setdefault("SECRET_KEY", "explain")
+
+    from api import main as api
+
+    api.startup_event()  # make sure the catalogue indexes exist
+    api.shutdown_event()
+    conn = sqlite3.connect(str(api.DB_PATH))
+    conn.execute("ANALYZE")
+
+    filter_values = {
+        "location": "London",
+        "auction_type": "Online",
+        "category": "Painting",
+        "min_estimate": 10000,
+        "max_estimate": 50000,
+    }
+    failures = 0
+    checked = 0
+    for size in range(len(filter_values) + 1):
+        for names in itertools.combinations(filter_values, size):
+            filters = {name: filter_values[name] for name in names}
+            for sort in api.CATALOGUE_SORTS:
+                for q in (None, "Hockney"):
+                    query, params = api.catalogue_query("SELECT l.id", filters, sort=sort, q=q, limit=24)
+                    plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + query, params)]
+                    problems = [step for step in plan if step.startswith("SCAN l") and "INDEX" not in step]
+                    if not (sort == "relevance" and q):
+                        problems += [step for step in plan if "TEMP B-TREE" in step]
+                    checked += 1
+                    label = f"sort={sort:<13} q={q or '-':<8} filters={','.join(names) or '-'}"
+                    if problems:
+                        failures += 1
+                        print(f"FAIL {label}\n     " + "\n     ".join(plan))
+                    elif args.verbose:
+                        print(f"ok   {label}\n     " + "\n     ".join(plan))
+
+    conn.close()
+    print(f"{checked - failures}/{checked} catalogue query plans avoid table scans and sort steps")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
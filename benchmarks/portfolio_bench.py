@@ -0,0 +1,113 @@
+"""Seller pages: the client lots endpoint against the one-round-trip portfolio.
+
+Seeds a database, consigns --seller-lots lots to one seller (some archived),
+then times GET /api/clients/{id}/lots and GET /api/clients/{id}/portfolio
+end to end and counts the SQL statements each runs.
+
+    python benchmarks/portfolio_bench.py --seller-lots 10000 --repeat 20
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from scripts.generate_load_data import generate, STAFF_EMAIL
+
+DATA_DIR = ROOT / "benchmarks" / ".data"
+BENCH_PASSWORD = "bench123"
+
+
+def pct(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))]
+
+
+def consign(db_path, seller_lots, seed):
+    """Give the first seller seller_lots lots. Returns the seller's id."""
+    conn = sqlite3.connect(db_path)
+    seller_id = conn.execute("SELECT id FROM clients WHERE client_type = 'Seller' ORDER BY id LIMIT 1").fetchone()[0]
+    ids = [row[0] for row in conn.execute("SELECT id FROM lots")]
+    chosen = random.Random(seed).sample(ids, min(seller_lots, len(ids)))
+    conn.executemany("UPDATE lots SET seller_id = ? WHERE id = ?", ((seller_id, lot_id) for lot_id in chosen))
+    conn.executemany("UPDATE transactions SET seller_id = ? WHERE lot_id = ?", ((seller_id, lot_id) for lot_id in chosen))
+    conn.commit()
+    conn.close()
+    return seller_id
+
+
+def statements(function, db_path, archive_path, **kwargs):
+    from api.database import connect_readonly
+    conn = connect_readonly(db_path, attach={"archive": archive_path})
+    executed = []
+    conn.set_trace_callback(executed.append)
+    function(db=conn, **kwargs)
+    conn.close()
+    return len(executed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lots", type=int, default=50_000)
+    parser.add_argument("--seller-lots", type=int, default=10_000)
+    parser.add_argument("--archived", type=int, default=500, help="Of the seller's lots, how many to archive")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    db_path = DATA_DIR / f"bench_portfolio_{args.lots}_{args.seller_lots}.db"
+    if not db_path.exists():
+        print(f"Seeding {args.lots:,} lots, {args.seller_lots:,} of them for one seller...")
+        generate(str(db_path), args.lots, password=BENCH_PASSWORD, seed=args.seed)
+        consign(str(db_path), args.seller_lots, args.seed)
+
+    os.environ["FOTHERBYS_DB"] = str(db_path)
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    os.environ.setdefault("FOTHERBYS_ADMISSION_CONTROL", "0")
+    from fastapi.testclient import TestClient
+    from api import main as api
+
+    seller_id = sqlite3.connect(db_path).execute(
+        "SELECT seller_id FROM lots GROUP BY seller_id ORDER BY COUNT(*) DESC LIMIT 1").fetchone()[0]
+    staff = {"is_staff": True, "id": 0}
+
+    with TestClient(api.app) as client:
+        token = client.post("/api/auth/token", data={"username": STAFF_EMAIL, "password": BENCH_PASSWORD}).json()
+        headers = {"Authorization": f"Bearer {token['access_token']}"}
+
+        def count(path):
+            return sqlite3.connect(path).execute("SELECT COUNT(*) FROM lots WHERE seller_id = ?", (seller_id,)).fetchone()[0]
+
+        archived = count(api.ARCHIVE_DB_PATH)
+        if archived < args.archived:
+            candidates = sqlite3.connect(db_path).execute(
+                "SELECT id FROM lots WHERE seller_id = ? AND status = 'Sold' LIMIT ?",
+                (seller_id, args.archived - archived)).fetchall()
+            for (lot_id,) in candidates:
+                client.put(f"/api/lots/{lot_id}/archive", headers=headers)
+            archived = count(api.ARCHIVE_DB_PATH)
+        print(f"Seller {seller_id}: {count(db_path) + archived:,} lots, {archived:,} of them archived")
+
+        lots_statements = statements(api.get_client_lots, api.DB_PATH, api.ARCHIVE_DB_PATH,
+                                     client_id=seller_id, current_user=staff)
+        portfolio_statements = statements(api.get_client_portfolio, api.DB_PATH, api.ARCHIVE_DB_PATH,
+                                          client_id=seller_id, current_user=staff)
+        print(f"SQL statements: client lots {lots_statements:,}, portfolio {portfolio_statements}")
+
+        for name, path in (("client lots", f"/api/clients/{seller_id}/lots"),
+                           ("portfolio", f"/api/clients/{seller_id}/portfolio"),
+                           ("portfolio totals only", f"/api/clients/{seller_id}/portfolio?include_lots=false")):
+            latencies = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                response = client.get(path, headers=headers)
+                latencies.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200, response.text
+            latencies.sort()
+            print(f"{name:>22}: p50 {pct(latencies, 50):7.1f} ms  p95 {pct(latencies, 95):7.1f} ms  "
+                  f"{len(response.content) / 1e6:5.2f} MB")
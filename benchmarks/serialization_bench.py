@@ -0,0 +1,80 @@
+"""Serialization cost of large lot list responses.
+
+Compares FastAPI's default path (validate each row against LotResponse, dump to
+JSON-compatible data, encode with the stdlib json module) with the trusted
+orjson path used by get_lots and search_catalogue.
+
+    python benchmarks/serialization_bench.py --lots 10000
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from api.main import LotResponse, lot_payload, trusted_response
+
+
+def make_lots(n):
+    lots = []
+    for i in range(1, n + 1):
+        lots.append({
+            "id": i, "lot_reference": f"LOT-{i:07d}", "auction_id": i % 50 + 1, "artist": "David Hockney",
+            "title": f"Coastal Morning Light {i}", "category": "Painting", "dimensions": "120 x 150 cm",
+            "framing_details": None, "year_of_production": 2018, "description": "Synthetic lot for benchmarking.",
+            "estimate_low": 45000.0, "estimate_high": 65000.0, "reserve_price": 42000.0, "sold_price": None,
+            "commission_bids": 0, "triage_status": "Physical", "status": "Listed", "is_archived": 0,
+            "withdrawn_date": None, "withdrawal_fee": 0.0, "seller_id": 2, "created_at": "2025-01-01 10:00:00",
+            "updated_at": "2025-01-01 10:00:00", "medium": "Oil", "material": None, "weight": None,
+            "height": 120.0, "width": 150.0, "depth": None, "is_framed": 1,
+            "auction_title": "21st Century British Art", "auction_type": "Physical", "location": "London",
+            "auction_date": "2026-01-01", "start_time": "7:00pm",
+            "images": [{"id": i * 2 + n, "lot_id": i, "image_url": f"/uploads/lots/{i}_{n}.jpg",
+                        "thumbnail_url": f"/uploads/lots/thumbnails/{i}_thumb_{n}.jpg", "is_primary": int(n == 0),
+                        "display_order": n, "created_at": "2025-01-01 10:00:00"} for n in range(2)],
+        })
+    return lots
+
+
+def default_path(adapter, lots):
+    value = adapter.validate_python(lots)
+    return JSONResponse(adapter.dump_python(value, mode="json")).body
+
+
+def fast_path(lots):
+    return trusted_response(lots, shape=lot_payload).body
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings), len(body)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lots", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    lots = make_lots(args.lots)
+    adapter = TypeAdapter(List[LotResponse])
+
+    before_ms, before_size = best_of(lambda: default_path(adapter, lots), args.repeat)
+    after_ms, after_size = best_of(lambda: fast_path(lots), args.repeat)
+
+    print(f"{args.lots:,} lots")
+    print(f"  validate + stdlib json : {before_ms:8.1f} ms  ({before_size:,} bytes)")
+    print(f"  trusted orjson         : {after_ms:8.1f} ms  ({after_size:,} bytes)")
+    print(f"  speedup                : {before_ms / after_ms:8.1f}x")
@@ -0,0 +1,106 @@
+"""Cold-start time of an API worker, checked against a budget.
+
+Each run starts a fresh interpreter that imports api.main, runs the startup
+hooks and serves its first request (the public auctions list), timing each
+step. Runs after the first find the schema already migrated, which is the
+usual case for a restarted or autoscaled worker. The benchmark fails if the
+median of any step exceeds its budget, or if a dependency that should load
+lazily (Pillow, NumPy, passlib, jose) is imported with the app.
+
+    python benchmarks/startup_bench.py --scale 100k --runs 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+DATA_DIR = ROOT / "benchmarks" / ".data"
+LAZY_MODULES = ("PIL", "numpy", "passlib", "jose")
+
+
+async def cold_start():
+    import httpx
+
+    start = time.perf_counter()
+    from api import main
+    imported = time.perf_counter()
+    eager = [name for name in LAZY_MODULES if name in sys.modules]
+
+    await main.app.router.startup()
+    started = time.perf_counter()
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            (await client.get("/api/auctions")).raise_for_status()
+        served = time.perf_counter()
+    finally:
+        await main.app.router.shutdown()
+    return {
+        "import_ms": (imported - start) * 1000,
+        "startup_ms": (started - imported) * 1000,
+        "first_request_ms": (served - started) * 1000,
+        "eager_imports": eager,
+    }
+
+
+def run_child(db_path):
+    env = dict(os.environ, FOTHERBYS_DB=str(db_path), FOTHERBYS_STORAGE_GC_INTERVAL_S="0",
+               FOTHERBYS_BACKUP_INTERVAL_S="0", FOTHERBYS_CATALOGUE_SNAPSHOTS="0")
+    env.setdefault("SECRET_KEY", "benchmark-secret")
+    out = subprocess.run([sys.executable, __file__, "--child"], env=env, cwd=ROOT,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", default="100k", choices=SCALES)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=1000.0)
+    parser.add_argument("--startup-budget-ms", type=float, default=100.0)
+    parser.add_argument("--first-request-budget-ms", type=float, default=250.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(cold_start())))
+        sys.exit(0)
+
+    from scripts.generate_load_data import generate
+
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    db_path = DATA_DIR / f"bench_{args.scale}.db"
+    if not db_path.exists():
+        print(f"Seeding {args.scale} database...")
+        generate(str(db_path), SCALES[args.scale], password="bench123", seed=args.seed)
+
+    first = run_child(db_path)
+    print(f"First start (applies pending migrations): startup {first['startup_ms']:.0f} ms")
+    runs = [run_child(db_path) for _ in range(args.runs)]
+
+    failed = False
+    for step, budget in (("import_ms", args.import_budget_ms), ("startup_ms", args.startup_budget_ms),
+                         ("first_request_ms", args.first_request_budget_ms)):
+        median = statistics.median(run[step] for run in runs)
+        ok = median <= budget
+        failed |= not ok
+        print(f"{step[:-3].replace('_', ' '):>14}: median {median:7.1f} ms  "
+              f"(min {min(run[step] for run in runs):.1f})  budget {budget:.0f} ms  {'ok' if ok else 'OVER'}")
+    eager = sorted({name for run in runs for name in run["eager_imports"]})
+    if eager:
+        print(f"Imported at startup but should load lazily: {', '.join(eager)}")
+        failed = True
+    if failed:
+        print("FAIL: cold start over budget")
+        sys.exit(1)
+    print("OK: cold start within budget")
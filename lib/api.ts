@@ -24,7 +24,7 @@ export interface Auction {
   start_time: "9:30am" | "2:00pm" | "7:00pm"
   theme?: string
   auction_type: "Physical" | "Online"
-  status: "Upcoming" | "Completed" | "Cancelled"
+  status: "Upcoming" | "Live" | "Completed" | "Cancelled"
   created_at: string
   is_archived?: boolean
 }
@@ -80,6 +80,124 @@ export interface CommissionResult {
   total_seller_receives: number
 }
 
+export type CatalogueSort = "date" | "estimate" | "lot_reference" | "relevance"
+
+export interface FacetCount {
+  value: string
+  count: number
+}
+
+export interface FacetedSearchResult {
+  total: number
+  page: number
+  page_size: number
+  results: Lot[]
+  facets: {
+    location: FacetCount[]
+    auction_type: FacetCount[]
+    category: FacetCount[]
+    estimate_band: FacetCount[]
+  }
+}
+
+export interface ComparablesQuery {
+  artist?: string
+  category?: string
+  medium?: string
+  height?: number
+  width?: number
+  depth?: number
+}
+
+export interface Comparable {
+  id: number
+  artist: string
+  title: string
+  category: string
+  medium?: string
+  height?: number
+  width?: number
+  depth?: number
+  sold_price: number
+  score: number
+}
+
+export interface ComparablesResult {
+  comparables: Comparable[]
+  suggested_estimate: { low: number; high: number; median: number } | null
+  based_on: number
+}
+
+export interface LotEvent {
+  id: number
+  lot_id: number
+  seller_id?: number
+  from_status: Lot["status"] | null
+  to_status: Lot["status"] | null
+  auction_id?: number
+  price?: number
+  actor_id?: number
+  at: string
+}
+
+export interface LotActivity {
+  counts: Partial<Record<Lot["status"], number>>
+  events: LotEvent[]
+  next_since_id: number
+}
+
+export interface CatalogueSnapshot {
+  auction: Pick<Auction, "id" | "title" | "location" | "auction_date" | "start_time" | "theme" | "auction_type" | "status">
+  lots: Array<
+    Omit<Lot, "images" | "reserve_price" | "sold_price" | "commission_bids" | "withdrawal_fee" | "created_at"> & {
+      images: Array<{ image_url: string; thumbnail_url?: string }>
+    }
+  >
+  facets: { category: Record<string, number>; estimate_band: Record<string, number> }
+}
+
+export interface PortfolioLot
+  extends Pick<
+    Lot,
+    | "id"
+    | "lot_reference"
+    | "artist"
+    | "title"
+    | "category"
+    | "estimate_low"
+    | "estimate_high"
+    | "reserve_price"
+    | "sold_price"
+    | "status"
+    | "withdrawal_fee"
+    | "auction_id"
+    | "auction_title"
+    | "auction_date"
+    | "created_at"
+  > {
+  withdrawn_date?: string
+  archived: boolean
+  image: { id: number; image_url: string; thumbnail_url?: string } | null
+}
+
+export interface PortfolioTotals {
+  lots: number
+  archived: number
+  estimate_low: number
+  estimate_high: number
+  hammer: number
+  commission: number
+  payout: number
+  withdrawal_fees: number
+}
+
+export interface Portfolio {
+  seller_id: number
+  commission_rate: number
+  totals: PortfolioTotals & { net_payout: number; expected_payout_low: number; expected_payout_high: number }
+  groups: Array<{ status: Lot["status"]; totals: PortfolioTotals; lots: PortfolioLot[] }>
+}
+
 export interface Client {
   id: number
   name: string
@@ -181,6 +299,13 @@ export const api = {
     return res.json()
   },
 
+  // Static per-auction catalogue, rebuilt by the API when its lots change; served without SQL.
+  async getCatalogueSnapshot(auctionId: number): Promise<CatalogueSnapshot> {
+    const res = await fetch(`${API_BASE_URL}/api/catalogue/snapshots/${auctionId}.json`)
+    if (!res.ok) throw new Error("Failed to fetch catalogue")
+    return res.json()
+  },
+
   async createLot(lot: Omit<Lot, "id" | "created_at" | "images" | "sold_price" | "withdrawal_fee">): Promise<Lot> {
     const res = await fetch(`${API_BASE_URL}/api/lots`, {
       method: "POST",
@@ -236,6 +361,27 @@ export const api = {
     return res.json()
   },
 
+  async getComparables(params: ComparablesQuery & { k?: number }): Promise<ComparablesResult> {
+    const query = new URLSearchParams(params as any).toString()
+    const res = await fetch(`${API_BASE_URL}/api/lots/comparables?${query}`, {
+      headers: getAuthHeaders(),
+    })
+    if (!res.ok) throw new Error("Failed to fetch comparables")
+    return res.json()
+  },
+
+  async getComparablesBatch(
+    body: { lots?: ComparablesQuery[]; lot_ids?: number[]; k?: number },
+  ): Promise<{ results: (ComparablesResult & { lot_id?: number; error?: string })[] }> {
+    const res = await fetch(`${API_BASE_URL}/api/lots/comparables/batch`, {
+      method: "POST",
+      headers: getAuthHeaders(),
+      body: JSON.stringify(body),
+    })
+    if (!res.ok) throw new Error("Failed to value intake")
+    return res.json()
+  },
+
   async assignLotToAuction(lotId: number, auctionId: number): Promise<void> {
     const res = await fetch(`${API_BASE_URL}/api/lots/${lotId}/assign-auction?auction_id=${auctionId}`, {
       method: "PUT",
@@ -253,6 +399,31 @@ export const api = {
     return res.json()
   },
 
+  async markLotUnsold(lotId: number): Promise<void> {
+    const res = await fetch(`${API_BASE_URL}/api/lots/${lotId}/unsold`, {
+      method: "PUT",
+      headers: getAuthHeaders(),
+    })
+    if (!res.ok) throw new Error("Failed to mark lot unsold")
+  },
+
+  async getLotStatusCounts(): Promise<{ counts: LotActivity["counts"]; last_event_id: number }> {
+    const res = await fetch(`${API_BASE_URL}/api/lots/status-counts`, {
+      headers: getAuthHeaders(),
+    })
+    if (!res.ok) throw new Error("Failed to fetch lot status counts")
+    return res.json()
+  },
+
+  async getLotEvents(params?: { since_id?: number; since?: string; lot_id?: number; limit?: number }): Promise<Omit<LotActivity, "counts">> {
+    const query = new URLSearchParams(params as any).toString()
+    const res = await fetch(`${API_BASE_URL}/api/lots/events?${query}`, {
+      headers: getAuthHeaders(),
+    })
+    if (!res.ok) throw new Error("Failed to fetch lot history")
+    return res.json()
+  },
+
   async uploadLotImage(lotId: number, file: File, isPrimary = false): Promise<{ url: string; thumbnail_url: string }> {
     const formData = new FormData()
     formData.append("file", file)
@@ -267,6 +438,10 @@ export const api = {
     return res.json()
   },
 
+  imageRenditionUrl(imageId: number, width = 800, format: "jpeg" | "webp" = "webp", quality = 80): string {
+    return `${API_BASE_URL}/api/images/${imageId}?width=${width}&format=${format}&quality=${quality}`
+  },
+
   async deleteLotImage(imageId: number): Promise<void> {
     const res = await fetch(`${API_BASE_URL}/api/lots/images/${imageId}`, {
       method: "DELETE",
@@ -309,6 +484,9 @@ export const api = {
     auction_type?: string
     category?: string
     auction_date?: string
+    min_estimate?: number
+    max_estimate?: number
+    sort?: CatalogueSort
   }): Promise<Lot[]> {
     const query = new URLSearchParams(params as any).toString()
     const res = await fetch(`${API_BASE_URL}/api/catalogue/search?${query}`)
@@ -316,6 +494,24 @@ export const api = {
     return res.json()
   },
 
+  async searchCatalogueFaceted(params?: {
+    q?: string
+    location?: string
+    auction_type?: string
+    category?: string
+    estimate_band?: string
+    min_estimate?: number
+    max_estimate?: number
+    sort?: CatalogueSort
+    page?: number
+    page_size?: number
+  }): Promise<FacetedSearchResult> {
+    const query = new URLSearchParams(params as any).toString()
+    const res = await fetch(`${API_BASE_URL}/api/catalogue/search/faceted?${query}`)
+    if (!res.ok) throw new Error("Failed to search catalogue")
+    return res.json()
+  },
+
   async getCategories(): Promise<string[]> {
     const res = await fetch(`${API_BASE_URL}/api/categories`)
     if (!res.ok) throw new Error("Failed to fetch categories")
@@ -331,6 +527,22 @@ export const api = {
     return res.json()
   },
 
+  async getClientPortfolio(clientId: number, includeLots = true): Promise<Portfolio> {
+    const res = await fetch(`${API_BASE_URL}/api/clients/${clientId}/portfolio?include_lots=${includeLots}`, {
+      headers: getAuthHeaders(),
+    })
+    if (!res.ok) throw new Error("Failed to fetch client portfolio")
+    return res.json()
+  },
+
+  async getClientLotSummary(clientId: number, sinceId = 0): Promise<LotActivity> {
+    const res = await fetch(`${API_BASE_URL}/api/clients/${clientId}/lot-summary?since_id=${sinceId}`, {
+      headers: getAuthHeaders(),
+    })
+    if (!res.ok) throw new Error("Failed to fetch lot activity")
+    return res.json()
+  },
+
   async getAuction(id: number): Promise<Auction> {
     const res = await fetch(`${API_BASE_URL}/api/auctions/${id}`)
     if (!res.ok) throw new Error("Failed to fetch auction")
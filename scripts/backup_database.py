@@ -0,0 +1,58 @@
+"""Take an online backup of the Fotherby's databases, with or without the API running.
+
+Copies the live and archive databases a few pages at a time into a new
+snapshot directory, checks each copy with PRAGMA integrity_check and keeps
+the newest --keep snapshots. Safe to run while the API is serving writes,
+and from cron.
+
+    python scripts/backup_database.py
+    python scripts/backup_database.py --dest /mnt/backups --keep 14 --pause-ms 20
+    python scripts/backup_database.py --list
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import archive
+from api.backup import BackupError, BackupManager
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Back up the Fotherby's databases")
+    parser.add_argument("--db", default=os.getenv("FOTHERBYS_DB", "data/fotherbys.db"))
+    parser.add_argument("--archive-db", help="Defaults to <db>_archive.db, as the API does")
+    parser.add_argument("--dest", default=os.getenv("FOTHERBYS_BACKUP_DIR"),
+                        help="Defaults to <db>_backups/, as the API does")
+    parser.add_argument("--keep", type=int, default=int(os.getenv("FOTHERBYS_BACKUP_KEEP", "7")))
+    parser.add_argument("--pages", type=int, default=256, help="Pages copied per step")
+    parser.add_argument("--pause-ms", type=float, default=10, help="Pause between steps")
+    parser.add_argument("--list", action="store_true", help="List snapshots and exit")
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    db_path = Path(args.db)
+    archive_path = Path(args.archive_db or os.getenv("FOTHERBYS_ARCHIVE_DB",
+                                                      db_path.with_name(f"{db_path.stem}_archive.db")))
+    dest = Path(args.dest or db_path.with_name(f"{db_path.stem}_backups"))
+    manager = BackupManager(db_path, {archive.SCHEMA: archive_path}, dest, keep=args.keep,
+                            pages_per_step=args.pages, pause_s=args.pause_ms / 1000)
+    if args.list:
+        for snapshot in manager.list():
+            print(f"{snapshot['name']}  {snapshot['bytes'] / 1e6:9.1f} MB  {snapshot['duration_s']:7.2f}s")
+        sys.exit()
+    for path in manager.databases.values():
+        if not path.exists():
+            sys.exit(f"{path} not found; start the API once against {db_path} to migrate it")
+    try:
+        snapshot = manager.run()
+    except BackupError as e:
+        sys.exit(f"Backup failed: {e}")
+    for schema, info in snapshot["files"].items():
+        print(f"{schema}: {info['pages']:,} pages, {info['bytes'] / 1e6:.1f} MB in {info['steps']} steps")
+    print(f"Snapshot {snapshot['name']} ({snapshot['bytes'] / 1e6:.1f} MB) verified in {snapshot['duration_s']:.2f}s; "
+          f"kept {len(manager.list())} in {dest}")
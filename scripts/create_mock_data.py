@@ -80,12 +80,14 @@ def create_mock_data():
     ]
     
     auction_ids = []
+    auction_dates = {}
     for auction in auctions_data:
         cursor.execute("""
             INSERT INTO auctions (title, location, auction_date, start_time, auction_type, theme)
             VALUES (?, ?, ?, ?, ?, ?)
         """, auction)
         auction_ids.append(cursor.lastrowid)
+        auction_dates[cursor.lastrowid] = auction[2]
     
     # LOTS DATA
     # PAINTINGS
@@ -220,9 +222,7 @@ def create_mock_data():
                 auction_id = auction_ids[0]
         
         # Determine status based on auction date
-        cursor.execute("SELECT auction_date FROM auctions WHERE id = ?", (auction_id,))
-        auction_date_str = cursor.fetchone()[0]
-        auction_dt = datetime.strptime(auction_date_str, "%Y-%m-%d")
+        auction_dt = datetime.strptime(auction_dates[auction_id], "%Y-%m-%d")
         
         status = "Listed"
         sold_price = None
@@ -0,0 +1,70 @@
+"""Export lots, transactions or client statements as CSV without the API running.
+
+Uses the same streaming exporter as the /api/export endpoints, so memory
+stays flat for any number of rows. A .gz output name (or --gzip) compresses
+on the fly.
+
+    python scripts/export_csv.py lots --status Sold --out sold.csv.gz
+    python scripts/export_csv.py transactions --date-from 2024-01-01 --date-to 2024-12-31 --out 2024.csv
+    python scripts/export_csv.py statements --client-id 42 > statement.csv
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import export
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Stream a Fotherby's CSV export")
+    parser.add_argument("kind", choices=["lots", "transactions", "statements"])
+    parser.add_argument("--db", default=os.getenv("FOTHERBYS_DB", "data/fotherbys.db"))
+    parser.add_argument("--archive-db", help="Defaults to <db>_archive.db, as the API does")
+    parser.add_argument("--out", default="-", help="Output file, or - for stdout")
+    parser.add_argument("--gzip", action="store_true", help="Compress (implied by a .gz output name)")
+    filters = parser.add_argument_group("filters")
+    filters.add_argument("--auction-id", type=int)
+    filters.add_argument("--seller-id", type=int, help="lots and transactions")
+    filters.add_argument("--buyer-id", type=int, help="transactions")
+    filters.add_argument("--client-id", type=int, help="statements")
+    filters.add_argument("--status", help="lots")
+    filters.add_argument("--artist", help="lots")
+    filters.add_argument("--category", help="lots")
+    filters.add_argument("--archived-only", action="store_true", help="lots")
+    filters.add_argument("--date-from", help="transactions and statements, YYYY-MM-DD")
+    filters.add_argument("--date-to", help="transactions and statements, YYYY-MM-DD, inclusive")
+    return parser
+
+
+FILTERS = {
+    "lots": ("auction_id", "status", "artist", "category", "seller_id", "archived_only"),
+    "transactions": ("date_from", "date_to", "seller_id", "buyer_id", "auction_id"),
+    "statements": ("client_id", "date_from", "date_to"),
+}
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    db_path = Path(args.db)
+    archive_path = Path(args.archive_db or os.getenv("FOTHERBYS_ARCHIVE_DB",
+                                                      db_path.with_name(f"{db_path.stem}_archive.db")))
+    if not archive_path.exists():
+        sys.exit(f"{archive_path} not found; start the API once against {db_path} to migrate it")
+    compress = args.gzip or args.out.endswith(".gz")
+    filters = {name: getattr(args, name) for name in FILTERS[args.kind]}
+
+    start = time.perf_counter()
+    written = 0
+    out = sys.stdout.buffer if args.out == "-" else open(args.out, "wb")
+    try:
+        for chunk in export.stream(db_path, archive_path, args.kind, compress=compress, **filters):
+            out.write(chunk)
+            written += len(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    print(f"Exported {args.kind} ({written:,} bytes) in {time.perf_counter() - start:.1f}s", file=sys.stderr)
@@ -0,0 +1,250 @@
+"""Deterministic synthetic data generator for load testing.
+
+Builds a production-sized database in a few large transactions:
+
+    python scripts/generate_load_data.py --lots 1000000 --db data/load.db
+    python scripts/generate_load_data.py --lots 5000 --image-files --seed 7
+"""
+import argparse
+import io
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.setup_database import init_database, get_password_hash
+
+BATCH_SIZE = 50_000
+STAFF_EMAIL = "admin@fotherbys.com"
+
+FIRST_NAMES = ["David", "Tracey", "Damien", "Lucian", "Barbara", "Henry", "Joan", "Annie", "Andreas", "Yayoi",
+               "Gerhard", "Jean-Michel", "Pablo", "Claude", "Mark", "Willem", "Anselm", "Takashi", "Bridget", "Frank",
+               "Wassily", "Auguste", "Antony", "Grinling", "Frida", "Georgia", "Paula", "Cecily", "Lubaina", "Peter"]
+LAST_NAMES = ["Hockney", "Emin", "Hirst", "Freud", "Hepworth", "Moore", "Miro", "Leibovitz", "Gursky", "Kusama",
+              "Richter", "Basquiat", "Picasso", "Monet", "Rothko", "de Kooning", "Kiefer", "Murakami", "Riley", "Auerbach",
+              "Kandinsky", "Rodin", "Gormley", "Gibbons", "Kahlo", "O'Keeffe", "Rego", "Brown", "Himid", "Doig"]
+TITLE_WORDS = ["Coastal", "Morning", "Light", "Urban", "Fragments", "Summer", "Garden", "Portrait", "Study", "Abstract",
+               "Composition", "Figure", "Reclining", "Landscape", "Interior", "Still", "Life", "Night", "Harbour", "Red"]
+LOCATIONS = ["London", "Paris", "New York"]
+START_TIMES = ["9:30am", "2:00pm", "7:00pm"]
+CATEGORY_SPECS = {
+    # category: (weight, mediums, materials, is_3d)
+    "Painting": (40, ["Oil", "Acrylic", "Watercolour"], [None], False),
+    "Drawing": (20, ["Charcoal", "Pencil", "Ink"], [None], False),
+    "Sculpture": (15, [None], ["Bronze", "Marble", "Pewter"], True),
+    "Photography": (15, ["Colour", "Black and White"], [None], False),
+    "Carving": (10, [None], ["Oak", "Beech", "Pine"], True),
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Fotherby's database")
+    parser.add_argument("--db", default="data/fotherbys_load.db")
+    parser.add_argument("--clients", type=int, help="Defaults to lots / 20")
+    parser.add_argument("--auctions", type=int, help="Defaults to lots / 200")
+    parser.add_argument("--lots", type=int, default=100_000)
+    parser.add_argument("--images-per-lot", type=int, default=2)
+    parser.add_argument("--unassigned-ratio", type=float, default=0.1, help="Share of lots still Pending")
+    parser.add_argument("--withdrawn-ratio", type=float, default=0.02)
+    parser.add_argument("--sold-ratio", type=float, default=0.75, help="Share of lots in past auctions that sold")
+    parser.add_argument("--past-auction-ratio", type=float, default=0.6)
+    parser.add_argument("--password", default="password123", help="Password shared by every generated client")
+    parser.add_argument("--image-files", action="store_true", help="Also write placeholder image files")
+    parser.add_argument("--image-dir", help="Defaults to uploads/lots under <db>_uploads, away from real uploads")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser
+
+
+def _chunks(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _placeholder_images(count, size):
+    """A small palette of encoded JPEGs reused for every generated file."""
+    from PIL import Image
+
+    palette = []
+    for i in range(count):
+        buffer = io.BytesIO()
+        Image.new("RGB", size, ((i * 53) % 256, (i * 97) % 256, (i * 151) % 256)).save(buffer, "JPEG", quality=60)
+        palette.append(buffer.getvalue())
+    return palette
+
+
+def generate(db_path, lots, clients=None, auctions=None, images_per_lot=2, unassigned_ratio=0.1,
+             withdrawn_ratio=0.02, sold_ratio=0.75, past_auction_ratio=0.6, password="password123",
+             image_files=False, image_dir=None, seed=42):
+    """Create db_path from scratch and fill it with deterministic synthetic data. Returns row counts."""
+    clients = clients or max(50, lots // 20)
+    auctions = auctions or max(10, lots // 200)
+    rng = random.Random(seed)
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    init_database(db_path, seed=False)
+
+    # bcrypt is deliberately slow: hash once and share it across every client.
+    password_hash = get_password_hash(password)
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -200000")
+    conn.execute("PRAGMA locking_mode = EXCLUSIVE")
+    conn.execute("BEGIN")
+
+    client_rows = [("Admin Staff", STAFF_EMAIL, password_hash, "Joint", 1, "Fotherbys HQ", "000")]
+    for i in range(1, clients):
+        client_type = rng.choices(["Seller", "Buyer", "Joint"], weights=[5, 4, 1])[0]
+        client_rows.append((f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}", f"client{i}@example.com",
+                            password_hash, client_type, 0, f"{rng.randint(1, 200)} High Street", f"+44 20 7{i % 10_000_000:07d}"))
+    conn.executemany('''
+        INSERT INTO clients (name, email, password_hash, client_type, is_staff, address, phone)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', client_rows)
+    seller_ids = [i + 1 for i, row in enumerate(client_rows) if row[3] in ("Seller", "Joint")]
+    buyer_ids = [i + 1 for i, row in enumerate(client_rows) if row[3] in ("Buyer", "Joint")]
+    del client_rows
+
+    today = date.today()
+    auction_rows = []
+    for i in range(auctions):
+        if rng.random() < past_auction_ratio:
+            auction_date = today - timedelta(days=rng.randint(1, 3 * 365))
+        else:
+            auction_date = today + timedelta(days=rng.randint(0, 365))
+        auction_rows.append((f"{rng.choice(TITLE_WORDS)} {rng.choice(TITLE_WORDS)} Sale {i + 1}", rng.choice(LOCATIONS),
+                             auction_date.isoformat(), rng.choice(START_TIMES),
+                             "Online" if rng.random() < 0.3 else "Physical", f"Theme {i % 50}"))
+    conn.executemany('''
+        INSERT INTO auctions (title, location, auction_date, start_time, auction_type, theme)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', auction_rows)
+    auction_is_past = [row[2] < today.isoformat() for row in auction_rows]
+    del auction_rows
+
+    artists = [f"{f} {l}" for f in FIRST_NAMES for l in LAST_NAMES]
+    categories = list(CATEGORY_SPECS)
+    category_weights = [spec[0] for spec in CATEGORY_SPECS.values()]
+    sales = []
+
+    def lot_rows():
+        for i in range(lots):
+            lot_id = i + 1
+            category = rng.choices(categories, weights=category_weights)[0]
+            _, mediums, materials, is_3d = CATEGORY_SPECS[category]
+            height = rng.randint(20, 250)
+            width = rng.randint(20, 250)
+            depth = rng.randint(10, 120) if is_3d else None
+            dimensions = f"{height} x {width} x {depth} cm" if depth else f"{height} x {width} cm"
+            estimate_low = rng.choice([1, 2, 5]) * 10 ** rng.randint(3, 6)
+            estimate_high = estimate_low * rng.choice([1.3, 1.5, 2])
+            seller_id = rng.choice(seller_ids)
+
+            auction_id, status, sold_price = None, "Pending", None
+            roll = rng.random()
+            if roll < withdrawn_ratio:
+                status = "Withdrawn"
+            elif roll >= withdrawn_ratio + unassigned_ratio:
+                auction_id = rng.randint(1, auctions)
+                if not auction_is_past[auction_id - 1]:
+                    status = "Listed"
+                elif rng.random() < sold_ratio:
+                    status = "Sold"
+                    sold_price = round(estimate_low * rng.uniform(0.8, 2.2), -2)
+                    sales.append((lot_id, rng.choice(buyer_ids), seller_id, sold_price))
+                else:
+                    status = "Unsold"
+
+            yield (f"LOT-{seed}-{lot_id:07d}", auction_id, rng.choice(artists),
+                   f"{rng.choice(TITLE_WORDS)} {rng.choice(TITLE_WORDS)} {lot_id}", category, dimensions,
+                   rng.randint(1650, 2024), f"Synthetic lot {lot_id} for load testing.",
+                   estimate_low, estimate_high, estimate_low * 0.9, sold_price,
+                   "Online" if estimate_low < 20000 else "Physical", status, seller_id,
+                   rng.choice(mediums), rng.choice(materials), rng.randint(1, 200) if is_3d else None,
+                   height, width, depth, int(rng.random() < 0.6 and not is_3d))
+
+    for batch in _chunks(lot_rows()):
+        conn.executemany('''
+            INSERT INTO lots (
+                lot_reference, auction_id, artist, title, category, dimensions, year_of_production, description,
+                estimate_low, estimate_high, reserve_price, sold_price, triage_status, status, seller_id,
+                medium, material, weight, height, width, depth, is_framed
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', batch)
+
+    def image_rows():
+        for lot_id in range(1, lots + 1):
+            for n in range(images_per_lot):
+                yield (lot_id, f"/uploads/lots/{lot_id}_{n}.jpg", f"/uploads/lots/thumbnails/{lot_id}_thumb_{n}.jpg",
+                       int(n == 0), n)
+
+    for batch in _chunks(image_rows()):
+        conn.executemany('''
+            INSERT INTO lot_images (lot_id, image_url, thumbnail_url, is_primary, display_order)
+            VALUES (?, ?, ?, ?, ?)
+        ''', batch)
+
+    conn.executemany('''
+        INSERT INTO transactions (lot_id, buyer_id, seller_id, hammer_price, buyers_premium, sellers_commission,
+                                  total_buyer_pays, total_seller_receives)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', ((lot_id, buyer_id, seller_id, price, price * 0.10, price * 0.10, price * 1.10, price * 0.90)
+          for lot_id, buyer_id, seller_id, price in sales))
+
+    conn.execute("COMMIT")
+    conn.execute("PRAGMA locking_mode = NORMAL")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.close()
+
+    if image_files:
+        write_image_files(image_dir or default_image_dir(db_path), lots, images_per_lot)
+
+    return {"clients": clients, "auctions": auctions, "lots": lots,
+            "images": lots * images_per_lot, "transactions": len(sales)}
+
+
+def default_image_dir(db_path):
+    """uploads/lots under the database's own <db>_uploads directory, mirroring public/ for its image URLs."""
+    stem, _ = os.path.splitext(db_path)
+    return os.path.join(f"{stem}_uploads", "uploads", "lots")
+
+
+def write_image_files(image_dir, lots, images_per_lot):
+    """Write placeholder originals and thumbnails matching the generated lot_images rows."""
+    thumb_dir = os.path.join(image_dir, "thumbnails")
+    os.makedirs(thumb_dir, exist_ok=True)
+    originals = _placeholder_images(16, (600, 800))
+    thumbnails = _placeholder_images(16, (225, 300))
+    for lot_id in range(1, lots + 1):
+        for n in range(images_per_lot):
+            colour = (lot_id + n) % len(originals)
+            with open(os.path.join(image_dir, f"{lot_id}_{n}.jpg"), "wb") as f:
+                f.write(originals[colour])
+            with open(os.path.join(thumb_dir, f"{lot_id}_thumb_{n}.jpg"), "wb") as f:
+                f.write(thumbnails[colour])
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    start = time.perf_counter()
+    counts = generate(args.db, args.lots, clients=args.clients, auctions=args.auctions,
+                      images_per_lot=args.images_per_lot, unassigned_ratio=args.unassigned_ratio,
+                      withdrawn_ratio=args.withdrawn_ratio, sold_ratio=args.sold_ratio,
+                      past_auction_ratio=args.past_auction_ratio, password=args.password,
+                      image_files=args.image_files, image_dir=args.image_dir, seed=args.seed)
+    print(f"Generated {args.db} in {time.perf_counter() - start:.1f}s")
+    for table, count in counts.items():
+        print(f"   - {count:,} {table}")
@@ -4,8 +4,14 @@ from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, PageBreak, Table, TableStyle, KeepTogether
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY, TA_RIGHT
+import argparse
+import hashlib
+import json
 import sqlite3
-from datetime import datetime
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime
 import os
 from pathlib import Path
 
@@ -31,14 +37,37 @@ def get_image_path(image_url):
             
     return None
 
-def generate_auction_catalogue_pdf(auction_id: int):    
-    db_path = 'data/fotherbys.db'
+def default_db_path():
+    db_path = os.getenv("FOTHERBYS_DB", 'data/fotherbys.db')
     
     if not os.path.exists(db_path):
         if os.path.exists(f"../{db_path}"):
              db_path = f"../{db_path}"
-             
-    conn = sqlite3.connect(db_path)
+    return db_path
+
+def default_logo_path():
+    logo_path = "public/images/fotherbys-logo.png"
+    if not os.path.exists(logo_path) and os.path.exists("../public/images/fotherbys-logo.png"):
+        logo_path = "../public/images/fotherbys-logo.png"
+    return logo_path
+
+LOTS_QUERY = '''
+    SELECT l.*, GROUP_CONCAT(li.image_url) as images
+    FROM lots l
+    LEFT JOIN lot_images li ON l.id = li.lot_id
+    WHERE l.auction_id = ? AND l.status = "Listed"
+    GROUP BY l.id
+    ORDER BY l.lot_reference
+'''
+
+OUTPUT_DIR = "public/catalogues" # Store in public so it's accessible if needed
+FINGERPRINTS_NAME = ".fingerprints.json"
+
+def catalogue_path(auction_id, output_dir=OUTPUT_DIR):
+    return os.path.join(output_dir, f"Fotherbys_Catalogue_{auction_id}.pdf")
+
+def generate_auction_catalogue_pdf(auction_id: int, db_path=None, output_dir=OUTPUT_DIR):
+    conn = sqlite3.connect(db_path or default_db_path())
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
@@ -47,22 +76,15 @@ def generate_auction_catalogue_pdf(auction_id: int):
     if not auction:
         raise ValueError(f"Auction {auction_id} not found")
     
-    cursor.execute('''
-        SELECT l.*, GROUP_CONCAT(li.image_url) as images
-        FROM lots l
-        LEFT JOIN lot_images li ON l.id = li.lot_id
-        WHERE l.auction_id = ? AND l.status = "Listed"
-        GROUP BY l.id
-        ORDER BY l.lot_reference
-    ''', (auction_id,))
+    cursor.execute(LOTS_QUERY, (auction_id,))
     lots = cursor.fetchall()
     
-    output_dir = "public/catalogues" # Store in public so it's accessible if needed
     os.makedirs(output_dir, exist_ok=True)
-    filename = f"Fotherbys_Catalogue_{auction_id}.pdf"
-    output_path = os.path.join(output_dir, filename)
+    output_path = catalogue_path(auction_id, output_dir)
+    # Render beside the target and rename, so a download never sees a half-written file
+    tmp_path = os.path.join(output_dir, f".{os.getpid()}.{os.path.basename(output_path)}")
     
-    doc = SimpleDocTemplate(output_path, pagesize=A4,
+    doc = SimpleDocTemplate(tmp_path, pagesize=A4,
                            topMargin=0.75*inch, bottomMargin=0.75*inch,
                            leftMargin=0.75*inch, rightMargin=0.75*inch)
     
@@ -106,9 +128,7 @@ def generate_auction_catalogue_pdf(auction_id: int):
     )
     
     # Logo & Header
-    logo_path = "public/images/fotherbys-logo.png"
-    if not os.path.exists(logo_path) and os.path.exists("../public/images/fotherbys-logo.png"):
-        logo_path = "../public/images/fotherbys-logo.png"
+    logo_path = default_logo_path()
         
     if os.path.exists(logo_path):
         try:
@@ -223,13 +243,147 @@ def generate_auction_catalogue_pdf(auction_id: int):
     story.append(Paragraph("FOTHERBY'S AUCTION HOUSES • LONDON • PARIS • NEW YORK", footer_style))
     story.append(Paragraph("www.fotherbys.com • +44 20 7123 4567", footer_style))
     
-    doc.build(story)
-    conn.close()
+    try:
+        doc.build(story)
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        conn.close()
     
     return output_path
 
-if __name__ == '__main__':
+def catalogue_fingerprint(conn, auction_id):
+    """Hash of everything a catalogue is rendered from: the auction, its listed lots, the
+    image and logo files (by size and mtime) and this script. None if the auction is gone."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(Path(__file__).read_bytes())
+    auction = conn.execute('SELECT * FROM auctions WHERE id = ?', (auction_id,)).fetchone()
+    if not auction:
+        return None
+    files = [default_logo_path()]
+    rows = [tuple(auction)]
+    for lot in conn.execute(LOTS_QUERY, (auction_id,)):
+        rows.append(tuple(lot))
+        if lot['images']:
+            files.append(get_image_path(lot['images'].split(',')[0]))
+    for path in files:
+        try:
+            stat = os.stat(path) if path else None
+            rows.append((path, stat.st_size, stat.st_mtime_ns) if stat else (path,))
+        except FileNotFoundError:
+            rows.append((path,))
+    digest.update(json.dumps(rows, default=str).encode())
+    return digest.hexdigest()
+
+def select_auctions(conn, auction_ids=None, locations=None, date_from=None, date_to=None):
+    """Auctions to render: the given ids, or every upcoming auction from date_from (default today)."""
+    if auction_ids:
+        placeholders = ",".join("?" * len(auction_ids))
+        return conn.execute(f'SELECT id, title, location, auction_date FROM auctions WHERE id IN ({placeholders}) '
+                            'ORDER BY auction_date, id', auction_ids).fetchall()
+    query = "SELECT id, title, location, auction_date FROM auctions WHERE status = 'Upcoming' AND auction_date >= ?"
+    params = [date_from or date.today().isoformat()]
+    if date_to:
+        query += " AND auction_date <= ?"
+        params.append(date_to)
+    if locations:
+        query += f" AND location IN ({','.join('?' * len(locations))})"
+        params.extend(locations)
+    return conn.execute(query + " ORDER BY auction_date, id", params).fetchall()
+
+def load_fingerprints(output_dir):
     try:
-        print(generate_auction_catalogue_pdf(1))
-    except Exception as e:
-        print(f"Error: {e}")
\ No newline at end of file
+        with open(os.path.join(output_dir, FINGERPRINTS_NAME)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_fingerprints(output_dir, fingerprints):
+    path = os.path.join(output_dir, FINGERPRINTS_NAME)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(fingerprints, f, indent=1, sort_keys=True)
+    os.replace(f"{path}.tmp", path)
+
+def render(auction_id, db_path, output_dir):
+    """Process pool entry point: render one catalogue, timed."""
+    start = time.perf_counter()
+    path = generate_auction_catalogue_pdf(auction_id, db_path, output_dir)
+    return path, time.perf_counter() - start
+
+def generate_batch(auctions, db_path, output_dir=OUTPUT_DIR, workers=None, force=False):
+    """Render the catalogues of auctions (rows from select_auctions) in a process pool, skipping
+    any whose fingerprint matches the last successful render. Yields (auction, result) as each
+    finishes; result has status "unchanged", "rendered" or "failed"."""
+    os.makedirs(output_dir, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    fingerprints = load_fingerprints(output_dir)
+    pending = {}
+    for auction in auctions:
+        key = str(auction['id'])
+        fingerprint = catalogue_fingerprint(conn, auction['id'])
+        path = catalogue_path(auction['id'], output_dir)
+        if not force and fingerprint and fingerprints.get(key) == fingerprint and os.path.exists(path):
+            yield auction, {"status": "unchanged", "path": path, "bytes": os.path.getsize(path), "seconds": 0.0}
+        else:
+            pending[auction['id']] = (auction, fingerprint)
+    conn.close()
+    if not pending:
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count(), len(pending))) as pool:
+        futures = {pool.submit(render, auction_id, db_path, output_dir): auction_id for auction_id in pending}
+        for future in as_completed(futures):
+            auction, fingerprint = pending[futures[future]]
+            try:
+                path, seconds = future.result()
+            except Exception as e:
+                fingerprints.pop(str(auction['id']), None)
+                yield auction, {"status": "failed", "error": str(e)}
+                continue
+            # The fingerprint was taken before rendering, so a change made meanwhile renders again next time
+            fingerprints[str(auction['id'])] = fingerprint
+            save_fingerprints(output_dir, fingerprints)
+            yield auction, {"status": "rendered", "path": path, "bytes": os.path.getsize(path), "seconds": seconds}
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Render Fotherby's PDF catalogues. With no auction ids, renders every upcoming auction.")
+    parser.add_argument("auction_ids", nargs="*", type=int)
+    parser.add_argument("--db", default=None, help="Defaults to $FOTHERBYS_DB or data/fotherbys.db")
+    parser.add_argument("--out", default=OUTPUT_DIR)
+    parser.add_argument("--location", action="append", help="London, Paris, New York; repeatable")
+    parser.add_argument("--from", dest="date_from", help="YYYY-MM-DD, default today")
+    parser.add_argument("--to", dest="date_to", help="YYYY-MM-DD, inclusive")
+    parser.add_argument("--workers", type=int, help="Processes, default one per CPU")
+    parser.add_argument("--force", action="store_true", help="Render even if nothing has changed")
+    return parser
+
+if __name__ == '__main__':
+    args = build_parser().parse_args()
+    db_path = args.db or default_db_path()
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    auctions = select_auctions(conn, args.auction_ids, args.location, args.date_from, args.date_to)
+    conn.close()
+    if not auctions:
+        sys.exit("No matching auctions")
+
+    start = time.perf_counter()
+    counts = {"rendered": 0, "unchanged": 0, "failed": 0}
+    render_s = total_bytes = 0
+    for auction, result in generate_batch(auctions, db_path, args.out, args.workers, args.force):
+        counts[result["status"]] += 1
+        label = f"{auction['id']:>5}  {auction['auction_date']}  {auction['location']:<9} {auction['title'][:40]:<40}"
+        if result["status"] == "failed":
+            print(f"{label}  failed: {result['error']}")
+            continue
+        render_s += result["seconds"]
+        total_bytes += result["bytes"]
+        print(f"{label}  {result['status']:<9} {result['seconds']:6.2f}s  {result['bytes'] / 1e6:6.2f} MB")
+    wall_s = time.perf_counter() - start
+    print(f"{counts['rendered']} rendered, {counts['unchanged']} unchanged, {counts['failed']} failed; "
+          f"{total_bytes / 1e6:.1f} MB in {args.out}; {render_s:.1f}s of rendering in {wall_s:.1f}s")
+    if counts["failed"]:
+        sys.exit(1)
\ No newline at end of file
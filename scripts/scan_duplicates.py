@@ -0,0 +1,135 @@
+"""Check an intake of lots for works already consigned, with or without the API running.
+
+First hashes any lot image that has no perceptual hash yet (images uploaded
+before hashing existed, or by other tools), reading the files under
+--upload-root. Then compares every image of the intake's lots against every
+hashed image, live and archived, and lists the lots that look like another
+lot. Pairs inside the intake are listed once.
+
+    python scripts/scan_duplicates.py --auction-id 12
+    python scripts/scan_duplicates.py --seller-id 42 --since 2024-09-01 --max-distance 10
+    python scripts/scan_duplicates.py 101 102 103 --json > duplicates.json
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import archive, duplicates
+
+BATCH_SIZE = 500
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Find lots whose images match another lot's")
+    parser.add_argument("lot_ids", nargs="*", type=int)
+    parser.add_argument("--db", default=os.getenv("FOTHERBYS_DB", "data/fotherbys.db"))
+    parser.add_argument("--archive-db", help="Defaults to <db>_archive.db, as the API does")
+    parser.add_argument("--upload-root", default="public", help="Directory image URLs are relative to")
+    parser.add_argument("--max-distance", type=int, default=duplicates.DEFAULT_DISTANCE,
+                        choices=range(duplicates.MAX_DISTANCE + 1), metavar=f"0-{duplicates.MAX_DISTANCE}")
+    parser.add_argument("--workers", type=int, default=4, help="Threads hashing images")
+    parser.add_argument("--json", action="store_true", help="Print the matches as JSON")
+    intake = parser.add_argument_group("intake (combined with AND)")
+    intake.add_argument("--auction-id", type=int)
+    intake.add_argument("--seller-id", type=int)
+    intake.add_argument("--since", help="Lots created on or after YYYY-MM-DD")
+    intake.add_argument("--status", help="e.g. Pending")
+    return parser
+
+
+def hash_image(upload_root, image_url):
+    try:
+        return duplicates.hash_file(upload_root / image_url.lstrip("/"))
+    except (OSError, ValueError):
+        return None
+
+
+def backfill(conn, upload_root, workers):
+    """Hash every image without a hash. Returns (hashed, unreadable)."""
+    missing = conn.execute("SELECT id, image_url FROM lot_images WHERE dhash IS NULL AND image_url IS NOT NULL").fetchall()
+    hashed = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:  # Pillow releases the GIL while decoding
+        for start in range(0, len(missing), BATCH_SIZE):
+            batch = missing[start:start + BATCH_SIZE]
+            values = pool.map(lambda row: hash_image(upload_root, row["image_url"]), batch)
+            updates = [(duplicates.to_signed(value), row["id"]) for row, value in zip(batch, values) if value is not None]
+            conn.executemany("UPDATE lot_images SET dhash = ? WHERE id = ?", updates)
+            conn.commit()
+            hashed += len(updates)
+    return hashed, len(missing) - hashed
+
+
+def intake_lots(conn, args):
+    if args.lot_ids:
+        return args.lot_ids
+    conditions, params = [], []
+    for column, value in (("auction_id", args.auction_id), ("seller_id", args.seller_id), ("status", args.status)):
+        if value is not None:
+            conditions.append(f"{column} = ?")
+            params.append(value)
+    if args.since:
+        conditions.append("created_at >= ?")
+        params.append(args.since)
+    where = " AND ".join(conditions)
+    return [row[0] for row in conn.execute(f'''
+        SELECT id FROM main.lots WHERE {where} AND is_archived IS NOT 1
+        UNION ALL
+        SELECT id FROM {archive.SCHEMA}.lots WHERE {where}
+        ORDER BY id
+    ''', params * 2)]
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    if not (args.lot_ids or args.auction_id or args.seller_id or args.since or args.status):
+        sys.exit("Choose an intake: lot ids, --auction-id, --seller-id, --since or --status")
+    db_path = Path(args.db)
+    archive_path = Path(args.archive_db or os.getenv("FOTHERBYS_ARCHIVE_DB",
+                                                      db_path.with_name(f"{db_path.stem}_archive.db")))
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"ATTACH DATABASE ? AS {archive.SCHEMA}", (str(archive_path),))
+    if "dhash" not in {row[1] for row in conn.execute("PRAGMA main.table_info(lot_images)")}:
+        sys.exit(f"{db_path} has no image hashes; start the API once against it to migrate it")
+
+    start = time.perf_counter()
+    hashed, unreadable = backfill(conn, Path(args.upload_root), args.workers)
+    print(f"Hashed {hashed:,} images ({unreadable:,} missing or unreadable) in {time.perf_counter() - start:.1f}s",
+          file=sys.stderr)
+
+    start = time.perf_counter()
+    index = duplicates.DuplicateIndex()
+    index.ensure_loaded(conn)
+    lot_ids = intake_lots(conn, args)
+    intake = set(lot_ids)
+    reports = []
+    for lot_id in lot_ids:
+        report = duplicates.find(conn, index, lot_id, args.max_distance)
+        # A match inside the intake was already listed under the lower id
+        report["matches"] = [m for m in report["matches"] if not (m["id"] in intake and m["id"] < lot_id)]
+        if report["matches"]:
+            reports.append(report)
+    stats = index.stats()
+    print(f"Checked {len(lot_ids):,} lots against {stats['images']:,} hashed images in "
+          f"{time.perf_counter() - start:.1f}s; {len(reports):,} with possible duplicates", file=sys.stderr)
+
+    if args.json:
+        json.dump(reports, sys.stdout, indent=1, default=str)
+        print()
+    else:
+        lots = duplicates.lots_by_id(conn, [report["lot_id"] for report in reports])
+        for report in reports:
+            lot = lots.get(report["lot_id"], {})
+            print(f"Lot {report['lot_id']} {lot.get('lot_reference')}: {lot.get('artist')}, {lot.get('title')}")
+            for match in report["matches"]:
+                print(f"    distance {match['distance']:>2}  lot {match['id']} {match['lot_reference']}  "
+                      f"{match['artist']}, {match['title']}  ({match['status']}"
+                      f"{', archived' if match['archived'] else ''}, seller {match['seller_id']})")
+    conn.close()
@@ -14,12 +14,12 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 def get_password_hash(password):
     return pwd_context.hash(password)
 
-def init_database():
+def init_database(db_path='data/fotherbys.db', seed=True):
     """Initialize SQLite database with schema for Fotherby's Auction House"""
     
-    os.makedirs('data', exist_ok=True)
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
     
-    conn = sqlite3.connect('data/fotherbys.db')
+    conn = sqlite3.connect(db_path)
     conn.execute("PRAGMA foreign_keys = ON")
     cursor = conn.cursor()
     
@@ -34,7 +34,7 @@ def init_database():
         start_time TEXT NOT NULL CHECK(start_time IN ('9:30am', '2:00pm', '7:00pm')),
         theme TEXT,
         auction_type TEXT DEFAULT 'Physical' CHECK(auction_type IN ('Physical', 'Online')),
-        status TEXT DEFAULT 'Upcoming' CHECK(status IN ('Upcoming', 'Completed', 'Cancelled')),
+        status TEXT DEFAULT 'Upcoming' CHECK(status IN ('Upcoming', 'Live', 'Completed', 'Cancelled')),
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         is_archived BOOLEAN DEFAULT 0
@@ -149,7 +149,8 @@ def init_database():
     print("✓ Database schema updated successfully")
     
     # 3. Seed Data
-    seed_data(cursor, conn)
+    if seed:
+        seed_data(cursor, conn)
     
     conn.close()
 
@@ -0,0 +1,43 @@
+import importlib
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+STAFF_PASSWORD = "password123"
+
+
+@pytest.fixture(scope="session")
+def api_main(tmp_path_factory):
+    """api.main against a small generated database of its own, with the periodic background jobs off."""
+    from scripts.generate_load_data import generate
+
+    db_path = tmp_path_factory.mktemp("api") / "fotherbys.db"
+    generate(str(db_path), lots=400, password=STAFF_PASSWORD)
+    env = {"FOTHERBYS_DB": str(db_path), "SECRET_KEY": "test-secret", "FOTHERBYS_ADMISSION_CONTROL": "0",
+           "FOTHERBYS_CATALOGUE_SNAPSHOTS": "0", "FOTHERBYS_BACKUP_INTERVAL_S": "0",
+           "FOTHERBYS_STORAGE_GC_INTERVAL_S": "0"}
+    saved = {name: os.environ.get(name) for name in env}
+    os.environ.update(env)
+    try:
+        yield importlib.import_module("api.main")
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+@pytest.fixture(scope="session")
+def client(api_main):
+    from fastapi.testclient import TestClient
+    from scripts.generate_load_data import STAFF_EMAIL
+
+    with TestClient(api_main.app) as client:
+        token = client.post("/api/auth/token", data={"username": STAFF_EMAIL, "password": STAFF_PASSWORD})
+        client.staff_headers = {"Authorization": f"Bearer {token.json()['access_token']}"}
+        yield client
@@ -0,0 +1,142 @@
+import asyncio
+
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from api import admission
+from api.admission import AdmissionControl, AdmissionMiddleware, Rule, client_key
+
+
+def rule(**kwargs):
+    return Rule("test", {"GET"}, r"/api/", **{"rate": 1, "burst": 2, **kwargs})
+
+
+def test_bucket_allows_burst_then_reports_wait():
+    control = AdmissionControl([rule(rate=2, burst=3)])
+    r = control.rules[0]
+    assert [control.take_token(r, "a", now=0) for _ in range(3)] == [0, 0, 0]
+    assert control.take_token(r, "a", now=0) == 0.5
+    assert control.take_token(r, "b", now=0) == 0  # other clients have their own bucket
+
+
+def test_bucket_refills_at_rate_up_to_burst():
+    control = AdmissionControl([rule(rate=2, burst=3)])
+    r = control.rules[0]
+    for _ in range(3):
+        control.take_token(r, "a", now=0)
+    assert control.take_token(r, "a", now=0.5) == 0
+    assert control.take_token(r, "a", now=0.5) > 0
+    assert [control.take_token(r, "a", now=100) for _ in range(4)][:3] == [0, 0, 0]
+    assert control.take_token(r, "a", now=100) > 0
+
+
+def test_least_recently_used_bucket_is_evicted(monkeypatch):
+    monkeypatch.setattr(admission, "MAX_BUCKETS", 2)
+    control = AdmissionControl([rule(burst=1)])
+    r = control.rules[0]
+    control.take_token(r, "a", now=0)
+    control.take_token(r, "b", now=0)
+    control.take_token(r, "a", now=0)  # a is now the most recent
+    control.take_token(r, "c", now=0)
+    assert [client for _, client in control._buckets] == ["a", "c"]
+
+
+def scope(address="10.0.0.1", token=None):
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    return {"client": (address, 1234), "headers": headers}
+
+
+def test_client_key_ignores_unverified_tokens():
+    assert client_key(scope(token="random")) == "addr:10.0.0.1"
+    assert client_key(scope(token="random"), identify=lambda token: None) == "addr:10.0.0.1"
+    assert client_key({"headers": []}) == "addr:unknown"
+
+
+def test_client_key_uses_verified_subject_at_address():
+    identify = {"good": "staff@fotherbys.com"}.get
+    assert client_key(scope(token="good"), identify) == "user:staff@fotherbys.com@10.0.0.1"
+    assert client_key(scope("10.0.0.2", token="good"), identify) == "user:staff@fotherbys.com@10.0.0.2"
+    assert client_key(scope(token="bad"), identify) == "addr:10.0.0.1"
+
+
+def test_acquire_without_concurrency_limit_always_admits():
+    r = rule()
+    assert asyncio.run(r.acquire())
+    assert r.in_flight == 0
+
+
+def test_acquire_sheds_when_queue_is_full():
+    async def run():
+        r = rule(concurrency=1, max_queue=0)
+        assert await r.acquire()
+        assert not await r.acquire()
+        r.release()
+        assert await r.acquire()
+        return r
+    r = asyncio.run(run())
+    assert r.counts["overloaded"] == 1
+    assert r.in_flight == 1
+
+
+def test_release_hands_slot_to_the_next_waiter():
+    async def run():
+        r = rule(concurrency=1, max_queue=2, queue_timeout_s=1)
+        assert await r.acquire()
+        waiters = [asyncio.create_task(r.acquire()) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert len(r.waiters) == 2
+        r.release()
+        assert await waiters[0]
+        r.release()
+        assert await waiters[1]
+        r.release()
+        return r
+    r = asyncio.run(run())
+    assert r.in_flight == 0
+    assert r.counts["queued"] == 2
+
+
+def test_queued_request_times_out():
+    async def run():
+        r = rule(concurrency=1, max_queue=1, queue_timeout_s=0.01)
+        await r.acquire()
+        assert not await r.acquire()
+        return r
+    r = asyncio.run(run())
+    assert r.counts["queue_timeouts"] == 1
+    assert not r.waiters
+    assert r.in_flight == 1
+
+
+def client_for(control):
+    app = Starlette(routes=[Route("/api/items", lambda request: PlainTextResponse("ok")),
+                            Route("/health", lambda request: PlainTextResponse("ok"))])
+    app.add_middleware(AdmissionMiddleware, control=control)
+    return TestClient(app)
+
+
+def test_middleware_rate_limits_per_client_with_retry_after():
+    control = AdmissionControl([Rule("items", {"GET"}, r"/api/", rate=0.5, burst=2)])
+    client = client_for(control)
+    assert [client.get("/api/items").status_code for _ in range(2)] == [200, 200]
+    response = client.get("/api/items")
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "2"
+    assert client.get("/health").status_code == 200  # no rule matches
+    assert control.rules[0].counts["rate_limited"] == 1
+
+
+def test_middleware_gives_random_tokens_no_extra_burst():
+    control = AdmissionControl([Rule("items", {"GET"}, r"/api/", rate=0.01, burst=2)], identify=lambda token: None)
+    client = client_for(control)
+    codes = [client.get("/api/items", headers={"Authorization": f"Bearer {i}"}).status_code for i in range(5)]
+    assert codes == [200, 200, 429, 429, 429]
+    assert len(control._buckets) == 1
+
+
+def test_middleware_can_be_disabled():
+    control = AdmissionControl([Rule("items", {"GET"}, r"/api/", rate=0.01, burst=1)], enabled=False)
+    client = client_for(control)
+    assert {client.get("/api/items").status_code for _ in range(3)} == {200}
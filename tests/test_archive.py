@@ -0,0 +1,136 @@
+import sqlite3
+
+import pytest
+
+from api import archive
+from api.database import DatabaseWriter
+
+LOT_TABLE = ("lots (id INTEGER PRIMARY KEY, lot_reference TEXT UNIQUE NOT NULL, artist TEXT, "
+             "estimate_low REAL DEFAULT 0, is_archived INTEGER DEFAULT 0)")
+AUCTION_TABLE = "auctions (id INTEGER PRIMARY KEY, title TEXT, is_archived INTEGER DEFAULT 0)"
+
+
+class Crash(Exception):
+    pass
+
+
+class CrashingWriter:
+    """Runs the first `commits` jobs through writer, then dies as the process would."""
+
+    def __init__(self, writer, commits):
+        self.writer = writer
+        self.commits = commits
+
+    def run(self, job):
+        if self.commits == 0:
+            raise Crash
+        self.commits -= 1
+        return self.writer.run(job)
+
+
+@pytest.fixture
+def writer(tmp_path):
+    db_path, archive_path = tmp_path / "fotherbys.db", tmp_path / "fotherbys_archive.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(f"CREATE TABLE {LOT_TABLE}")
+    conn.execute(f"CREATE TABLE {AUCTION_TABLE}")
+    conn.executemany("INSERT INTO lots (id, lot_reference, artist, estimate_low) VALUES (?, ?, ?, ?)",
+                     [(1, "LOT-1", "Bridget Riley", 5000), (2, "LOT-2", "Frank Auerbach", 8000)])
+    conn.execute("INSERT INTO auctions (id, title) VALUES (1, 'Spring Sale')")
+    conn.commit()
+    conn.close()
+    writer = DatabaseWriter(db_path, attach={archive.SCHEMA: archive_path})
+    writer.start()
+    writer.run(archive.ensure_schema)
+    yield writer
+    writer.stop()
+
+
+def ids(writer, schema, table="lots"):
+    return writer.run(lambda conn: [row[0] for row in conn.execute(f"SELECT id FROM {schema}.{table} ORDER BY id")])
+
+
+def lot(writer, schema, lot_id):
+    row = writer.run(lambda conn: conn.execute(
+        f"SELECT lot_reference, artist, estimate_low FROM {schema}.lots WHERE id = ?", (lot_id,)).fetchone())
+    return tuple(row) if row else None
+
+
+def test_ensure_schema_copies_columns_and_adds_new_ones(writer):
+    assert writer.run(lambda conn: archive.columns(conn, archive.SCHEMA, "lots")) == \
+        ["id", "lot_reference", "artist", "estimate_low", "is_archived"]
+    writer.run(lambda conn: conn.execute("ALTER TABLE main.lots ADD COLUMN medium TEXT DEFAULT 'Oil'"))
+    writer.run(archive.ensure_schema)
+    assert writer.run(lambda conn: archive.columns(conn, archive.SCHEMA, "lots"))[-1] == "medium"
+
+
+def test_archive_and_restore_round_trip(writer):
+    before = lot(writer, "main", 1)
+    assert archive.archive_row(writer, "lots", 1)
+    assert ids(writer, "main") == [2]
+    assert ids(writer, archive.SCHEMA) == [1]
+    assert lot(writer, archive.SCHEMA, 1) == before
+
+    assert archive.restore_row(writer, "lots", 1)
+    assert ids(writer, "main") == [1, 2]
+    assert ids(writer, archive.SCHEMA) == []
+    assert lot(writer, "main", 1) == before
+    assert writer.run(lambda conn: conn.execute("SELECT is_archived FROM main.lots WHERE id = 1").fetchone()[0]) == 0
+
+
+def test_missing_rows_are_reported(writer):
+    assert not archive.archive_row(writer, "lots", 99)
+    assert not archive.restore_row(writer, "lots", 2)  # live, not archived
+    assert ids(writer, "main") == [1, 2]
+
+
+def test_restore_refuses_a_taken_unique_value(writer):
+    archive.archive_row(writer, "lots", 1)
+    writer.run(lambda conn: conn.execute("INSERT INTO main.lots (id, lot_reference) VALUES (3, 'LOT-1')"))
+    with pytest.raises(sqlite3.IntegrityError):
+        archive.restore_row(writer, "lots", 1)
+    assert ids(writer, archive.SCHEMA) == [1]  # still archived, nothing lost
+
+
+def test_reconcile_finishes_an_interrupted_archive(writer):
+    with pytest.raises(Crash):
+        archive.archive_row(CrashingWriter(writer, commits=1), "lots", 1)
+    assert ids(writer, "main") == [1, 2]  # in both files, flagged in the hot one
+    assert ids(writer, archive.SCHEMA) == [1]
+
+    assert writer.run(archive.reconcile) == {"auctions": 0, "lots": 1}
+    assert ids(writer, "main") == [2]
+    assert lot(writer, archive.SCHEMA, 1) == ("LOT-1", "Bridget Riley", 5000)
+
+
+def test_reconcile_finishes_an_interrupted_restore(writer):
+    archive.archive_row(writer, "lots", 1)
+    with pytest.raises(Crash):
+        archive.restore_row(CrashingWriter(writer, commits=1), "lots", 1)
+    assert ids(writer, "main") == [1, 2]  # in both files, unflagged in the hot one
+    assert ids(writer, archive.SCHEMA) == [1]
+
+    writer.run(archive.reconcile)
+    assert ids(writer, "main") == [1, 2]
+    assert ids(writer, archive.SCHEMA) == []
+    assert lot(writer, "main", 1) == ("LOT-1", "Bridget Riley", 5000)
+
+
+def test_reconcile_when_a_move_never_started(writer):
+    with pytest.raises(Crash):
+        archive.archive_row(CrashingWriter(writer, commits=0), "lots", 1)
+    archive.archive_row(writer, "lots", 2)
+    with pytest.raises(Crash):
+        archive.restore_row(CrashingWriter(writer, commits=0), "lots", 2)
+
+    assert writer.run(archive.reconcile) == {"auctions": 0, "lots": 0}
+    assert ids(writer, "main") == [1]
+    assert ids(writer, archive.SCHEMA) == [2]
+
+
+def test_reconcile_moves_rows_flagged_before_the_archive_existed(writer):
+    writer.run(lambda conn: conn.execute("UPDATE main.auctions SET is_archived = 1"))
+    assert writer.run(archive.reconcile) == {"auctions": 1, "lots": 0}
+    assert ids(writer, "main", "auctions") == []
+    assert ids(writer, archive.SCHEMA, "auctions") == [1]
+    assert writer.run(archive.reconcile) == {"auctions": 0, "lots": 0}  # idempotent
@@ -0,0 +1,50 @@
+import sqlite3
+
+import pytest
+
+from api import artist_search
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE lots (id INTEGER PRIMARY KEY, artist TEXT)")
+    artist_search.ensure_schema(conn)
+    yield conn
+    conn.close()
+
+
+def add(conn, name):
+    conn.execute("INSERT INTO lots (artist) VALUES (?)", (name,))
+    artist_search.index_artist(conn, name)
+
+
+def test_typos_find_the_artist(conn):
+    for name in ("David Hockney", "Gerhard Richter", "Jean-Michel Basquiat"):
+        add(conn, name)
+    assert artist_search.suggest(conn, "Hokney")[0]["artist"] == "David Hockney"
+    assert artist_search.suggest(conn, "Gerhard Richtr")[0]["artist"] == "Gerhard Richter"
+    assert artist_search.suggest(conn, "basquait")[0]["artist"] == "Jean-Michel Basquiat"
+
+
+def test_names_without_lots_are_skipped(conn):
+    add(conn, "David Hockney")
+    add(conn, "Joan Hockney")
+    conn.execute("DELETE FROM lots WHERE artist = 'Joan Hockney'")
+    assert [r["artist"] for r in artist_search.suggest(conn, "Hockney")] == ["David Hockney"]
+
+
+def test_stale_names_do_not_crowd_out_live_ones(conn):
+    # More deleted names than candidate slots, each sharing more trigrams with the query than the live one.
+    for i in range(artist_search.CANDIDATES + 10):
+        add(conn, f"Hockney Hockney {i}")
+    add(conn, "Hockny")
+    conn.execute("DELETE FROM lots WHERE artist LIKE 'Hockney Hockney %'")
+    assert [r["artist"] for r in artist_search.suggest(conn, "Hockney")] == ["Hockny"]
+
+
+def test_rebuild_reindexes_bulk_loaded_lots(conn):
+    conn.execute("INSERT INTO lots (artist) VALUES ('Bridget Riley')")  # bypasses index_artist
+    assert artist_search.suggest(conn, "Bridget Riley") == []
+    artist_search.rebuild(conn)
+    assert artist_search.suggest(conn, "Bridget Riley")[0] == {"artist": "Bridget Riley", "distance": 0}
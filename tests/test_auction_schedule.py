@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from api import auction_schedule
+
+OPEN = ",".join(auction_schedule.OPEN_STATUSES)
+
+
+def listed(client, status):
+    response = client.get("/api/auctions", params={"status": status})
+    assert response.status_code == 200
+    return {auction["id"]: auction["status"] for auction in response.json()}
+
+
+@pytest.mark.parametrize("now, expected", [
+    (datetime(2030, 3, 1, 18, 59, tzinfo=timezone.utc), "Upcoming"),
+    (datetime(2030, 3, 1, 19, 0, tzinfo=timezone.utc), "Live"),
+    (datetime(2030, 3, 1, 23, 59, tzinfo=timezone.utc), "Live"),
+    (datetime(2030, 3, 2, 0, 0, tzinfo=timezone.utc), "Completed"),
+])
+def test_status_at_follows_the_saleroom_clock(now, expected):
+    assert auction_schedule.status_at("2030-03-01", "7:00pm", "London", now) == expected
+
+
+def test_new_york_sale_runs_to_its_own_midnight():
+    starts, ends = auction_schedule.auction_window("2030-03-01", "2:00pm", "New York")
+    assert starts == datetime(2030, 3, 1, 19, 0, tzinfo=timezone.utc)
+    assert ends == datetime(2030, 3, 2, 5, 0, tzinfo=timezone.utc)
+
+
+def test_open_auction_stays_listed_from_upcoming_through_live(client, api_main):
+    auction = client.post("/api/auctions", headers=client.staff_headers, json={
+        "title": "Evening Sale", "location": "London", "auction_date": "2031-06-12", "start_time": "7:00pm"}).json()
+    auction_id = auction["id"]
+    assert auction["status"] == "Upcoming"
+    starts, ends = auction_schedule.auction_window("2031-06-12", "7:00pm", "London")
+
+    def move_clock(now):
+        api_main.db_writer.run(lambda conn: auction_schedule.refresh(conn, now))
+
+    api_main.auction_scheduler.stop()  # its own refreshes would use the real clock
+    try:
+        assert listed(client, OPEN)[auction_id] == "Upcoming"
+        assert listed(client, "Upcoming")[auction_id] == "Upcoming"
+
+        move_clock(starts + timedelta(minutes=1))
+        assert listed(client, OPEN)[auction_id] == "Live"
+        assert auction_id not in listed(client, "Upcoming")
+        assert auction_id not in listed(client, "Completed")
+
+        move_clock(ends)
+        assert auction_id not in listed(client, OPEN)
+        assert listed(client, "Completed")[auction_id] == "Completed"
+    finally:
+        api_main.db_writer.run(lambda conn: conn.execute("DELETE FROM auctions WHERE id = ?", (auction_id,)))
+        api_main.auction_scheduler.start()
@@ -0,0 +1,138 @@
+import fcntl
+import json
+import sqlite3
+
+import pytest
+
+from api import backup
+from api.backup import BackupError, BackupInProgress, BackupManager, snapshots
+from api.database import DatabaseWriter
+
+
+@pytest.fixture
+def databases(tmp_path):
+    db_path, archive_path = tmp_path / "fotherbys.db", tmp_path / "fotherbys_archive.db"
+    for path, ids in ((db_path, range(1, 4)), (archive_path, range(101, 103))):
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("CREATE TABLE lots (id INTEGER PRIMARY KEY, title TEXT)")
+        conn.executemany("INSERT INTO lots VALUES (?, 'Study')", [(i,) for i in ids])
+        conn.commit()
+        conn.close()
+    return db_path, archive_path
+
+
+@pytest.fixture
+def writer(databases):
+    db_path, archive_path = databases
+    writer = DatabaseWriter(db_path, attach={"archive": archive_path})
+    writer.start()
+    yield writer
+    writer.stop()
+
+
+def manager(databases, directory, **options):
+    db_path, archive_path = databases
+    return BackupManager(db_path, {"archive": archive_path}, directory, pause_s=0, **options)
+
+
+def lot_ids(path):
+    conn = sqlite3.connect(path)
+    try:
+        return [row[0] for row in conn.execute("SELECT id FROM lots ORDER BY id")]
+    finally:
+        conn.close()
+
+
+def test_snapshot_copies_both_databases(databases, tmp_path):
+    backups = manager(databases, tmp_path / "backups", pages_per_step=1)
+    manifest = backups.run()
+    snapshot = tmp_path / "backups" / manifest["name"]
+    assert lot_ids(snapshot / "fotherbys.db") == [1, 2, 3]
+    assert lot_ids(snapshot / "fotherbys_archive.db") == [101, 102]
+    assert manifest["integrity_check"] == "ok"
+    assert manifest["files"]["main"]["steps"] >= manifest["files"]["main"]["pages"]  # one page per step
+    conn = sqlite3.connect(snapshot / "fotherbys.db")
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"  # self-contained, no -wal file
+    conn.close()
+    assert backups.list() == [json.loads((snapshot / "manifest.json").read_text())]
+    assert not backups.due(3600) and backups.due(0)
+    assert not list((tmp_path / "backups").glob(".*.tmp"))
+
+
+def test_both_files_are_pinned_before_copying(databases, writer, tmp_path, monkeypatch):
+    """A commit during the copy reaches neither file of the snapshot, so they stay consistent."""
+    copy_schema = backup.copy_schema
+    moved = []
+
+    def copy_then_move_a_lot(source, schema, *args):
+        if not moved:  # the way archive_row moves lot 3, committed while main is being copied
+            writer.run(lambda conn: conn.execute("INSERT INTO archive.lots SELECT * FROM main.lots WHERE id = 3"))
+            writer.run(lambda conn: conn.execute("DELETE FROM main.lots WHERE id = 3"))
+            moved.append(schema)
+        return copy_schema(source, schema, *args)
+
+    monkeypatch.setattr(backup, "copy_schema", copy_then_move_a_lot)
+    backups = manager(databases, tmp_path / "backups", writer=writer)
+    snapshot = tmp_path / "backups" / backups.run()["name"]
+    assert lot_ids(snapshot / "fotherbys.db") == [1, 2, 3]
+    assert lot_ids(snapshot / "fotherbys_archive.db") == [101, 102]  # not [3, 101, 102]
+    assert lot_ids(databases[0]) == [1, 2]
+    assert lot_ids(databases[1]) == [3, 101, 102]
+
+
+def test_failed_integrity_check_keeps_nothing(databases, tmp_path):
+    conn = sqlite3.connect(databases[1])
+    conn.execute("CREATE INDEX archive_title ON lots (id)")
+    conn.execute("PRAGMA writable_schema = ON")  # the index no longer matches what it claims to cover
+    conn.execute("UPDATE sqlite_master SET sql = 'CREATE INDEX archive_title ON lots (title)' "
+                 "WHERE name = 'archive_title'")
+    conn.commit()
+    conn.close()
+
+    backups = manager(databases, tmp_path / "backups")
+    with pytest.raises(BackupError, match="integrity_check failed for archive"):
+        backups.run()
+    assert list((tmp_path / "backups").iterdir()) == [tmp_path / "backups" / ".lock"]
+    assert backups.list() == []
+    assert (backups.runs, backups.failures) == (1, 1)
+    assert "integrity_check failed" in backups.last_error["error"]
+
+
+def test_concurrent_backup_is_refused(databases, tmp_path):
+    directory = tmp_path / "backups"
+    directory.mkdir()
+    backups = manager(databases, directory)
+    with open(directory / ".lock", "w") as held:
+        fcntl.flock(held, fcntl.LOCK_EX | fcntl.LOCK_NB)  # another worker, or the CLI, mid-backup
+        with pytest.raises(BackupInProgress):
+            backups.run()
+    assert (backups.runs, backups.failures) == (0, 0)
+    assert backups.list() == []
+    assert backups.run()["integrity_check"] == "ok"  # free again once released
+
+
+def test_rotation_removes_only_completed_snapshots_beyond_keep(databases, tmp_path):
+    directory = tmp_path / "backups"
+    names = [f"2026010{day}T030000Z" for day in range(1, 6)]
+    for name in names:
+        (directory / name).mkdir(parents=True)
+        (directory / name / "manifest.json").write_text(json.dumps({"name": name}))
+    unfinished = directory / "20251231T030000Z"  # no manifest: not a snapshot
+    unfinished.mkdir()
+    in_progress = directory / ".20260106T030000Z.tmp"
+    in_progress.mkdir()
+    keepsake = directory / "README"
+    keepsake.write_text("restore with scripts/backup_database.py")
+
+    manager(databases, directory, keep=2).rotate()
+    assert [path.name for path in snapshots(directory)] == [names[4], names[3]]
+    assert unfinished.exists() and in_progress.exists() and keepsake.exists()
+
+
+def test_run_rotates(databases, tmp_path):
+    directory = tmp_path / "backups"
+    (directory / "20200101T000000Z").mkdir(parents=True)
+    (directory / "20200101T000000Z" / "manifest.json").write_text("{}")
+    manifest = manager(databases, directory, keep=1).run()
+    assert [path.name for path in snapshots(directory)] == [manifest["name"]]
@@ -0,0 +1,86 @@
+import sqlite3
+
+import pytest
+
+from api.comparables import ComparablesIndex, round_estimate
+
+pytest.importorskip("numpy")
+
+LOT_TABLE = ("lots (id INTEGER PRIMARY KEY, artist TEXT, title TEXT, category TEXT, medium TEXT, "
+             "height REAL, width REAL, depth REAL, status TEXT, sold_price REAL)")
+SALES = [
+    # id, artist, category, medium, sold_price
+    (1, "Bridget Riley", "Painting", "Acrylic", 10_000),
+    (2, "Bridget Riley", "Painting", "Acrylic", 12_000),
+    (3, "Bridget Riley", "Drawing", "Pencil", 14_000),
+    (4, "Henry Moore", "Sculpture", None, 400_000),
+    (5, "Barbara Hepworth", "Sculpture", None, 600_000),
+]
+
+
+@pytest.fixture
+def index():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("ATTACH DATABASE ':memory:' AS archive")
+    for schema in ("main", "archive"):
+        conn.execute(f"CREATE TABLE {schema}.{LOT_TABLE}")
+    for lot_id, artist, category, medium, price in SALES:
+        schema = "archive" if lot_id == 5 else "main"
+        conn.execute(f"INSERT INTO {schema}.lots VALUES (?, ?, 'Untitled', ?, ?, 50, 40, NULL, 'Sold', ?)",
+                     (lot_id, artist, category, medium, price))
+    conn.execute("INSERT INTO lots VALUES (6, 'Bridget Riley', 'Unsold', 'Painting', NULL, 50, 40, NULL, 'Unsold', NULL)")
+    index = ComparablesIndex()
+    index.ensure_loaded(conn)
+    conn.close()
+    return index
+
+
+def test_empty_index_has_no_estimate():
+    assert ComparablesIndex().query(artist="Bridget Riley") == {
+        "comparables": [], "suggested_estimate": None, "based_on": 0}
+
+
+def test_loads_hot_and_archived_sales(index):
+    assert len(index) == 5
+
+
+def test_estimate_comes_from_the_same_artist(index):
+    result = index.query(artist="bridget riley", category="Painting", k=5)
+    assert [lot["id"] for lot in result["comparables"]][:3] == [1, 2, 3]
+    assert result["based_on"] == 3  # the two sculptures are listed but not priced from
+    estimate = result["suggested_estimate"]
+    assert 10_000 <= estimate["low"] <= estimate["median"] <= estimate["high"] <= 14_000
+
+
+def test_same_category_counts_without_the_artist(index):
+    result = index.query(artist="Antony Gormley", category="Sculpture", k=5)
+    assert result["based_on"] == 2
+    assert 400_000 <= result["suggested_estimate"]["median"] <= 600_000
+
+
+def test_unrelated_lot_gets_no_estimate(index):
+    # Only the medium and size match anything; neither artist nor category is known.
+    result = index.query(artist="Yayoi Kusama", category="Photography", medium="Acrylic", height=50, width=40)
+    assert result["comparables"]  # nearest sales are still shown
+    assert result["suggested_estimate"] is None
+    assert result["based_on"] == 0
+
+
+def test_excluded_lot_is_not_its_own_comparable(index):
+    result = index.query(artist="Bridget Riley", k=5, exclude_id=3)
+    assert 3 not in [lot["id"] for lot in result["comparables"]]
+    assert result["based_on"] == 2
+
+
+def test_sales_recorded_later_are_added(index):
+    index.add({"id": 7, "artist": "Yayoi Kusama", "title": "Pumpkin", "category": "Sculpture", "medium": None,
+               "height": 30, "width": 30, "depth": 30, "sold_price": 250_000})
+    result = index.query(artist="Yayoi Kusama", category="Photography")
+    assert result["comparables"][0]["id"] == 7
+    assert result["suggested_estimate"]["median"] == 250_000
+
+
+@pytest.mark.parametrize("value, expected", [(0, 0), (1234, 1200), (15_678, 16_000), (987_654, 990_000)])
+def test_round_estimate(value, expected):
+    assert round_estimate(value) == expected
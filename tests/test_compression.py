@@ -0,0 +1,145 @@
+import gzip
+import json
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from api.compression import CompressionControl, CompressionMiddleware, negotiate, tag_etag
+
+BODY = {"lots": [{"id": i, "title": f"Lot {i}", "artist": "Gerhard Richter"} for i in range(200)]}
+ETAG = '"catalogue-v1"'
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip", "gzip"),
+    ("gzip, br", "br"),  # earlier in available wins a tie
+    ("br;q=0.5, gzip", "gzip"),
+    ("*", "br"),
+    ("*;q=0, gzip;q=0.1", "gzip"),
+    ("gzip;q=0", None),
+    ("identity", None),
+    ("", None),
+    ("GZIP;Q=1", "gzip"),
+    ("gzip;q=bogus, br;q=0.2", "br"),
+])
+def test_negotiate(header, expected):
+    assert negotiate(header, ("br", "gzip")) == expected
+
+
+def test_negotiate_only_offers_available_encodings():
+    assert negotiate("br", ("gzip",)) is None
+    assert negotiate("br, *;q=0.1", ("gzip",)) == "gzip"
+
+
+def test_tag_etag():
+    assert tag_etag('"abc"', "gzip") == '"abc-gz"'
+    assert tag_etag('"abc"', "br") == '"abc-br"'
+    assert tag_etag('W/"abc"', "gzip") == 'W/"abc-gz"'
+    assert tag_etag("unquoted", "gzip") == "unquoted"
+
+
+def catalogue(request):
+    if request.headers.get("if-none-match") == ETAG:
+        return Response(status_code=304, headers={"ETag": ETAG})
+    return JSONResponse(BODY, headers={"ETag": ETAG})
+
+
+def stream(request):
+    return StreamingResponse((f"row {i}\n".encode() for i in range(5000)), media_type="text/csv")
+
+
+@pytest.fixture
+def control():
+    return CompressionControl(minimum_size=500)
+
+
+@pytest.fixture
+def client(control):
+    app = Starlette(routes=[
+        Route("/catalogue", catalogue),
+        Route("/stream", stream),
+        Route("/small", lambda request: JSONResponse({"ok": True})),
+        Route("/missing", lambda request: JSONResponse({"detail": "x" * 2000}, status_code=404)),
+        Route("/image", lambda request: Response(b"\x89PNG" * 1000, media_type="image/png")),
+    ])
+    app.add_middleware(CompressionMiddleware, control=control)
+    return TestClient(app)
+
+
+def raw(client, path, **headers):
+    """Response with the body as sent, not decoded by the client."""
+    with client.stream("GET", path, headers={"Accept-Encoding": "gzip", **headers}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+def test_large_json_is_gzipped(client, control):
+    response, body = raw(client, "/catalogue")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) == len(body)
+    assert json.loads(gzip.decompress(body)) == BODY
+    assert control.counts["compressed"] == 1
+
+
+def test_compressed_body_is_cached_by_etag(client, control):
+    first, first_body = raw(client, "/catalogue")
+    second, second_body = raw(client, "/catalogue")
+    assert first.headers["etag"] == second.headers["etag"] == tag_etag(ETAG, "gzip")
+    assert first_body == second_body
+    assert control.counts["compressed"] == 1
+    assert control.counts["cache_hits"] == 1
+
+
+def test_if_none_match_on_compressed_etag_revalidates(client):
+    response, body = raw(client, "/catalogue", **{"If-None-Match": tag_etag(ETAG, "gzip")})
+    assert response.status_code == 304
+    assert response.headers["etag"] == tag_etag(ETAG, "gzip")
+    assert body == b""
+
+
+def test_client_without_gzip_gets_identity(client, control):
+    response, body = raw(client, "/catalogue", **{"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"] == ETAG
+    assert json.loads(body) == BODY
+    assert control.counts["not_accepted"] == 1
+
+
+def test_stream_is_compressed_chunk_by_chunk(client, control):
+    response, body = raw(client, "/stream")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert gzip.decompress(body) == b"".join(f"row {i}\n".encode() for i in range(5000))
+    assert control.counts["streamed"] == 1
+
+
+@pytest.mark.parametrize("path", ["/small", "/missing", "/image"])
+def test_ineligible_responses_pass_through(client, control, path):
+    response, _ = raw(client, path)
+    assert "content-encoding" not in response.headers
+    assert control.bytes_in == 0
+
+
+def test_disabled_control_leaves_responses_alone(client, control):
+    control.enabled = False
+    response, body = raw(client, "/catalogue")
+    assert "content-encoding" not in response.headers
+    assert json.loads(body) == BODY
+
+
+def test_cache_evicts_least_recently_used():
+    control = CompressionControl(cache_bytes=800)
+    for name in "abc":
+        control.store((name, ETAG, "gzip"), b"x" * 100, 1000)
+    control.cached(("a", ETAG, "gzip"))
+    control.store(("big", ETAG, "gzip"), b"x" * 101, 1000)  # over cache_bytes // 8: not kept
+    for name in "defghij":
+        control.store((name, ETAG, "gzip"), b"x" * 100, 1000)
+    assert control.cached(("big", ETAG, "gzip")) is None
+    assert control.cached(("b", ETAG, "gzip")) is None
+    assert control.cached(("a", ETAG, "gzip")) is not None  # used since it was stored
+    assert control.stats()["cache_bytes"] <= 800
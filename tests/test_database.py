@@ -0,0 +1,158 @@
+import sqlite3
+import threading
+
+import pytest
+
+from api.database import DatabaseReader, DatabaseWriter, connect_readonly
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "fotherbys.db"
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("CREATE TABLE bids (id INTEGER PRIMARY KEY, amount REAL NOT NULL)")
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def writer(db_path):
+    writer = DatabaseWriter(db_path, group_commit_ms=200)
+    writer.start()
+    yield writer
+    writer.stop()
+
+
+def insert(amount):
+    def job(conn):
+        return conn.execute("INSERT INTO bids (amount) VALUES (?)", (amount,)).lastrowid
+    return job
+
+
+def amounts(db_path):
+    conn = connect_readonly(db_path)
+    try:
+        return [row["amount"] for row in conn.execute("SELECT amount FROM bids ORDER BY id")]
+    finally:
+        conn.close()
+
+
+def test_run_returns_the_result_once_committed(db_path):
+    writer = DatabaseWriter(db_path)
+    writer.start()
+    try:
+        assert writer.run(insert(100)) == 1
+        assert amounts(db_path) == [100]  # visible to another connection
+    finally:
+        writer.stop()
+
+
+def test_run_raises_the_jobs_exception(db_path):
+    writer = DatabaseWriter(db_path)
+    writer.start()
+    try:
+        with pytest.raises(sqlite3.IntegrityError):
+            writer.run(insert(None))
+
+        def fail(conn):
+            raise ValueError("reserve not met")
+        with pytest.raises(ValueError, match="reserve not met"):
+            writer.run(fail)
+        assert writer.run(insert(5)) == 1  # the writer is still usable
+    finally:
+        writer.stop()
+
+
+def test_failing_job_rolls_back_only_its_own_savepoint(writer, db_path):
+    def partial_then_fail(conn):
+        conn.execute("INSERT INTO bids (amount) VALUES (999)")
+        raise ValueError("bidder suspended")
+
+    futures = [writer.submit(insert(100)), writer.submit(partial_then_fail), writer.submit(insert(300))]
+    assert futures[0].result() == 1
+    with pytest.raises(ValueError, match="bidder suspended"):
+        futures[1].result()
+    assert futures[2].result() == 2  # 999 was rolled back before this insert
+    assert amounts(db_path) == [100, 300]
+    stats = writer.stats()
+    assert stats["batch_sizes"] == {3: 1}  # committed together
+    assert (stats["jobs"], stats["failed_jobs"], stats["commits"]) == (3, 1, 1)
+
+
+def test_max_batch_splits_groups(db_path):
+    writer = DatabaseWriter(db_path, group_commit_ms=200, max_batch=2)
+    writer.start()
+    try:
+        futures = [writer.submit(insert(i)) for i in range(5)]
+        assert [future.result() for future in futures] == [1, 2, 3, 4, 5]
+        assert writer.stats()["batch_sizes"] == {1: 1, 2: 2}
+    finally:
+        writer.stop()
+
+
+def test_stop_drains_queued_jobs(db_path):
+    writer = DatabaseWriter(db_path)
+    writer.start()
+    release = threading.Event()
+
+    def slow(conn):
+        release.wait(5)
+        return "slow"
+
+    first = writer.submit(slow)
+    queued = [writer.submit(insert(i)) for i in range(10)]
+    stopper = threading.Thread(target=writer.stop)
+    stopper.start()
+    release.set()
+    stopper.join(5)
+    assert not stopper.is_alive()
+    assert first.result(0) == "slow"
+    assert [future.result(0) for future in queued] == list(range(1, 11))
+    assert amounts(db_path) == list(range(10))
+    with pytest.raises(RuntimeError):
+        writer.submit(insert(1))
+
+
+def test_cancelled_jobs_are_skipped(db_path):
+    writer = DatabaseWriter(db_path)
+    writer.start()
+    release = threading.Event()
+    try:
+        blocker = writer.submit(lambda conn: release.wait(5))
+        cancelled = writer.submit(insert(1))
+        assert cancelled.cancel()
+        release.set()
+        blocker.result(5)
+        writer.run(insert(2))
+        assert amounts(db_path) == [2]
+    finally:
+        writer.stop()
+
+
+def test_readonly_connections_refuse_writes(db_path, tmp_path):
+    archive_path = tmp_path / "fotherbys_archive.db"
+    archive_conn = sqlite3.connect(archive_path)
+    archive_conn.execute("CREATE TABLE bids (id INTEGER PRIMARY KEY, amount REAL)")
+    archive_conn.close()
+    conn = connect_readonly(db_path, attach={"archive": archive_path})
+    try:
+        for table in ("main.bids", "archive.bids"):
+            with pytest.raises(sqlite3.OperationalError, match="readonly"):
+                conn.execute(f"INSERT INTO {table} (amount) VALUES (1)")
+    finally:
+        conn.close()
+
+
+def test_reader_pool_refuses_writes(db_path):
+    reader = DatabaseReader(db_path, threads=2)
+    with pytest.raises(RuntimeError):
+        reader.submit(lambda conn: None)
+    reader.start()
+    try:
+        future = reader.submit(lambda conn: conn.execute("INSERT INTO bids (amount) VALUES (1)"))
+        with pytest.raises(sqlite3.OperationalError, match="readonly"):
+            future.result()
+        assert reader.submit(lambda conn: conn.execute("SELECT COUNT(*) FROM bids").fetchone()[0]).result() == 0
+    finally:
+        reader.stop()
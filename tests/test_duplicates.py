@@ -0,0 +1,84 @@
+import io
+import random
+
+import pytest
+
+from api import duplicates
+from api.duplicates import MultiIndexHash, distance
+
+
+def flip(value, bits):
+    return value ^ sum(1 << bit for bit in bits)
+
+
+@pytest.fixture(scope="module")
+def hashes():
+    rng = random.Random(7)
+    return [rng.getrandbits(64) for _ in range(5000)]
+
+
+@pytest.fixture(scope="module")
+def index(hashes):
+    index = MultiIndexHash()
+    for item, value in enumerate(hashes):
+        index.add(value, item)
+    return index
+
+
+@pytest.mark.parametrize("radius", [0, 3, 4, 8, 11, duplicates.MAX_DISTANCE])
+def test_search_matches_a_linear_scan(hashes, index, radius):
+    rng = random.Random(radius)
+    for source in rng.sample(hashes, 20):
+        query = flip(source, rng.sample(range(64), rng.randint(0, radius + 2)))
+        expected = sorted((distance(value, query), item) for item, value in enumerate(hashes)
+                          if distance(value, query) <= radius)
+        assert sorted(index.search(query, radius)) == expected
+
+
+def test_search_finds_copies_whose_changed_bits_fall_in_every_chunk(index, hashes):
+    # Two bits changed in each 16-bit chunk: no chunk matches exactly.
+    query = flip(hashes[0], [0, 1, 16, 17, 32, 33, 48, 49])
+    assert (8, 0) in index.search(query, 8)
+    assert (8, 0) not in index.search(query, 7)
+
+
+def test_results_are_nearest_first_and_items_are_added_once():
+    index = MultiIndexHash()
+    index.add(0b1111, "far")
+    index.add(0b0001, "near")
+    index.add(0b0001, "near")
+    assert index.search(0, 4) == [(1, "near"), (4, "far")]
+    assert len(index) == 2
+
+
+def test_signed_storage_round_trips():
+    for value in (0, 1, (1 << 63) - 1, 1 << 63, duplicates.MASK):
+        stored = duplicates.to_signed(value)
+        assert -(1 << 63) <= stored < 1 << 63
+        assert stored & duplicates.MASK == value
+
+
+def test_dhash_survives_resizing_and_recompression():
+    Image = pytest.importorskip("PIL.Image")
+    ImageDraw = pytest.importorskip("PIL.ImageDraw")
+
+    def artwork(seed):
+        image = Image.new("RGB", (640, 480), "white")
+        draw, rng = ImageDraw.Draw(image), random.Random(seed)
+        for _ in range(30):
+            x, y = rng.randrange(640), rng.randrange(480)
+            draw.rectangle([x, y, x + rng.randrange(40, 300), y + rng.randrange(40, 200)],
+                           fill=tuple(rng.randrange(256) for _ in range(3)))
+        return image
+
+    def jpeg(image, quality):
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", quality=quality)
+        buffer.seek(0)
+        return buffer
+
+    original = duplicates.hash_file(jpeg(artwork(1), 95))
+    copy = duplicates.hash_file(jpeg(artwork(1).resize((320, 240)), 60))
+    other = duplicates.hash_file(jpeg(artwork(2), 95))
+    assert distance(original, copy) <= duplicates.DEFAULT_DISTANCE
+    assert distance(original, other) > duplicates.DEFAULT_DISTANCE
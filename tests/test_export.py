@@ -0,0 +1,80 @@
+import csv
+import gzip
+import io
+
+import pytest
+
+
+def json_lots(client, **params):
+    response = client.get("/api/lots", params=params)
+    assert response.status_code == 200
+    return {lot["id"]: lot for lot in response.json()}
+
+
+def csv_lots(client, **params):
+    response = client.get("/api/export/lots.csv", params=params, headers=client.staff_headers)
+    assert response.status_code == 200
+    body = gzip.decompress(response.content) if params.get("gzip") else response.content
+    return {int(row["id"]): row for row in csv.DictReader(io.StringIO(body.decode()))}
+
+
+@pytest.fixture(scope="module")
+def sample(client):
+    """Filter values that each select a non-trivial share of the generated lots, and one archived lot."""
+    lot = next(iter(csv_lots(client, status="Sold").values()))  # the JSON listing omits auction and seller ids
+    archived = next(iter(csv_lots(client, status="Listed").values()))
+    response = client.put(f"/api/lots/{archived['id']}/archive", headers=client.staff_headers)
+    assert response.status_code == 200
+    return lot, archived
+
+
+@pytest.fixture
+def filter_sets(sample):
+    lot, archived = sample
+    surname = lot["artist"].split()[-1]
+    return [
+        {"auction_id": int(lot["auction_id"])},
+        {"status": "Sold"},
+        {"status": "Pending", "category": "Sculpture"},
+        {"artist": lot["artist"]},
+        {"artist": surname[:-1] + surname[-1] * 2},  # a misspelling, matched through the trigram index
+        {"seller_id": lot["seller_id"]},
+        {"seller_id": lot["seller_id"], "status": "Sold"},
+        {"archived_only": True},
+        {"archived_only": True, "status": "Listed", "seller_id": archived["seller_id"]},
+    ]
+
+
+def test_lots_export_matches_the_json_listing(client, filter_sets):
+    for params in filter_sets:
+        listed, exported = json_lots(client, **params), csv_lots(client, **params)
+        assert listed, params
+        assert sorted(exported) == sorted(listed), params
+        for lot_id, lot in listed.items():
+            row = exported[lot_id]
+            for column in ("lot_reference", "artist", "title", "category", "medium"):
+                assert row[column] == (lot[column] or ""), (params, column)
+            for column in ("estimate_low", "estimate_high", "sold_price"):
+                assert (float(row[column]) if row[column] else None) == lot[column], (params, column)
+            assert row["auction_title"] == (lot["auction_title"] or ""), params
+            assert row["archived"] == ("1" if params.get("archived_only") else "0")
+            if not params.get("archived_only"):
+                assert row["status"] == lot["status"]
+
+
+def test_archived_lot_moves_between_listings(client, sample):
+    _, archived = sample
+    archived_id = int(archived["id"])
+    assert archived_id not in json_lots(client, status="Listed")
+    assert archived_id not in csv_lots(client, status="Listed")
+    assert archived_id in json_lots(client, archived_only=True)
+    assert archived_id in csv_lots(client, archived_only=True)
+
+
+def test_gzipped_export_has_the_same_rows(client, sample):
+    lot, _ = sample
+    assert csv_lots(client, seller_id=lot["seller_id"], gzip=True) == csv_lots(client, seller_id=lot["seller_id"])
+
+
+def test_export_is_staff_only(client):
+    assert client.get("/api/export/lots.csv").status_code == 401
@@ -0,0 +1,114 @@
+import sqlite3
+from itertools import product
+
+import pytest
+
+from api import lifecycle
+
+STATUSES = list(lifecycle.TRANSITIONS)
+LOT_TABLE = "lots (id INTEGER PRIMARY KEY, status TEXT, seller_id INTEGER, auction_id INTEGER, " \
+            "sold_price REAL, updated_at TEXT)"
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("ATTACH DATABASE ':memory:' AS archive")
+    conn.execute(f"CREATE TABLE main.{LOT_TABLE}")
+    conn.execute(f"CREATE TABLE archive.{LOT_TABLE}")
+    lifecycle.ensure_schema(conn)
+    yield conn
+    conn.close()
+
+
+def add_lot(conn, lot_id, status="Pending", seller_id=7):
+    conn.execute("INSERT INTO lots (id, status, seller_id) VALUES (?, 'Pending', ?)", (lot_id, seller_id))
+    lifecycle.created(conn, lot_id, seller_id)
+    path = {"Pending": [], "Listed": ["Listed"], "Sold": ["Listed", "Sold"], "Unsold": ["Listed", "Unsold"],
+            "Withdrawn": ["Withdrawn"]}[status]
+    for step in path:
+        lifecycle.transition(conn, lot_id, step)
+
+
+def test_every_status_has_transitions_defined():
+    targets = set().union(*lifecycle.TRANSITIONS.values())
+    assert targets <= set(STATUSES)
+    assert lifecycle.TRANSITIONS["Withdrawn"] == set()
+
+
+@pytest.mark.parametrize("from_status, to_status", list(product(STATUSES, STATUSES)))
+def test_transition_is_allowed_only_by_the_table(conn, from_status, to_status):
+    add_lot(conn, 1, from_status)
+    logged = conn.execute("SELECT COUNT(*) FROM lot_events").fetchone()[0]
+    if to_status in lifecycle.TRANSITIONS[from_status]:
+        assert lifecycle.transition(conn, 1, to_status) == from_status
+        assert conn.execute("SELECT status FROM lots WHERE id = 1").fetchone()[0] == to_status
+        assert conn.execute("SELECT COUNT(*) FROM lot_events").fetchone()[0] == logged + 1
+    else:
+        with pytest.raises(lifecycle.TransitionError) as error:
+            lifecycle.transition(conn, 1, to_status)
+        assert (error.value.from_status, error.value.to_status) == (from_status, to_status)
+        assert conn.execute("SELECT status FROM lots WHERE id = 1").fetchone()[0] == from_status
+        assert conn.execute("SELECT COUNT(*) FROM lot_events").fetchone()[0] == logged
+
+
+def test_transition_of_missing_lot_returns_none(conn):
+    assert lifecycle.transition(conn, 99, "Listed") is None
+    assert lifecycle.events(conn) == []
+
+
+def test_transition_sets_columns_and_logs_them(conn):
+    add_lot(conn, 1, "Listed")
+    lifecycle.transition(conn, 1, "Sold", actor_id=3, sold_price=1200.0)
+    lot = conn.execute("SELECT status, sold_price, updated_at FROM lots WHERE id = 1").fetchone()
+    assert (lot["status"], lot["sold_price"]) == ("Sold", 1200.0)
+    assert lot["updated_at"] is not None
+    event = lifecycle.events(conn, lot_id=1)[-1]
+    assert (event["from_status"], event["to_status"], event["price"], event["actor_id"]) == ("Listed", "Sold", 1200.0, 3)
+    assert event["at"].endswith("Z")
+
+
+def test_projections_follow_transitions(conn):
+    add_lot(conn, 1, "Listed", seller_id=7)
+    add_lot(conn, 2, "Sold", seller_id=7)
+    add_lot(conn, 3, "Pending", seller_id=8)
+    assert lifecycle.status_counts(conn) == {"Listed": 1, "Sold": 1, "Pending": 1}
+    assert lifecycle.status_counts(conn, seller_id=7) == {"Listed": 1, "Sold": 1}
+
+    lifecycle.transition(conn, 1, "Withdrawn")
+    assert lifecycle.status_counts(conn, seller_id=7) == {"Withdrawn": 1, "Sold": 1}
+    assert lifecycle.deleted(conn, 3)
+    assert lifecycle.status_counts(conn) == {"Withdrawn": 1, "Sold": 1}
+    assert not lifecycle.deleted(conn, 3)
+
+
+def test_rebuild_projections_matches_the_log_and_counts_archived_lots(conn):
+    for lot_id, status in enumerate(["Pending", "Listed", "Sold", "Sold", "Unsold"], start=1):
+        add_lot(conn, lot_id, status, seller_id=lot_id % 2)
+    conn.execute("INSERT INTO archive.lots SELECT * FROM main.lots WHERE id = 3")
+    conn.execute("DELETE FROM main.lots WHERE id = 3")
+    incremental = (lifecycle.status_counts(conn), lifecycle.status_counts(conn, seller_id=1))
+    lifecycle.rebuild_projections(conn)
+    assert (lifecycle.status_counts(conn), lifecycle.status_counts(conn, seller_id=1)) == incremental
+    assert incremental[0]["Sold"] == 2
+
+
+def test_deleted_removes_archived_lots_too(conn):
+    add_lot(conn, 1, "Sold")
+    conn.execute("INSERT INTO archive.lots SELECT * FROM main.lots WHERE id = 1")
+    conn.execute("DELETE FROM main.lots WHERE id = 1")
+    assert lifecycle.deleted(conn, 1, actor_id=5)
+    assert conn.execute("SELECT COUNT(*) FROM archive.lots").fetchone()[0] == 0
+    assert lifecycle.events(conn, lot_id=1)[-1]["to_status"] is None
+    assert lifecycle.status_counts(conn) == {}
+
+
+def test_events_pages_by_id(conn):
+    for lot_id in range(1, 4):
+        add_lot(conn, lot_id, "Listed")
+    first = lifecycle.events(conn, limit=2)
+    rest = lifecycle.events(conn, since_id=first[-1]["id"])
+    assert [e["id"] for e in first + rest] == [e["id"] for e in lifecycle.events(conn)]
+    assert len(first + rest) == 6
+    assert lifecycle.events(conn, since=2 ** 31) == []
@@ -0,0 +1,88 @@
+import sqlite3
+
+import pytest
+
+from api import portfolio
+
+LOT_TABLE = ("lots (id INTEGER PRIMARY KEY, lot_reference TEXT, artist TEXT, title TEXT, category TEXT, "
+             "estimate_low REAL, estimate_high REAL, reserve_price REAL, sold_price REAL, status TEXT, "
+             "withdrawn_date TEXT, withdrawal_fee REAL DEFAULT 0, auction_id INTEGER, created_at TEXT, "
+             "seller_id INTEGER, is_archived INTEGER DEFAULT 0)")
+AUCTION_TABLE = "auctions (id INTEGER PRIMARY KEY, title TEXT, auction_date TEXT)"
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("ATTACH DATABASE ':memory:' AS archive")
+    for schema in ("main", "archive"):
+        conn.execute(f"CREATE TABLE {schema}.{LOT_TABLE}")
+        conn.execute(f"CREATE TABLE {schema}.{AUCTION_TABLE}")
+    conn.execute("CREATE TABLE lot_images (id INTEGER PRIMARY KEY, lot_id INTEGER, image_url TEXT, "
+                 "thumbnail_url TEXT, is_primary INTEGER DEFAULT 0, display_order INTEGER DEFAULT 0)")
+    conn.execute("INSERT INTO main.auctions VALUES (1, 'Spring Sale', '2026-04-01')")
+    conn.execute("INSERT INTO archive.auctions VALUES (2, 'Old Sale', '2020-04-01')")
+    lots = [
+        # id, status, estimate_low, estimate_high, sold_price, withdrawal_fee, auction_id, seller_id
+        (1, "Sold", 1000, 2000, 1500, 0, 1, 7),
+        (2, "Listed", 3000, 5000, None, 0, 1, 7),
+        (3, "Pending", 100, 200, None, 0, None, 7),
+        (4, "Withdrawn", 500, 800, None, 50, None, 7),
+        (5, "Sold", 900, 1200, 1000, 0, 1, 8),  # another seller
+    ]
+    for lot_id, status, low, high, sold, fee, auction_id, seller_id in lots:
+        conn.execute("INSERT INTO main.lots (id, lot_reference, status, estimate_low, estimate_high, sold_price, "
+                     "withdrawal_fee, auction_id, seller_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                     (lot_id, f"LOT-{lot_id}", status, low, high, sold, fee, auction_id, seller_id))
+    conn.execute("INSERT INTO archive.lots (id, lot_reference, status, estimate_low, estimate_high, sold_price, "
+                 "auction_id, seller_id) VALUES (6, 'LOT-6', 'Sold', 4000, 6000, 5000, 2, 7)")
+    # Lot 1 part-way through an archive move: flagged in the hot table and copied across. Counted once.
+    conn.execute("UPDATE main.lots SET is_archived = 1 WHERE id = 1")
+    conn.execute("INSERT INTO archive.lots SELECT * FROM main.lots WHERE id = 1")
+    conn.executemany("INSERT INTO lot_images (lot_id, image_url, is_primary, display_order) VALUES (?, ?, ?, ?)",
+                     [(2, "/b.jpg", 0, 0), (2, "/a.jpg", 1, 5), (3, "/c.jpg", 0, 2), (3, "/d.jpg", 0, 1)])
+    conn.commit()  # portfolio() opens its own read transaction
+    yield conn
+    conn.close()
+
+
+def test_totals_per_status_and_overall(conn):
+    result = portfolio.portfolio(conn, 7)
+    groups = {group["status"]: group for group in result["groups"]}
+    assert set(groups) == {"Sold", "Listed", "Pending", "Withdrawn"}
+    sold = groups["Sold"]["totals"]
+    assert (sold["lots"], sold["archived"], sold["hammer"]) == (2, 2, 6500)
+    assert (sold["commission"], sold["payout"]) == (650, 5850)
+
+    totals = result["totals"]
+    assert totals["lots"] == 5
+    assert totals["withdrawal_fees"] == 50
+    assert totals["net_payout"] == 5800
+    # Open lots (Listed, Pending) at their estimates, less commission, on top of the net payout.
+    assert totals["expected_payout_low"] == 5800 + (3000 + 100) * 0.9
+    assert totals["expected_payout_high"] == 5800 + (5000 + 200) * 0.9
+
+
+def test_lots_carry_auction_and_primary_image(conn):
+    lots = {lot["id"]: lot for group in portfolio.portfolio(conn, 7)["groups"] for lot in group["lots"]}
+    assert set(lots) == {1, 2, 3, 4, 6}
+    assert lots[2]["image"]["image_url"] == "/a.jpg"  # is_primary beats display order
+    assert lots[3]["image"]["image_url"] == "/d.jpg"  # then display order
+    assert lots[4]["image"] is None
+    assert (lots[6]["archived"], lots[6]["auction_title"]) == (True, "Old Sale")
+    assert (lots[2]["archived"], lots[2]["auction_title"]) == (False, "Spring Sale")
+
+
+def test_totals_only_and_custom_rate(conn):
+    result = portfolio.portfolio(conn, 7, include_lots=False, rate=0.2)
+    assert all(group["lots"] == [] for group in result["groups"])
+    assert result["totals"]["commission"] == 1300
+    assert result["commission_rate"] == 0.2
+
+
+def test_unknown_seller_has_empty_portfolio(conn):
+    result = portfolio.portfolio(conn, 999)
+    assert result["groups"] == []
+    assert result["totals"]["lots"] == 0
+    assert result["totals"]["expected_payout_low"] == 0
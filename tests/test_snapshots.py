@@ -0,0 +1,193 @@
+import fcntl
+import json
+import logging
+import sqlite3
+import time
+
+import pytest
+from starlette.testclient import TestClient
+
+from api import snapshots
+from api.database import DatabaseWriter
+from api.snapshots import CatalogueSnapshots, SnapshotFiles, etag_for
+
+LISTED_WHERE = "status = 'Listed'"
+ESTIMATE_BAND_SQL = "CASE WHEN l.estimate_low < 5000 THEN 'under-5000' ELSE '5000-plus' END"
+
+
+class RacingWriter:
+    """Lets `change` commit after the rebuild has read its marks, just before it clears them."""
+
+    def __init__(self, writer, change):
+        self.writer = writer
+        self.change = change
+
+    def run(self, job):
+        if self.change:
+            self.writer.run(self.change)
+            self.change = None
+        return self.writer.run(job)
+
+
+@pytest.fixture
+def writer(tmp_path):
+    db_path = tmp_path / "fotherbys.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("CREATE TABLE auctions (id INTEGER PRIMARY KEY, title TEXT, location TEXT, auction_date TEXT, "
+                 "start_time TEXT, theme TEXT, auction_type TEXT, status TEXT)")
+    conn.execute("CREATE TABLE lots (id INTEGER PRIMARY KEY, lot_reference TEXT, auction_id INTEGER, artist TEXT, "
+                 "title TEXT, category TEXT, dimensions TEXT, framing_details TEXT, year_of_production TEXT, "
+                 "description TEXT, estimate_low REAL, estimate_high REAL, status TEXT, triage_status TEXT, "
+                 "medium TEXT, material TEXT, weight REAL, height REAL, width REAL, depth REAL, is_framed INTEGER)")
+    conn.execute("CREATE TABLE lot_images (id INTEGER PRIMARY KEY, lot_id INTEGER, image_url TEXT, thumbnail_url TEXT, "
+                 "is_primary INTEGER DEFAULT 0, display_order INTEGER DEFAULT 0)")
+    snapshots.ensure_schema(conn)
+    conn.executemany("INSERT INTO auctions (id, title, location, auction_date, status) VALUES (?, ?, 'London', ?, 'Upcoming')",
+                     [(1, "Modern British", "2030-03-01"), (2, "Old Masters", "2030-04-01")])
+    conn.executemany("INSERT INTO lots (id, lot_reference, auction_id, artist, title, category, estimate_low, status, "
+                     "is_framed) VALUES (?, ?, ?, ?, ?, 'Painting', ?, ?, 1)", [
+                         (1, "A-001", 1, "Bridget Riley", "Cataract", 40000, "Listed"),
+                         (2, "A-002", 1, "Frank Auerbach", "Head of J.Y.M.", 3000, "Listed"),
+                         (3, "A-003", 1, "Frank Auerbach", "Primrose Hill", 9000, "Pending"),
+                         (4, "B-001", 2, "Unknown", "Madonna", 2000, "Listed"),
+                     ])
+    conn.execute("INSERT INTO lot_images (lot_id, image_url, thumbnail_url, is_primary) "
+                 "VALUES (1, '/uploads/lots/1_a.jpg', '/uploads/lots/thumbnails/1_thumb_a.jpg', 1)")
+    conn.commit()
+    conn.close()
+    writer = DatabaseWriter(db_path)
+    writer.start()
+    yield writer
+    writer.stop()
+
+
+@pytest.fixture
+def builder(writer, tmp_path):
+    return CatalogueSnapshots(writer.db_path, {}, tmp_path / "snapshots", writer, LISTED_WHERE, ESTIMATE_BAND_SQL,
+                              poll_s=0.01)
+
+
+def marks(writer):
+    return dict(writer.run(lambda conn: conn.execute("SELECT auction_id, seq FROM catalogue_dirty").fetchall()))
+
+
+def read(builder, name):
+    return json.loads(builder.path(name).read_bytes())
+
+
+def test_triggers_mark_the_affected_auctions(writer):
+    assert marks(writer) == {1: 5, 2: 2}  # inserts of each auction, its lots and images
+    writer.run(lambda conn: conn.execute("DELETE FROM catalogue_dirty"))
+    writer.run(lambda conn: conn.execute("UPDATE lots SET auction_id = 2 WHERE id = 3"))
+    assert marks(writer) == {1: 1, 2: 1}  # moved out of one, into the other
+    writer.run(lambda conn: conn.execute("UPDATE lot_images SET display_order = 1"))
+    assert marks(writer) == {1: 3, 2: 1}  # OLD and NEW rows both belong to auction 1
+
+
+def test_rebuild_writes_documents_and_index(builder, writer):
+    assert builder.rebuild() == 3
+    catalogue = read(builder, 1)
+    assert catalogue["auction"]["title"] == "Modern British"
+    assert [lot["lot_reference"] for lot in catalogue["lots"]] == ["A-001", "A-002"]  # Pending lot left out
+    assert catalogue["lots"][0]["images"] == [{"image_url": "/uploads/lots/1_a.jpg",
+                                               "thumbnail_url": "/uploads/lots/thumbnails/1_thumb_a.jpg"}]
+    assert catalogue["lots"][0]["is_framed"] is True
+    assert catalogue["facets"] == {"category": {"Painting": 2}, "estimate_band": {"5000-plus": 1, "under-5000": 1}}
+    assert [(entry["id"], entry["lots"]) for entry in read(builder, snapshots.INDEX_NAME)["auctions"]] == [(1, 2), (2, 1)]
+    assert marks(writer) == {}
+    assert builder.rebuild() == 0  # nothing marked
+
+
+def test_identical_rebuild_keeps_the_file_and_etag(builder, writer):
+    builder.rebuild()
+    before = {name: (builder.path(name).stat().st_mtime_ns, etag_for(builder.path(name).read_bytes()))
+              for name in (1, 2, snapshots.INDEX_NAME)}
+    time.sleep(0.01)
+    writer.run(snapshots.mark_all)
+    writer.run(lambda conn: conn.execute("UPDATE lots SET triage_status = triage_status WHERE id = 3"))
+    assert builder.rebuild() == 0
+    after = {name: (builder.path(name).stat().st_mtime_ns, etag_for(builder.path(name).read_bytes()))
+             for name in (1, 2, snapshots.INDEX_NAME)}
+    assert after == before
+    assert builder.unchanged == 2
+    assert marks(writer) == {}
+
+
+def test_changed_auction_is_rewritten_alone(builder, writer):
+    builder.rebuild()
+    other = builder.path(2).stat().st_mtime_ns
+    writer.run(lambda conn: conn.execute("UPDATE lots SET title = 'Cataract 3' WHERE id = 1"))
+    assert builder.rebuild() == 1
+    assert read(builder, 1)["lots"][0]["title"] == "Cataract 3"
+    assert builder.path(2).stat().st_mtime_ns == other
+
+
+def test_mark_moved_during_rebuild_is_kept(builder, writer):
+    builder.rebuild()
+    writer.run(lambda conn: conn.execute("UPDATE lots SET title = 'Cataract 3' WHERE id = 1"))
+    builder.writer = RacingWriter(writer, lambda conn: conn.execute("UPDATE lots SET title = 'Cataract 4' WHERE id = 1"))
+
+    assert builder.rebuild() == 1
+    assert read(builder, 1)["lots"][0]["title"] == "Cataract 3"  # built before the second edit
+    assert 1 in marks(writer)  # so the mark stays for the next pass
+
+    builder.writer = writer
+    assert builder.rebuild() == 1
+    assert read(builder, 1)["lots"][0]["title"] == "Cataract 4"
+    assert marks(writer) == {}
+
+
+def test_auction_without_listed_lots_loses_its_snapshot(builder, writer):
+    builder.rebuild()
+    writer.run(lambda conn: conn.execute("UPDATE lots SET status = 'Withdrawn' WHERE auction_id = 2"))
+    assert builder.rebuild() == 2  # the auction's file and the index
+    assert not builder.path(2).exists()
+    assert [entry["id"] for entry in read(builder, snapshots.INDEX_NAME)["auctions"]] == [1]
+    assert builder.removed == 1
+
+    writer.run(lambda conn: conn.execute("DELETE FROM auctions WHERE id = 1"))  # e.g. archived
+    builder.rebuild()
+    assert not builder.path(1).exists()
+    assert read(builder, snapshots.INDEX_NAME)["auctions"] == []
+
+
+def test_rebuild_skips_while_another_worker_holds_the_lock(builder, writer):
+    builder.directory.mkdir(parents=True)
+    with open(builder.directory / ".lock", "w") as held:
+        fcntl.flock(held, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        assert builder.rebuild() is None
+    assert marks(writer) == {1: 5, 2: 2}
+    assert builder.rebuild() == 3
+
+
+def test_failed_rebuild_is_logged_and_recorded(builder, writer, monkeypatch, caplog):
+    def fail(conn, auction_id):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(builder, "document", fail)
+    with caplog.at_level(logging.ERROR, logger="api.snapshots"):
+        builder.start()
+        deadline = time.monotonic() + 5
+        while builder.last_error is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        builder.stop()
+    assert builder.last_error == "disk I/O error"
+    record = next(r for r in caplog.records if r.name == "api.snapshots")
+    assert record.getMessage() == "Catalogue snapshot rebuild failed"
+    assert record.exc_info[0] is sqlite3.OperationalError
+
+
+def test_files_are_served_with_a_strong_etag(builder):
+    builder.rebuild()
+    client = TestClient(SnapshotFiles(builder.directory))
+    response = client.get("/1.json")
+    assert response.status_code == 200
+    assert response.json()["auction"]["id"] == 1
+    etag = response.headers["etag"]
+    assert etag == etag_for(builder.path(1).read_bytes())
+    assert client.get("/1.json", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/index.json").status_code == 200
+    assert client.get("/9.json").status_code == 404
+    assert client.get("/..%2Fsecrets.json").status_code == 404
+    assert client.post("/1.json").status_code == 405
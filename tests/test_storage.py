@@ -0,0 +1,154 @@
+import os
+import sqlite3
+import time
+
+import pytest
+
+from api.database import DatabaseWriter
+from api.images import RenditionCache
+from api.storage import StorageCollector
+
+GRACE_S = 3600
+CATALOGUE_MAX_AGE_S = 30 * 86400
+
+
+def write(path, size=100, age_s=0):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    if age_s:
+        then = time.time() - age_s
+        os.utime(path, (then, then))
+    return path
+
+
+@pytest.fixture
+def store(tmp_path):
+    db_path, archive_path = tmp_path / "fotherbys.db", tmp_path / "fotherbys_archive.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("ATTACH DATABASE ? AS archive", (str(archive_path),))
+    for schema in ("main", "archive"):
+        conn.execute(f"CREATE TABLE {schema}.lots (id INTEGER PRIMARY KEY, auction_id INTEGER)")
+        conn.execute(f"CREATE TABLE {schema}.auctions (id INTEGER PRIMARY KEY)")
+    conn.execute("CREATE TABLE lot_images (id INTEGER PRIMARY KEY, lot_id INTEGER, image_url TEXT, thumbnail_url TEXT)")
+    conn.execute("INSERT INTO main.auctions VALUES (1)")
+    conn.execute("INSERT INTO archive.auctions VALUES (2)")
+    conn.execute("INSERT INTO main.lots VALUES (10, 1)")
+    conn.execute("INSERT INTO archive.lots VALUES (11, 2)")
+    conn.executemany("INSERT INTO lot_images VALUES (?, ?, ?, ?)", [
+        (1, 10, "/uploads/lots/10_a.jpg", "/uploads/lots/thumbnails/10_thumb_a.jpg"),
+        (2, 11, "/uploads/lots/11_a.jpg", None),
+        (3, 12, "/uploads/lots/12_a.jpg", None),  # lot 12 was deleted
+    ])
+    conn.commit()
+    conn.close()
+
+    writer = DatabaseWriter(db_path)
+    writer.start()
+    upload_root = tmp_path / "uploads_root"
+    renditions = RenditionCache(tmp_path / "renditions", max_bytes=10**9)
+    collector = StorageCollector(db_path, {"archive": archive_path}, upload_root, upload_root / "catalogues",
+                                 renditions, writer, pause_s=0, grace_s=GRACE_S,
+                                 catalogue_max_age_s=CATALOGUE_MAX_AGE_S)
+    yield collector
+    writer.stop()
+
+
+def lots_dir(collector):
+    return collector.upload_root / "uploads" / "lots"
+
+
+def test_referenced_files_are_kept_and_attributed(store):
+    write(lots_dir(store) / "10_a.jpg", 300, age_s=2 * GRACE_S)
+    write(lots_dir(store) / "thumbnails" / "10_thumb_a.jpg", 50, age_s=2 * GRACE_S)
+    write(lots_dir(store) / "11_a.jpg", 200, age_s=2 * GRACE_S)  # archived lot
+
+    report, orphans, dangling = store.scan()
+    assert report["totals"]["originals"] == {"files": 2, "bytes": 500}
+    assert report["totals"]["thumbnails"] == {"files": 1, "bytes": 50}
+    assert report["top_lots"][0] == {"lot_id": 10, "files": 2, "bytes": 350}
+    assert {a["auction_id"]: a["bytes"] for a in report["auctions"]} == {1: 350, 2: 200}
+    assert orphans["uploads"] == []
+    assert dangling == [3]
+
+    assert store.collect()["files"] == 0
+    assert sorted(p.name for p in lots_dir(store).iterdir() if p.is_file()) == ["10_a.jpg", "11_a.jpg"]
+
+
+def test_orphans_inside_the_grace_period_are_kept(store):
+    fresh = write(lots_dir(store) / "99_new.jpg", 100)  # written before its lot_images row
+    old = write(lots_dir(store) / "98_old.jpg", 100, age_s=GRACE_S + 60)
+    old_thumb = write(lots_dir(store) / "thumbnails" / "98_thumb_old.jpg", 10, age_s=GRACE_S + 60)
+    hidden = write(lots_dir(store) / ".upload.tmp", 10, age_s=GRACE_S + 60)
+
+    report, _, _ = store.scan()
+    assert report["totals"]["orphaned"] == {"files": 3, "bytes": 210}
+    assert report["reclaimable"]["uploads"] == {"files": 2, "bytes": 110}
+
+    assert store.collect(dry_run=True) == {"dry_run": True, "files": 2, "bytes": 110, "dangling_image_rows": 1}
+    assert old.exists()
+
+    result = store.collect()
+    assert (result["files"], result["bytes"]) == (2, 110)
+    assert fresh.exists() and hidden.exists()
+    assert not old.exists() and not old_thumb.exists()
+
+
+def test_dangling_image_rows_are_deleted(store):
+    store.collect()
+    rows = store.writer.run(lambda conn: [row[0] for row in conn.execute("SELECT id FROM lot_images ORDER BY id")])
+    assert rows == [1, 2]
+
+
+def test_renditions_of_deleted_images_are_swept(store):
+    directory = store.rendition_cache.directory
+    kept = write(directory / "1-1f-2a-w800-q80.jpg", 40)
+    gone = write(directory / "3-1f-2a-w800-q80.jpg", 40)  # image 3 belongs to a deleted lot
+    unknown = write(directory / "stray.webp", 40)
+
+    report, _, _ = store.scan()
+    assert report["totals"]["renditions"] == {"files": 1, "bytes": 40}
+    assert report["reclaimable"]["renditions"] == {"files": 2, "bytes": 80}
+
+    result = store.collect()
+    assert (result["files"], result["bytes"]) == (2, 80)
+    assert kept.exists() and not gone.exists() and not unknown.exists()
+
+
+def test_catalogues_expire_and_deleted_auctions_lose_theirs(store):
+    catalogues = store.catalogue_dir
+    current = write(catalogues / "Fotherbys_Catalogue_1.pdf", 500, age_s=86400)
+    stale = write(catalogues / "Fotherbys_Catalogue_2.pdf", 500, age_s=CATALOGUE_MAX_AGE_S + 60)  # archived auction
+    deleted_fresh = write(catalogues / "Fotherbys_Catalogue_3.pdf", 500)
+    deleted_old = write(catalogues / "Fotherbys_Catalogue_4.pdf", 500, age_s=GRACE_S + 60)
+    fingerprints = write(catalogues / ".fingerprints.json", 20, age_s=CATALOGUE_MAX_AGE_S + 60)
+
+    report, _, _ = store.scan()
+    assert report["totals"]["catalogues"] == {"files": 2, "bytes": 1000}
+    assert report["reclaimable"]["catalogues"] == {"files": 2, "bytes": 1000}
+
+    store.collect()
+    assert current.exists() and deleted_fresh.exists() and fingerprints.exists()
+    assert not stale.exists() and not deleted_old.exists()
+
+
+def test_deletions_are_batched(store):
+    store.batch_size = 2
+    for i in range(5):
+        write(lots_dir(store) / f"9{i}_old.jpg", 10, age_s=GRACE_S + 60)
+    assert store.collect()["files"] == 5
+    assert not any(lots_dir(store).glob("9*_old.jpg"))
+
+
+def test_usage_for_lot(store):
+    write(lots_dir(store) / "10_a.jpg", 300)
+    write(store.rendition_cache.directory / "1-1f-2a-w400-q80.jpg", 30)
+    usage = store.usage_for_lot(10)
+    assert usage["bytes"] == 330
+    assert {f["path"] for f in usage["files"]} == {"/uploads/lots/10_a.jpg", "rendition:1-1f-2a-w400-q80.jpg"}
+
+
+def test_api_keeps_a_copied_database_out_of_the_live_upload_tree(api_main):
+    assert api_main.DB_PATH != api_main.LIVE_DB_PATH
+    assert api_main.UPLOAD_ROOT == api_main.database_dir("uploads")
+    assert api_main.storage_collector.upload_root == api_main.UPLOAD_ROOT
+    assert api_main.storage_collector.catalogue_dir == api_main.UPLOAD_ROOT / "catalogues"